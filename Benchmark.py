@@ -0,0 +1,262 @@
+#################################################################################################################
+# The "os", "sys", "subprocess" and "json" libraries run every Case in its own process and save the Results.
+import os
+import sys
+import json
+import platform
+import subprocess
+import importlib
+# The "time" and "multiprocessing" libraries measure the speed, memory and scaling of the Simulators.
+import time
+import multiprocessing as mp
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+#################################################################################################################
+
+# STEP 1. Benchmark of both Simulation Environements on their deterministic stand-in Backends (see "KineticModel.py").
+# No ASPEN+ and no GPU are needed. The Cache is switched off, so every step is Simulated, and the actions are drawn
+# from a seeded random generator, so every run plays the same episodes. For every Case it measures:
+#   - Startup [ms]: importing the Simulator module, making a Simulator, its first reset (which opens the Document),
+#     and making a Simulator from a DocumentPool that opened its Document before.
+#   - Throughput [steps/s], and the Step Latency (mean, p50, p99) and Reset Latency [ms].
+#   - Memory growth of the Python heap over N_EPISODES episodes, per 1000 episodes.
+#   - Scaling: the total throughput of 1, 2, 4, ... Simulators stepped in parallel processes.
+# The Results are saved as JSON and can be compared with a stored Baseline:
+#   python Benchmark.py --output Results.json --baseline Baseline.json
+# Both Cases use the same module names, so every Case is measured in its own Python process.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CASES = {"discrete": ("DiscreteCase", "SimulationEnv", "IsomerisationModel"),
+         "converter": (os.path.join("Second Case Example", "PythonFiles"), "SimulationEnv2", "ConverterModel")}
+# Metric -> (True when higher is better, FLOOR), compared with the Baseline. A change is relative to the Baseline value,
+# or to FLOOR when that is larger, so a Memory growth that stays around 0 is not flagged for its noise.
+METRICS = {"STEPS PER SECOND": (True, 0), "STEP MEAN [ms]": (False, 0), "STEP P50 [ms]": (False, 0),
+           "STEP P99 [ms]": (False, 0), "RESET MEAN [ms]": (False, 0),
+           "MEMORY GROWTH [blocks/1000 episodes]": (False, 1000), "IMPORT [ms]": (False, 0),
+           "CONSTRUCT [ms]": (False, 0), "FIRST RESET [ms]": (False, 0), "POOL CONSTRUCT [ms]": (False, 0)}
+
+
+# STEP 1.1. Create the Simulator of a Case, with its stand-in Backend and without a Cache
+# With a POOL the Backend is checked out of it instead.
+def Make_Env(CASE, RECORD_PATH=None, POOL=None):
+    FOLDER, MODULE, MODEL = CASES[CASE]
+    if os.path.join(ROOT, FOLDER) not in sys.path:
+        sys.path.insert(0, os.path.join(ROOT, FOLDER))
+    Simulator = importlib.import_module(MODULE).Simulator
+    BACKEND = None if POOL is not None else getattr(importlib.import_module("KineticModel"), MODEL)()
+    ResultCache = importlib.import_module("Common.ResultCache").ResultCache
+    return Simulator(BACKEND, ResultCache(MAX_SIZE=0), RECORD_PATH=RECORD_PATH, POOL=POOL)
+
+
+# STEP 1.2. Play N_STEPS seeded random actions, the Latency of every step and reset is returned [s]
+def Play(env, N_STEPS, SEED):
+    RNG = np.random.default_rng(SEED)
+    STEPS, RESETS = np.zeros(N_STEPS), []
+    env.reset()
+    for i in range(N_STEPS):
+        START = time.perf_counter()
+        STATE, REWARD, done, INFO = env.step(int(RNG.integers(env.action_space.n)))
+        STEPS[i] = time.perf_counter() - START
+        if done:
+            START = time.perf_counter()
+            env.reset()
+            RESETS.append(time.perf_counter() - START)
+    return STEPS, np.array(RESETS)
+
+#################################################################################################################
+
+# STEP 2. The Measurements of one Case
+
+
+# Startup of a Simulator, measured first in the fresh Worker process, so the import is not cached yet.
+def Measure_Startup(CASE):
+    FOLDER, MODULE, MODEL = CASES[CASE]
+    sys.path.insert(0, os.path.join(ROOT, FOLDER))
+    START = time.perf_counter()
+    importlib.import_module(MODULE)
+    IMPORTED = time.perf_counter()
+    env = Make_Env(CASE)
+    CONSTRUCTED = time.perf_counter()
+    env.reset()
+    RESET = time.perf_counter()
+    DocumentPool = importlib.import_module("Common.DocumentPool").DocumentPool
+    POOL = DocumentPool(getattr(importlib.import_module("KineticModel"), MODEL), SIZE=1)
+    POOL_START = time.perf_counter()
+    Make_Env(CASE, POOL=POOL)
+    return {"IMPORT [ms]": 1000*(IMPORTED - START),
+            "CONSTRUCT [ms]": 1000*(CONSTRUCTED - IMPORTED),
+            "FIRST RESET [ms]": 1000*(RESET - CONSTRUCTED),
+            "POOL CONSTRUCT [ms]": 1000*(time.perf_counter() - POOL_START)}
+
+
+# The same episodes are played REPEAT times and the fastest run is kept, which filters out other load on the machine.
+def Measure_Latency(CASE, N_STEPS, SEED, REPEAT=3):
+    BEST = None
+    for i in range(REPEAT):
+        env = Make_Env(CASE)
+        Play(env, N_STEPS//10, SEED + 1)  # Warm-up
+        START = time.perf_counter()
+        STEPS, RESETS = Play(env, N_STEPS, SEED)
+        SECONDS = time.perf_counter() - START
+        if BEST is None or SECONDS < BEST[0]:
+            BEST = (SECONDS, STEPS, RESETS)
+    SECONDS, STEPS, RESETS = BEST
+    return {"STEPS": N_STEPS,
+            "STEPS PER SECOND": N_STEPS/SECONDS,
+            "STEP MEAN [ms]": 1000*STEPS.mean(),
+            "STEP P50 [ms]": 1000*np.percentile(STEPS, 50),
+            "STEP P99 [ms]": 1000*np.percentile(STEPS, 99),
+            "RESET MEAN [ms]": 1000*RESETS.mean() if len(RESETS) else None}
+
+
+# STEP 2.1. Growth of the Python heap over N_EPISODES episodes, after a warm-up of WARMUP_EPISODES
+# The heap is measured as the number of memory blocks Python has in use (sys.getallocatedblocks) after a garbage
+# collection, which unlike tracemalloc does not slow the Simulator down. The episodes are recorded in memory-mapped
+# Files, so what grows is kept by the Simulator and not by its Recorders. On Linux the peak RSS is reported as well.
+def Measure_Memory(CASE, N_EPISODES, SEED, WARMUP_EPISODES=100):
+    import gc, tempfile
+    env = Make_Env(CASE, os.path.join(tempfile.mkdtemp(prefix="Benchmark_"), "Run"))
+    RNG = np.random.default_rng(SEED)
+    EPISODES, BEFORE = 0, None
+    env.reset()
+    while EPISODES < WARMUP_EPISODES + N_EPISODES:
+        STATE, REWARD, done, INFO = env.step(int(RNG.integers(env.action_space.n)))
+        if done:
+            env.reset()
+            EPISODES += 1
+            if EPISODES == WARMUP_EPISODES:
+                gc.collect()
+                BEFORE = sys.getallocatedblocks()
+    gc.collect()
+    AFTER = sys.getallocatedblocks()
+    RESULT = {"EPISODES": N_EPISODES, "MEMORY GROWTH [blocks/1000 episodes]": 1000*(AFTER - BEFORE)/N_EPISODES}
+    try:
+        import resource
+        RESULT["PEAK RSS [bytes]"] = 1024*resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        pass
+    return RESULT
+
+
+# STEP 2.2. Total throughput of N_ENVS Simulators, every one stepped in its own process
+def Scaling_Worker(CASE, N_STEPS, SEED, QUEUE, GO):
+    import contextlib
+    with open(os.devnull, "w") as NULL, contextlib.redirect_stdout(NULL): # The Simulators print every episode
+        env = Make_Env(CASE)
+        QUEUE.put("ready")
+        GO.wait()   # All the Simulators start stepping together
+        Play(env, N_STEPS, SEED)
+    QUEUE.put("done")
+
+
+def Measure_Scaling(CASE, N_STEPS, SEED, N_ENVS=(1, 2, 4)):
+    CONTEXT = mp.get_context("spawn")
+    RESULTS = {}
+    for N in N_ENVS:
+        QUEUE, GO = CONTEXT.Queue(), CONTEXT.Event()
+        PROCESSES = [CONTEXT.Process(target=Scaling_Worker, args=(CASE, N_STEPS, SEED + i, QUEUE, GO))
+                     for i in range(N)]
+        for PROCESS in PROCESSES:
+            PROCESS.start()
+        for PROCESS in PROCESSES:
+            QUEUE.get()     # Every Simulator is created before the clock starts
+        START = time.perf_counter()
+        GO.set()
+        for PROCESS in PROCESSES:
+            QUEUE.get()
+        SECONDS = time.perf_counter() - START
+        for PROCESS in PROCESSES:
+            PROCESS.join()
+        RESULTS[str(N)] = {"STEPS PER SECOND": N*N_STEPS/SECONDS}
+    for N in RESULTS:
+        RESULTS[N]["EFFICIENCY"] = RESULTS[N]["STEPS PER SECOND"]/(int(N)*RESULTS["1"]["STEPS PER SECOND"])
+    return RESULTS
+
+
+def Measure_Case(CASE, N_STEPS, N_EPISODES, N_ENVS, SEED, REPEAT):
+    import contextlib
+    with open(os.devnull, "w") as NULL, contextlib.redirect_stdout(NULL):
+        RESULT = Measure_Startup(CASE)
+        RESULT.update(Measure_Latency(CASE, N_STEPS, SEED, REPEAT))
+        RESULT.update(Measure_Memory(CASE, N_EPISODES, SEED))
+    RESULT["SCALING"] = Measure_Scaling(CASE, N_STEPS//max(N_ENVS), SEED, N_ENVS)
+    return RESULT
+
+#################################################################################################################
+
+# STEP 3. Compare the Results with a Baseline: a metric that got worse by more than TOLERANCE is a Regression
+
+
+def Compare(RESULTS, BASELINE, TOLERANCE):
+    REGRESSIONS = []
+    for CASE, RESULT in RESULTS["CASES"].items():
+        if CASE not in BASELINE["CASES"]:
+            continue
+        print(CASE)
+        for METRIC, (HIGHER_IS_BETTER, FLOOR) in METRICS.items():
+            NEW, OLD = RESULT.get(METRIC), BASELINE["CASES"][CASE].get(METRIC)
+            if NEW is None or OLD is None:
+                continue
+            if max(abs(OLD), FLOOR) == 0:
+                CHANGE = 0.0 if NEW == 0 else np.inf*np.sign(NEW)
+            else:
+                CHANGE = (NEW - OLD)/max(abs(OLD), FLOOR)
+            WORSE = -CHANGE if HIGHER_IS_BETTER else CHANGE
+            FLAG = ""
+            if WORSE > TOLERANCE:
+                FLAG = "  REGRESSION"
+                REGRESSIONS.append((CASE, METRIC))
+            print(f"  {METRIC}: {OLD:.4g} -> {NEW:.4g} ({100*CHANGE:+.1f}%){FLAG}")
+    return REGRESSIONS
+
+#################################################################################################################
+
+# STEP 4. Run every Case in its own process, save the Results and compare them with the Baseline
+
+
+if __name__ == "__main__":
+    import argparse
+    PARSER = argparse.ArgumentParser(description="Throughput, latency, memory and scaling of both Simulators.")
+    PARSER.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    PARSER.add_argument("--steps", type=int, default=5000)
+    PARSER.add_argument("--episodes", type=int, default=1000)
+    PARSER.add_argument("--envs", type=int, nargs="+", default=[1, 2, 4])
+    PARSER.add_argument("--seed", type=int, default=0)
+    PARSER.add_argument("--repeat", type=int, default=3)
+    PARSER.add_argument("--output", default="Benchmark.json")
+    PARSER.add_argument("--baseline", default=None, help="JSON Results of an earlier run to compare with")
+    PARSER.add_argument("--tolerance", type=float, default=0.2)
+    PARSER.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    ARGS = PARSER.parse_args()
+
+    if ARGS.worker is not None:
+        RESULT = Measure_Case(ARGS.worker, ARGS.steps, ARGS.episodes, ARGS.envs, ARGS.seed, ARGS.repeat)
+        print(json.dumps(RESULT))
+        sys.exit(0)
+
+    RESULTS = {"MACHINE": {"PLATFORM": platform.platform(), "PYTHON": platform.python_version(),
+                           "NUMPY": np.__version__, "CPUS": os.cpu_count()},
+               "SETTINGS": {"STEPS": ARGS.steps, "EPISODES": ARGS.episodes, "ENVS": ARGS.envs, "SEED": ARGS.seed,
+                            "REPEAT": ARGS.repeat},
+               "CASES": {}}
+    for CASE in ARGS.cases:
+        OUTPUT = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", CASE,
+                                 "--steps", str(ARGS.steps), "--episodes", str(ARGS.episodes),
+                                 "--seed", str(ARGS.seed), "--repeat", str(ARGS.repeat),
+                                 "--envs"] + [str(N) for N in ARGS.envs],
+                                capture_output=True, text=True, check=True)
+        RESULTS["CASES"][CASE] = json.loads(OUTPUT.stdout.strip().splitlines()[-1])
+        RESULT = RESULTS["CASES"][CASE]
+        print(f"{CASE}: {RESULT['STEPS PER SECOND']:.0f} steps/s, step p50/p99 {RESULT['STEP P50 [ms]']:.3f}/"
+              f"{RESULT['STEP P99 [ms]']:.3f} ms, reset {RESULT['RESET MEAN [ms]']:.3f} ms, memory "
+              f"{RESULT['MEMORY GROWTH [blocks/1000 episodes]']:.0f} blocks/1000 episodes, scaling "
+              + ", ".join(f"{N}: {SCALE['STEPS PER SECOND']:.0f}" for N, SCALE in RESULT["SCALING"].items())
+              + f", startup {RESULT['IMPORT [ms]']:.0f} ms import + {RESULT['CONSTRUCT [ms]']:.1f} ms construct + "
+              f"{RESULT['FIRST RESET [ms]']:.1f} ms first reset ({RESULT['POOL CONSTRUCT [ms]']:.1f} ms from a pool)")
+    with open(ARGS.output, "w") as FILE:
+        json.dump(RESULTS, FILE, indent=2)
+    if ARGS.baseline is not None:
+        with open(ARGS.baseline) as FILE:
+            BASELINE = json.load(FILE)
+        REGRESSIONS = Compare(RESULTS, BASELINE, ARGS.tolerance)
+        sys.exit(1 if REGRESSIONS else 0)
@@ -0,0 +1,409 @@
+#################################################################################################################
+# The "os" library is used to direct Python to the location of the ASPEN File.
+import os
+# The "copy" and "tempfile" libraries are used to keep Snapshots of the Flowsheet.
+import copy
+import tempfile
+# "time" bounds a Solve by its time budget, "random" draws the failures injected into a stand-in.
+import time
+import random
+# The "win32com.client" library is used as an alternative to VBA  for the communication between ASPEN+ and Python.
+# It only exists on Windows (where ASPEN+ is installed), so the other Backends must work without it. Loading it is
+# slow, so it is only imported when the first ASPEN+ Document is opened (see Import_COM).
+win32 = None
+pythoncom = None
+# "psutil" measures the Memory of the Simulation for the Restart Policy, it is optional and imported at first use.
+psutil = None
+#################################################################################################################
+
+# STEP 0. Import the optional libraries when they are first needed, and not when a Simulator module is imported.
+
+
+def Import_COM():
+    global win32, pythoncom
+    if win32 is None:
+        try:
+            import win32com.client as win32
+            import pythoncom
+        except ImportError:
+            raise RuntimeError("The ASPEN+ Backend needs the win32com library, which is only available on Windows")
+    return win32
+
+
+def Import_psutil():
+    global psutil
+    if psutil is None:
+        try:
+            import psutil
+        except ImportError:
+            psutil = False  # Not installed, the Memory can not be measured
+    return psutil or None
+
+#################################################################################################################
+
+# STEP 1. Define the Backend Interface.
+# The Simulator never talks to ASPEN+ directly, it only calls the operations listed below.
+# Any object that implements them (the real ASPEN+ Document or an in-process stand-in) can be used for training.
+
+
+class Backend:
+
+# STEP 1.1. Open, Close and Restart the Flowsheet
+    def Open(self):
+        raise NotImplementedError
+
+    def Close(self):
+        raise NotImplementedError
+
+    def Restart(self):
+        self.Close()    # Close the Simulation
+        self.Open()     # Completely restart the simulation
+        self.Run()
+
+# The Document is only opened when it is first needed (the first reset), and only once, Eg. not again when it was
+# checked out of a DocumentPool already open.
+    OPENED = False
+
+    def Ensure_Open(self):
+        if not self.OPENED:
+            self.Open()
+            self.OPENED = True
+
+# STEP 1.2. Solve the Flowsheet (Engine.Run2() in ASPEN+)
+    def Run(self):
+        raise NotImplementedError
+
+# STEP 1.2.1. Solve within a time budget TIMEOUT [s] (None: no limit), and report whether the Flowsheet converged.
+# With Names_BLK (see Run_Downstream) only those Blocks are solved again, the Blocks in front of them keep their Outlets.
+# For testing, failures can be injected into any stand-in: Eg. ConverterModel().Inject_Failures(0.2) makes one in five
+# solves report that they did not converge.
+    FAIL_RATE = 0.0
+    FAIL_RNG = random.Random(0) # Replaced by a seeded one of its own in every Backend that Inject_Failures is called on
+
+    def Solve(self, TIMEOUT=None, Names_BLK=None):
+        if Names_BLK is None:
+            self.Run()
+        else:
+            self.Run_Downstream(Names_BLK)
+        if self.FAIL_RATE and self.FAIL_RNG.random() < self.FAIL_RATE:
+            return False
+        return self.Get_Status()
+
+    def Get_Status(self):
+        return True
+
+    def Inject_Failures(self, FAIL_RATE, SEED=0):
+        self.FAIL_RATE = FAIL_RATE
+        self.FAIL_RNG = random.Random(SEED)
+        return self
+
+# STEP 1.2.2. The Fidelity of the next solves: "FULL" (the accuracy of the ".bkp" File) or "SCREEN", a cheap solve with
+# looser settings (Eg. tolerance, iteration cap, PFR steps), good enough to tell a poor Flowsheet from a good one.
+# Only the Fidelities listed in FIDELITIES are known to a Backend, the others solve at full Fidelity whatever is set.
+    FIDELITIES = ("FULL",)
+    FIDELITY = "FULL"
+
+    def Set_Fidelity(self, FIDELITY):
+        self.FIDELITY = FIDELITY
+
+# Solve the Flowsheet again after the Inputs of Names_BLK changed. Names_BLK holds the changed Block and every Block
+# downstream of it, the Blocks in front of them keep their converged Outlets. By default the whole Flowsheet is solved.
+    def Run_Downstream(self, Names_BLK):
+        self.Run()
+
+# STEP 1.3. Read the Output [kmol/s] of a Chemical in a Stream, or of many (Stream, Chemical) pairs in one operation
+    def Get_Output(self, Name_STRM, Name_CHEM):
+        raise NotImplementedError
+
+    def Get_Outputs(self, OUTPUTS):
+        return [self.Get_Output(Name_STRM, Name_CHEM) for Name_STRM, Name_CHEM in OUTPUTS]
+
+# STEP 1.4. Create, Delete and Connect Streams
+    def Add_Stream(self, Name_STRM, SPECS=None):
+        raise NotImplementedError
+
+    def Remove_Stream(self, Name_STRM):
+        raise NotImplementedError
+
+    def Remove_All_Streams(self):
+        raise NotImplementedError
+
+    def Connect(self, Name_BLK, Name_PORT, Name_STRM):
+        raise NotImplementedError
+
+    def Disconnect(self, Name_BLK, Name_PORT, Name_STRM):
+        raise NotImplementedError
+
+# STEP 1.5. Read and Write the Temperature [K] of a Block
+    def Get_Temp(self, Name_BLK):
+        raise NotImplementedError
+
+    def Set_Temp(self, Name_BLK, Temperature):
+        raise NotImplementedError
+
+# STEP 1.6. Read and Write the Temperatures of many Blocks in one operation
+    def Get_Temps(self, Names_BLK):
+        return [self.Get_Temp(Name_BLK) for Name_BLK in Names_BLK]
+
+    def Set_Temps(self, TEMPS):
+        for Name_BLK, Temperature in TEMPS.items():
+            self.Set_Temp(Name_BLK, Temperature)
+
+# STEP 1.7. Snapshot the Flowsheet, and roll back to it later without reopening the Document
+# The in-process stand-ins keep their whole State in Python, so a deep copy of it is enough.
+# Only the Attributes in COUNTERS (which count the work done, Eg. REACTOR_SOLVES) are not rolled back, and neither are
+# the injected failures.
+    COUNTERS = ()
+
+    def Snapshot(self):
+        return copy.deepcopy({KEY: VALUE for KEY, VALUE in self.__dict__.items()
+                              if KEY not in self.COUNTERS and KEY != "FAIL_RNG"})
+
+    def Restore(self, SNAPSHOT):
+        self.__dict__.update(copy.deepcopy(SNAPSHOT))
+
+# STEP 1.8. Memory [bytes] used by the Simulation, None if it cannot be measured
+    def Get_Memory(self):
+        if Import_psutil() is None:
+            return None
+        return psutil.Process().memory_info().rss
+
+# STEP 1.9. Hand the Flowsheet over to another thread (see "AsyncEnv.py")
+# Share() is called on the thread that opened the Flowsheet, Enter_Thread(SHARED) on the thread that takes it over.
+# The in-process stand-ins can be used from any thread, so there is nothing to do.
+    def Share(self):
+        return None
+
+    def Enter_Thread(self, SHARED):
+        pass
+
+# STEP 1.10. Name what solves the Flowsheet, so the Results of different Backends are never mixed (see "ResultStore.py")
+    def Get_Source(self):
+        return type(self).__name__
+
+#################################################################################################################
+
+# STEP 2. The ASPEN+ Backend, which drives the ".bkp" File through ActiveX Automation.
+# Every hop in a path like Tree.Elements("Data").Elements("Blocks").Elements("TC1") is a cross-process COM call.
+# The Backend therefore resolves every Node once, keeps its handle until the Document is reopened (or the Stream
+# it belongs to is deleted) and counts every COM call it makes in TREE_CALLS.
+
+
+class AspenPlus(Backend):
+    # "EARLY_BINDING" selects win32.gencache.EnsureDispatch instead of win32.Dispatch.
+    ENGINE_PROCESSES = ("AspenPlus.exe", "apmain.exe")   # Processes that hold the Memory, the first one per Document
+    IAP_REINIT_BLOCK = 1    # IAP_REINIT_TYPE of Engine.Reinit that only reinitialises one Block
+    RUN_STATUS = ("Data", "Results Summary", "Run-Status", "Output", "UOSSTAT2")
+    CONVERGED_STATUS = (8, 9)   # UOSSTAT2 of a Run with Results, without or with Warnings (10: with Errors)
+    POLL_INTERVAL = 0.01    # [s] between two checks of a Run that has a time budget
+    # The Variables a screening solve loosens: the default tolerance, and the iteration cap of the Wegstein tear loops.
+    FIDELITIES = ("FULL", "SCREEN")
+    SCREEN_SETTINGS = {("Data", "Convergence", "Conv-Options", "Input", "TOL"): 1e-2,
+                       ("Data", "Convergence", "Conv-Options", "Input", "WEG_MAXIT"): 10}
+    def __init__(self, PATH, EARLY_BINDING=False):
+        self.PATH = PATH
+        self.EARLY_BINDING = EARLY_BINDING
+        self.AspenSimulation = None
+        self.NODES = {}     # Path (tuple of Element Names) -> Node Handle
+        self.TREE_CALLS = 0 # Number of COM calls made on the Tree
+        self.FULL_SETTINGS = None   # The SCREEN_SETTINGS Variables as the File holds them
+        self.ENGINE_PIDS = set()    # The AspenPlus.exe process started for this Document (see Open)
+        # Snapshots are saved next to the other temporary Files, one per Backend
+        self.SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), "Snapshot-" + str(os.getpid()) + "-"
+                                          + str(id(self)) + "-" + os.path.basename(PATH))
+
+    def Open(self):
+        Import_COM()
+        BEFORE = self.Get_Engine_PIDs()
+        # We define the document type of the Aspen+ File.
+        if self.EARLY_BINDING:
+            self.AspenSimulation = win32.gencache.EnsureDispatch("Apwn.Document")
+        else:
+            self.AspenSimulation = win32.Dispatch("Apwn.Document")
+        self.AspenSimulation.InitFromArchive2(os.path.abspath(self.PATH))    # Path to File
+        # The engine process that appeared is the one of this Document. When several did (other Documents were opened at
+        # the same time) it can not be told apart, and the Memory is not measured until the next Restart.
+        STARTED = self.Get_Engine_PIDs() - BEFORE
+        self.ENGINE_PIDS = STARTED if len(STARTED) == 1 else set()
+        self.AspenSimulation.Visible = False    # Not opening the Simulation expedites training
+        self.NODES = {}
+        self.FIDELITY = "FULL"  # The File is solved at its own settings
+
+    def Close(self):
+        self.AspenSimulation.Close()
+        self.NODES = {}
+
+    def Run(self):
+        self.AspenSimulation.Engine.Run2() # Run the ASPEN+ Simulation
+
+    def Solve(self, TIMEOUT=None, Names_BLK=None):
+        if Names_BLK is not None:
+            self.Reinit(Names_BLK)
+        if TIMEOUT is None:
+            self.Run()
+        else:
+            self.AspenSimulation.Engine.Run2(True)  # Asynchronous, so a Run over its time budget can be stopped
+            END = time.perf_counter() + TIMEOUT
+            while self.AspenSimulation.Engine.IsRunning:
+                if time.perf_counter() > END:
+                    self.AspenSimulation.Engine.Stop()
+                    return False
+                time.sleep(self.POLL_INTERVAL)
+        return self.Get_Status()
+
+    def Get_Status(self):
+        return self.Get_Values([self.RUN_STATUS])[0] in self.CONVERGED_STATUS
+
+# The settings of the File are read before they are first loosened, and written back for a full Fidelity solve
+    def Set_Fidelity(self, FIDELITY):
+        if FIDELITY == self.FIDELITY:
+            return
+        PATHS = list(self.SCREEN_SETTINGS)
+        if FIDELITY == "SCREEN":
+            if self.FULL_SETTINGS is None:
+                self.FULL_SETTINGS = dict(zip(PATHS, self.Get_Values(PATHS)))
+            self.Set_Values(self.SCREEN_SETTINGS)
+        else:
+            self.Set_Values(self.FULL_SETTINGS)
+        self.FIDELITY = FIDELITY
+
+    def Run_Downstream(self, Names_BLK):
+        self.Reinit(Names_BLK)
+        self.Run()
+
+    def Reinit(self, Names_BLK):
+        # Only the downstream Blocks are reinitialised, the others keep their Results and seed them with their Outlets
+        for Name_BLK in Names_BLK:
+            self.AspenSimulation.Engine.Reinit(self.IAP_REINIT_BLOCK, Name_BLK)
+
+# STEP 2.1. Resolve a Node from its Path, re-using the Handles of the Path and of its Parents
+    def Node(self, PATH):
+        if PATH in self.NODES:
+            return self.NODES[PATH]
+        if len(PATH) == 0:
+            NODE = self.AspenSimulation.Tree
+        else:
+            NODE = self.Node(PATH[:-1]).Elements(PATH[-1])
+        self.TREE_CALLS += 1
+        self.NODES[PATH] = NODE
+        return NODE
+
+    def Forget(self, PATH):
+        # Drop the Handles of a Node that was deleted, and of everything below it
+        for KNOWN in [KNOWN for KNOWN in self.NODES if KNOWN[:len(PATH)] == PATH]:
+            del self.NODES[KNOWN]
+
+# STEP 2.2. Bulk Get/Set of many Variables, Eg. Get_Values([("Data", "Blocks", "TC1", "Input", "TEMP"), ...])
+    def Get_Values(self, PATHS):
+        self.TREE_CALLS += len(PATHS)
+        return [self.Node(PATH).Value for PATH in PATHS]
+
+    def Set_Values(self, VALUES):
+        self.TREE_CALLS += len(VALUES)
+        for PATH, VALUE in VALUES.items():
+            self.Node(PATH).Value = VALUE
+
+# STEP 2.3. The Backend Interface, written with the Node Handles
+    def Get_Output(self, Name_STRM, Name_CHEM):
+        return self.Get_Values([("Data", "Streams", Name_STRM, "Output", "MOLEFLOW", "MIXED", Name_CHEM)])[0]
+
+    def Get_Outputs(self, OUTPUTS):
+        return self.Get_Values([("Data", "Streams", Name_STRM, "Output", "MOLEFLOW", "MIXED", Name_CHEM)
+                                for Name_STRM, Name_CHEM in OUTPUTS])
+
+    def Add_Stream(self, Name_STRM, SPECS=None):
+        self.Forget(("Data", "Streams", Name_STRM))
+        self.TREE_CALLS += 1
+        self.Node(("Data", "Streams")).Elements.Add(Name_STRM) # Create a Stream with that Name and the following SPECS
+        if SPECS is None:
+            return
+        VALUES = {}
+        for SPEC, VALUE in SPECS.items():
+            PATH = ("Data", "Streams", Name_STRM, "Input", SPEC, "MIXED")
+            if isinstance(VALUE, dict): # Component Flows are one level deeper Eg. FLOW/MIXED/N-BUT-01
+                for Name_CHEM, FLOW in VALUE.items():
+                    VALUES[PATH + (Name_CHEM,)] = FLOW
+            else:
+                VALUES[PATH] = VALUE
+        self.Set_Values(VALUES)
+
+    def Remove_Stream(self, Name_STRM):
+        self.TREE_CALLS += 1
+        self.Node(("Data", "Streams")).Elements.Remove(Name_STRM)
+        self.Forget(("Data", "Streams", Name_STRM))
+
+    def Remove_All_Streams(self):
+        self.TREE_CALLS += 1
+        self.Node(("Data", "Streams")).RemoveAll()
+        self.Forget(("Data", "Streams"))
+
+    def Connect(self, Name_BLK, Name_PORT, Name_STRM):
+        self.TREE_CALLS += 1
+        self.Node(("Data", "Blocks", Name_BLK, "Ports", Name_PORT)).Elements.Add(Name_STRM)
+
+    def Disconnect(self, Name_BLK, Name_PORT, Name_STRM):
+        self.TREE_CALLS += 1
+        self.Node(("Data", "Blocks", Name_BLK, "Ports", Name_PORT)).Elements.Remove(Name_STRM)
+
+    def Get_Temp(self, Name_BLK):
+        return self.Get_Temps([Name_BLK])[0]
+
+    def Set_Temp(self, Name_BLK, Temperature):
+        self.Set_Temps({Name_BLK: Temperature})
+
+    def Get_Temps(self, Names_BLK):
+        return self.Get_Values([("Data", "Blocks", Name_BLK, "Input", "TEMP") for Name_BLK in Names_BLK])
+
+    def Set_Temps(self, TEMPS):
+        self.Set_Values({("Data", "Blocks", Name_BLK, "Input", "TEMP"): Temperature
+                         for Name_BLK, Temperature in TEMPS.items()})
+
+# STEP 2.4. The converged Flowsheet is saved as an Archive, and loaded back into the running ASPEN+ process.
+# This skips starting a new ASPEN+ process (Dispatch) and solving the Flowsheet again, as Restart() does.
+    def Snapshot(self):
+        self.AspenSimulation.SaveAs(self.SNAPSHOT_PATH, True)
+        return self.SNAPSHOT_PATH
+
+    def Restore(self, SNAPSHOT):
+        self.AspenSimulation.InitFromArchive2(SNAPSHOT)
+        self.AspenSimulation.Visible = False
+        self.NODES = {}     # The Handles of the old Tree are no longer valid
+        self.FIDELITY = "FULL"  # The Snapshot is taken at the first reset, before any screening solve
+
+    def Get_Source(self):
+        return "AspenPlus:" + os.path.basename(self.PATH)  # The Workers solve copies of the File with the same Name
+
+# STEP 2.4.1. Only the engine processes of this Document are measured: its AspenPlus.exe and the apmain.exe below it.
+# The Workers of a VectorEnv each have a Document of their own, so one that grows does not restart them all.
+    def Get_Memory(self):
+        if Import_psutil() is None or not self.ENGINE_PIDS:
+            return None
+        MEMORY = 0
+        for PID in self.ENGINE_PIDS:
+            try:
+                PROCESS = psutil.Process(PID)
+                for ENGINE in [PROCESS] + PROCESS.children(recursive=True):
+                    if ENGINE.name() in self.ENGINE_PROCESSES:
+                        MEMORY += ENGINE.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass    # It ended, Eg. the Document was closed
+        return MEMORY
+
+    def Get_Engine_PIDs(self):
+        if Import_psutil() is None:
+            return set()
+        return {PROCESS.pid for PROCESS in psutil.process_iter(["name"])
+                if PROCESS.info["name"] == self.ENGINE_PROCESSES[0]}
+
+# STEP 2.5. COM Handles belong to the thread that made them, so the Document is marshalled to the new thread
+    def Share(self):
+        return pythoncom.CoMarshalInterThreadInterfaceInStream(pythoncom.IID_IDispatch, self.AspenSimulation._oleobj_)
+
+    def Enter_Thread(self, SHARED):
+        pythoncom.CoInitialize()
+        DOCUMENT = pythoncom.CoGetInterfaceAndReleaseStream(SHARED, pythoncom.IID_IDispatch)
+        if self.EARLY_BINDING:
+            self.AspenSimulation = win32.gencache.EnsureDispatch(DOCUMENT)
+        else:
+            self.AspenSimulation = win32.Dispatch(DOCUMENT)
+        self.NODES = {}     # The Handles of the old thread can not be used here
@@ -0,0 +1,146 @@
+#################################################################################################################
+# The "time" library is used to measure how long the Environement and the Learner are busy.
+import time
+# The "threading" and "concurrent.futures" libraries run the Flowsheet and the Learner next to the training loop.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+#################################################################################################################
+
+# STEP 1. Define the Asynchronous Step API, which both Simulators inherit.
+# step_async(action) hands the step to a thread of the Environement and returns a Future at once, step_wait() waits
+# for its (STATE, REWARD, done, INFO). While ASPEN+ solves, the training loop is free to do something else.
+# The Future can also be awaited from asyncio, Eg. await asyncio.wrap_future(env.step_async(action)).
+# All Flowsheet calls are made on that one thread, so after the first step_async use reset_async() to reset.
+
+
+class AsyncEnv:
+    EXECUTOR = None # Created on the first asynchronous call
+    FUTURE = None   # Future of the last step_async
+
+    def step_async(self, action):
+        self.FUTURE = self.Get_Executor().submit(self.step, action)
+        return self.FUTURE
+
+    def step_wait(self):
+        return self.FUTURE.result()
+
+    def reset_async(self):
+        return self.Get_Executor().submit(self.reset)
+
+    def close_async(self):
+        if self.EXECUTOR is not None:
+            self.EXECUTOR.shutdown(wait=True)
+            self.EXECUTOR = None
+
+# STEP 1.1. One thread per Environement, which takes the Flowsheet over from the thread that opened it
+    def Get_Executor(self):
+        if self.EXECUTOR is None:
+            self.BACKEND.Ensure_Open() # A Document that is not open yet is opened here, and then handed over
+            SHARED = self.BACKEND.Share()
+            self.EXECUTOR = ThreadPoolExecutor(max_workers=1, initializer=self.BACKEND.Enter_Thread, initargs=(SHARED,))
+        return self.EXECUTOR
+
+#################################################################################################################
+
+# STEP 2. Define the Actor/Learner Driver.
+# The Actor (the calling thread) plays the Environement with step_async/step_wait and fills the Replay Memory, while
+# the Learner thread keeps doing gradient updates. The Network is shared, so SELECT_ACTION and TRAIN take turns
+# through a Lock, but the Flowsheet solve itself overlaps with the training.
+# SELECT_ACTION maps a State to an action, Eg. lambda S: dqn.policy.select_action(dqn.compute_q_values([S])).
+# TRAIN does one gradient update on a batch sampled from MEMORY. After WARMUP_STEPS, the Learner does at most
+# TRAIN_RATIO updates per step of the Actor (1 is what DQNAgent.fit does).
+
+
+class ActorLearner:
+    def __init__(self, env, SELECT_ACTION, MEMORY, TRAIN, WARMUP_STEPS=1000, TRAIN_RATIO=1):
+        self.env = env
+        self.SELECT_ACTION = SELECT_ACTION
+        self.MEMORY = MEMORY
+        self.TRAIN = TRAIN
+        self.WARMUP_STEPS = WARMUP_STEPS
+        self.TRAIN_RATIO = TRAIN_RATIO
+        self.LOCK = threading.Lock()
+        self.NEW_STEP = threading.Condition()
+        self.STEPS = 0      # Steps played by the Actor
+        self.UPDATES = 0    # Gradient updates done by the Learner
+        self.ENV_BUSY = 0   # Time spent in the Environement [s]
+        self.LEARNER_BUSY = 0   # Time spent in TRAIN [s]
+
+# STEP 2.1. Play N_STEPS steps, and return how busy the Environement and the Learner were
+    def Run(self, N_STEPS):
+        STOP = threading.Event()
+        LEARNER = threading.Thread(target=self.Learn, args=(STOP,), daemon=True)
+        BUSY = (self.ENV_BUSY, self.LEARNER_BUSY)   # Only this Run is measured
+        START = time.perf_counter()
+        LEARNER.start()
+        STATE = self.env.reset_async().result()
+        for _ in range(N_STEPS):
+            with self.LOCK:
+                action = self.SELECT_ACTION(STATE)
+            STEP_START = time.perf_counter()
+            self.env.step_async(action)
+            with self.NEW_STEP:
+                self.NEW_STEP.notify()  # The Learner trains while the step is solved
+            NEXT_STATE, REWARD, done, INFO = self.env.step_wait()
+            if done:
+                FINAL_STATE, NEXT_STATE = NEXT_STATE, self.env.reset_async().result()
+            self.ENV_BUSY += time.perf_counter() - STEP_START
+            with self.LOCK:
+                self.MEMORY.append(STATE, action, REWARD, done)
+                if done:
+                    self.MEMORY.append(FINAL_STATE, 0, 0., False)  # Like DQNAgent.fit does at the end of an episode
+            with self.NEW_STEP:
+                self.STEPS += 1
+            STATE = NEXT_STATE
+        STOP.set()
+        with self.NEW_STEP:
+            self.NEW_STEP.notify()
+        LEARNER.join()
+        return self.Get_Utilisation(time.perf_counter() - START, BUSY)
+
+# STEP 2.2. The Learner waits until the Actor is far enough ahead, and then does one gradient update
+    def Learn(self, STOP):
+        while not STOP.is_set():
+            with self.NEW_STEP:
+                while not STOP.is_set() and not self.Can_Train():
+                    self.NEW_STEP.wait()
+            if STOP.is_set():
+                break
+            with self.LOCK:
+                TRAIN_START = time.perf_counter()
+                self.TRAIN()
+                self.LEARNER_BUSY += time.perf_counter() - TRAIN_START
+            self.UPDATES += 1
+
+    def Can_Train(self):
+        return self.STEPS >= self.WARMUP_STEPS and self.UPDATES < self.TRAIN_RATIO*(self.STEPS - self.WARMUP_STEPS + 1)
+
+# STEP 2.3. Replay whole Reactor Sequences, Eg. the ones the Planner found, with a single solve each (see
+# evaluate_sequence of the DiscreteCase Simulator). Their transitions go to MEMORY exactly like played steps, and the
+# Learner catches up after every transition with the same TRAIN_RATIO as in Run.
+    def Replay(self, SEQUENCES):
+        BUSY = (self.ENV_BUSY, self.LEARNER_BUSY)
+        START = time.perf_counter()
+        for actions in SEQUENCES:
+            ENV_START = time.perf_counter()
+            RESULT = self.env.Get_Executor().submit(self.env.evaluate_sequence, actions).result()
+            self.ENV_BUSY += time.perf_counter() - ENV_START
+            for STATE, action, REWARD, NEXT_STATE, done in RESULT["TRANSITIONS"]:
+                self.MEMORY.append(STATE, action, REWARD, done)
+                if done:
+                    self.MEMORY.append(NEXT_STATE, 0, 0., False)
+                self.STEPS += 1
+                while self.Can_Train():
+                    TRAIN_START = time.perf_counter()
+                    self.TRAIN()
+                    self.LEARNER_BUSY += time.perf_counter() - TRAIN_START
+                    self.UPDATES += 1
+        return self.Get_Utilisation(time.perf_counter() - START, BUSY)
+
+# STEP 2.4. Share of the wall-clock time the Environement and the Learner were busy
+    def Get_Utilisation(self, SECONDS, BUSY=(0, 0)):
+        return {"STEPS": self.STEPS,
+                "UPDATES": self.UPDATES,
+                "SECONDS": SECONDS,
+                "ENV UTILISATION": (self.ENV_BUSY - BUSY[0])/SECONDS,
+                "LEARNER UTILISATION": (self.LEARNER_BUSY - BUSY[1])/SECONDS}
@@ -0,0 +1,242 @@
+#################################################################################################################
+# The "os", "json" and "pickle" libraries write the Checkpoints and their Index to disk.
+import os
+import json
+import pickle
+# "copy" takes the State of the Simulator at the moment of the Checkpoint, while training goes on.
+import copy
+# The Checkpoints are written on a background thread, so training never waits for the disk.
+from concurrent.futures import ThreadPoolExecutor
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+#################################################################################################################
+
+# STEP 1. Define the Checkpointer.
+# ModelIntervalCheckpoint writes a full copy of the weights every INTERVAL steps, on the training thread, and keeps all
+# of them. The Checkpointer takes the weights of the MODELS (Eg. {"model": dqn.model, "target_model": dqn.target_model})
+# and the State of the Simulator at once, and pickles them on a background thread to DIRECTORY/Checkpoint-<STEP>.pkl.
+# The State of the Simulator is every Counter in ENV_ATTRIBUTES (Eg. DONE_COUNTER, BEST_CASE) and the counters and
+# measurements of the Restart Policy (see RestartPolicy.Get_State), so a resumed run carries on with the same restart
+# schedule. The thresholds of the Restart Policy are the ones the resumed run is started with. The rows of the Recorders (EPISODES, HISTORY) are only
+# written once: every Checkpoint appends the rows recorded since the last one to DIRECTORY/<NAME>.rows, and keeps the
+# number of rows it covers.
+# The weights of the OPTIMIZERS (Eg. {"optimizer": dqn.trainable_model.optimizer}, the moments of Adam), the State of
+# the Replay MEMORY (see ReplayMemory.Get_State) and the global NumPy random State (of the Epsilon-Greedy policy) are
+# kept too, so a resumed run goes on where the Checkpoint was taken instead of starting Adam and the memory again.
+# Only the KEEP_LAST newest Checkpoints and the KEEP_BEST with the highest SCORE are kept, the others are deleted.
+# A DIRECTORY that already holds Checkpoints is resumed with Restore() (see STEP 2) before the next Save.
+
+
+class Checkpointer:
+    ENV_ATTRIBUTES = ("DONE_COUNTER", "MAX_CONVERSION", "BEST_CASE", "N_SIMULATIONS", "FAILED",
+                      "RESET_MUTATIONS_AVOIDED", "RESET_WRITES_AVOIDED", "SOLVES_AVOIDED", "STAGE_BEST")
+    RECORDERS = ("EPISODES", "HISTORY")
+
+    def __init__(self, DIRECTORY, MODELS=None, env=None, OPTIMIZERS=None, MEMORY=None, KEEP_LAST=3, KEEP_BEST=1):
+        self.DIRECTORY = DIRECTORY
+        self.MODELS = dict(MODELS or {})
+        self.env = env
+        self.OPTIMIZERS = dict(OPTIMIZERS or {})
+        self.MEMORY = MEMORY
+        self.KEEP_LAST = KEEP_LAST
+        self.KEEP_BEST = KEEP_BEST
+        self.EXECUTOR = ThreadPoolExecutor(max_workers=1)
+        self.FUTURE = None  # Future of the last Checkpoint that was handed to the background thread
+        self.WRITTEN = {}   # Rows of every Recorder already in its ".rows" File
+        self.RESUMED_STEP = 0   # STEP of the restored Checkpoint, training carries on from there
+        self.OPTIMIZER_WEIGHTS = {} # Restored weights of the OPTIMIZERS that were not built yet, see STEP 2.2
+        os.makedirs(DIRECTORY, exist_ok=True)
+        self.INDEX = self.Load_Index()  # [{"STEP", "SCORE", "FILE"}, ...] of the Checkpoints on disk, oldest first
+
+# STEP 1.1. Take a Checkpoint, Eg. at the end of an episode. Only the copies are made here, the rest is done by the
+# background thread. SCORE (Eg. the mean episode reward since the last Checkpoint) decides which ones are the best.
+    def Save(self, STEP, SCORE=None):
+        CHECKPOINT = {"STEP": STEP, "SCORE": SCORE,
+                      "WEIGHTS": {NAME: MODEL.get_weights() for NAME, MODEL in self.MODELS.items()},
+                      "OPTIMIZERS": {NAME: OPTIMIZER.get_weights() for NAME, OPTIMIZER in self.OPTIMIZERS.items()},
+                      "MEMORY": self.MEMORY.Get_State() if self.MEMORY is not None else None,
+                      "NP_RANDOM": np.random.get_state(), "ENV": None, "RESTART_POLICY": None, "ROWS": {}}
+        NEW_ROWS = {}
+        if self.env is not None:
+            CHECKPOINT["ENV"] = {NAME: copy.deepcopy(getattr(self.env, NAME)) for NAME in self.ENV_ATTRIBUTES
+                                 if hasattr(self.env, NAME)}
+            CHECKPOINT["RESTART_POLICY"] = self.env.RESTART_POLICY.Get_State()
+            for NAME in self.RECORDERS:
+                RECORDER = getattr(self.env, NAME)
+                START = self.WRITTEN.get(NAME, 0)
+                NEW_ROWS[NAME] = (START, np.array(RECORDER.View()[START:]))
+                CHECKPOINT["ROWS"][NAME] = len(RECORDER)
+                self.WRITTEN[NAME] = len(RECORDER)
+        self.FUTURE = self.EXECUTOR.submit(self.Write, CHECKPOINT, NEW_ROWS)
+        return self.FUTURE
+
+# STEP 1.2. Write a Checkpoint, on the background thread. Every File is replaced in one go, so a crash never leaves
+# half a Checkpoint, and the Index only lists the Checkpoints that were fully written.
+    def Write(self, CHECKPOINT, NEW_ROWS):
+        for NAME, (START, ROWS) in NEW_ROWS.items():
+            with open(os.path.join(self.DIRECTORY, NAME + ".rows"), "ab") as FILE:
+                FILE.truncate(START*ROWS.dtype.itemsize)    # Drops the rows of a run that was not resumed
+                FILE.write(ROWS.tobytes())
+        FILE_NAME = f"Checkpoint-{CHECKPOINT['STEP']:09d}.pkl"
+        TEMP_PATH = os.path.join(self.DIRECTORY, FILE_NAME + ".tmp")
+        with open(TEMP_PATH, "wb") as FILE:
+            pickle.dump(CHECKPOINT, FILE, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(TEMP_PATH, os.path.join(self.DIRECTORY, FILE_NAME))
+        self.INDEX = [ENTRY for ENTRY in self.INDEX if ENTRY["FILE"] != FILE_NAME]
+        self.INDEX.append({"STEP": CHECKPOINT["STEP"], "SCORE": CHECKPOINT["SCORE"], "FILE": FILE_NAME})
+        self.Apply_Retention()
+        return FILE_NAME
+
+# STEP 1.3. Keep the KEEP_LAST newest and the KEEP_BEST highest scoring Checkpoints, and delete the others
+    def Apply_Retention(self):
+        KEEP = {ENTRY["FILE"] for ENTRY in self.INDEX[-self.KEEP_LAST:]} if self.KEEP_LAST else set()
+        SCORED = sorted((ENTRY for ENTRY in self.INDEX if ENTRY["SCORE"] is not None), key=lambda ENTRY: ENTRY["SCORE"],
+                        reverse=True)
+        KEEP |= {ENTRY["FILE"] for ENTRY in SCORED[:self.KEEP_BEST]}
+        for ENTRY in self.INDEX:
+            if ENTRY["FILE"] not in KEEP:
+                os.remove(os.path.join(self.DIRECTORY, ENTRY["FILE"]))
+        self.INDEX = [ENTRY for ENTRY in self.INDEX if ENTRY["FILE"] in KEEP]
+        self.Save_Index()
+
+    def Save_Index(self):
+        TEMP_PATH = os.path.join(self.DIRECTORY, "Checkpoints.json.tmp")
+        with open(TEMP_PATH, "w") as FILE:
+            json.dump(self.INDEX, FILE, indent=2)
+        os.replace(TEMP_PATH, os.path.join(self.DIRECTORY, "Checkpoints.json"))
+
+    def Load_Index(self):
+        PATH = os.path.join(self.DIRECTORY, "Checkpoints.json")
+        if not os.path.exists(PATH):
+            return []
+        with open(PATH) as FILE:
+            return json.load(FILE)
+
+# STEP 1.4. Wait until the Checkpoints handed to the background thread are on disk, and stop the thread
+    def Wait(self):
+        if self.FUTURE is not None:
+            self.FUTURE.result()
+
+    def Close(self):
+        self.EXECUTOR.shutdown(wait=True)
+
+#################################################################################################################
+
+# STEP 2. Resume a run from the newest Checkpoint (or the best one, BEST=True) of the DIRECTORY.
+# The weights are set on the MODELS and the OPTIMIZERS, the MEMORY and the NumPy random State go back to where they
+# were, and the Counters, the Restart Policy and the recorded rows are set on the Simulator, which then starts a new
+# episode at the next reset. The Checkpoint is returned, Eg. to carry on from CHECKPOINT["STEP"],
+# or None when there is none yet.
+
+    def Latest(self, BEST=False):
+        if BEST:
+            SCORED = [ENTRY for ENTRY in self.INDEX if ENTRY["SCORE"] is not None]
+            if SCORED:
+                return max(SCORED, key=lambda ENTRY: ENTRY["SCORE"])
+        return self.INDEX[-1] if self.INDEX else None
+
+    def Restore(self, BEST=False):
+        self.Wait()
+        ENTRY = self.Latest(BEST)
+        if ENTRY is None:
+            return None
+        with open(os.path.join(self.DIRECTORY, ENTRY["FILE"]), "rb") as FILE:
+            CHECKPOINT = pickle.load(FILE)
+        self.RESUMED_STEP = CHECKPOINT["STEP"]
+        for NAME, WEIGHTS in CHECKPOINT["WEIGHTS"].items():
+            if NAME in self.MODELS:
+                self.MODELS[NAME].set_weights(WEIGHTS)
+        self.OPTIMIZER_WEIGHTS = dict(CHECKPOINT.get("OPTIMIZERS", {}))
+        self.Restore_Optimizers()
+        if self.MEMORY is not None and CHECKPOINT.get("MEMORY") is not None:
+            self.MEMORY.Set_State(CHECKPOINT["MEMORY"])
+        if "NP_RANDOM" in CHECKPOINT:
+            np.random.set_state(CHECKPOINT["NP_RANDOM"])
+        if self.env is not None and CHECKPOINT["ENV"] is not None:
+            for NAME, VALUE in CHECKPOINT["ENV"].items():
+                setattr(self.env, NAME, VALUE)
+            self.env.RESTART_POLICY.Set_State(CHECKPOINT["RESTART_POLICY"])
+            for NAME, N in CHECKPOINT["ROWS"].items():
+                self.Restore_Rows(getattr(self.env, NAME), NAME, N)
+        return CHECKPOINT
+
+# STEP 2.1. Read the first N rows of a ".rows" File back into a Recorder. The rows written after this Checkpoint are
+# overwritten by the next one.
+    def Restore_Rows(self, RECORDER, NAME, N):
+        RECORDER.N = 0
+        if N:
+            ROWS = np.fromfile(os.path.join(self.DIRECTORY, NAME + ".rows"), dtype=RECORDER.DTYPE, count=N)
+            RECORDER.Extend(**{FIELD: ROWS[FIELD] for FIELD in RECORDER.DTYPE.names})
+        self.WRITTEN[NAME] = N
+
+# STEP 2.2. Set the restored weights of the OPTIMIZERS. Keras makes the weights of an Optimizer (Eg. the moments of
+# Adam) only when its training function is built, so the ones that do not have them yet keep waiting in
+# OPTIMIZER_WEIGHTS, and the Callback builds the training function and sets them before the first step (see STEP 3).
+    def Restore_Optimizers(self):
+        for NAME, WEIGHTS in list(self.OPTIMIZER_WEIGHTS.items()):
+            OPTIMIZER = self.OPTIMIZERS.get(NAME)
+            if OPTIMIZER is not None and len(OPTIMIZER.get_weights()) == len(WEIGHTS):
+                OPTIMIZER.set_weights(WEIGHTS)
+                del self.OPTIMIZER_WEIGHTS[NAME]
+
+#################################################################################################################
+
+# STEP 3. A keras-rl Callback, Eg. dqn.fit(env, callbacks=[Make_Callback(Checkpointer(DIRECTORY, env=env))]), that
+# takes a Checkpoint at the end of the first episode after every INTERVAL steps, scored by the mean episode reward.
+# DQNAgent.fit counts its steps from 0, so after a Restore the step of the Agent is set to the restored STEP when the
+# first episode begins: the Epsilon of the policy carries on from there, and nb_steps of fit is the total of the run.
+# Without a restored MEMORY the Agent warms up again for nb_steps_warmup steps before it trains.
+# keras-rl is only imported here, so the Checkpointer itself works without it.
+
+
+def Make_Callback(CHECKPOINTER, INTERVAL=1000):
+    from rl.callbacks import Callback
+
+    class Checkpoint_Callback(Callback):
+        def __init__(self):
+            super().__init__()
+            self.LAST_STEP = 0
+            self.REWARDS = []
+            self.RESUMED = False
+
+        def on_train_begin(self, logs={}):
+            CHECKPOINTER.MODELS.setdefault("model", self.model.model)
+            CHECKPOINTER.MODELS.setdefault("target_model", self.model.target_model)
+            CHECKPOINTER.OPTIMIZERS.setdefault("optimizer", self.model.trainable_model.optimizer)
+            if CHECKPOINTER.OPTIMIZER_WEIGHTS:
+                if hasattr(self.model.trainable_model, "_make_train_function"):
+                    self.model.trainable_model._make_train_function()
+                CHECKPOINTER.Restore_Optimizers()
+
+        def on_episode_begin(self, episode, logs={}):
+            if not self.RESUMED:    # fit has set the step of the Agent to 0 by now
+                self.RESUMED = True
+                self.model.step = CHECKPOINTER.RESUMED_STEP
+                self.LAST_STEP = CHECKPOINTER.RESUMED_STEP
+                if CHECKPOINTER.MEMORY is None:
+                    self.model.nb_steps_warmup += CHECKPOINTER.RESUMED_STEP
+
+        def on_episode_end(self, episode, logs={}):
+            self.REWARDS.append(logs.get("episode_reward", 0.0))
+            if self.model.step - self.LAST_STEP >= INTERVAL:
+                CHECKPOINTER.Save(self.model.step, float(np.mean(self.REWARDS)))
+                self.LAST_STEP = self.model.step
+                self.REWARDS = []
+
+        def on_train_end(self, logs={}):
+            CHECKPOINTER.Wait()
+
+    return Checkpoint_Callback()
+
+#################################################################################################################
+
+# STEP 4. Whether a DIRECTORY holds a Checkpoint to resume from, Eg. before the Simulator is made, so a resumed run
+# appends to its Metrics Files (METRICS_APPEND=True, APPEND=True) instead of emptying them.
+
+
+def Has_Checkpoint(DIRECTORY):
+    PATH = os.path.join(DIRECTORY, "Checkpoints.json")
+    if not os.path.exists(PATH):
+        return False
+    with open(PATH) as FILE:
+        return len(json.load(FILE)) > 0
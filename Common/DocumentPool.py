@@ -0,0 +1,54 @@
+#################################################################################################################
+# The "threading" library keeps the Pool safe when several Simulators check Documents out at the same time.
+import threading
+#################################################################################################################
+
+# STEP 1. Define the Document Pool.
+# Opening an ASPEN+ Document (Dispatch and InitFromArchive2) takes seconds, and a new Simulator used to pay for it in
+# its constructor. The Pool opens SIZE Documents up front, Eg. while the DQNAgent is built, and every new Simulator
+# checks one out at once: Simulator(POOL=POOL). close() hands the Document back, still open, for the next Simulator.
+# FACTORY makes a new Backend, Eg. lambda: AspenPlus(PATH). When the Pool is empty a new one is made, which is only
+# opened at the first reset of its Simulator.
+# COM Handles belong to the thread that opened them, so a Document is used on the thread of the Pool, or is handed
+# over with step_async (see "AsyncEnv.py").
+
+
+class DocumentPool:
+    def __init__(self, FACTORY, SIZE=1):
+        self.FACTORY = FACTORY
+        self.FREE = []  # Open Backends that no Simulator uses
+        self.LOCK = threading.Lock()
+        self.CHECKOUTS = 0  # Backends handed out
+        self.MISSES = 0 # Checkouts that found the Pool empty
+        self.Fill(SIZE)
+
+# STEP 1.1. Open Documents until SIZE of them are free
+    def Fill(self, SIZE):
+        while len(self.FREE) < SIZE:
+            BACKEND = self.FACTORY()
+            BACKEND.Ensure_Open()
+            with self.LOCK:
+                self.FREE.append(BACKEND)
+
+# STEP 1.2. Hand out an open Backend, or a new one when none is free
+    def Checkout(self):
+        with self.LOCK:
+            self.CHECKOUTS += 1
+            if self.FREE:
+                return self.FREE.pop()
+            self.MISSES += 1
+        return self.FACTORY()
+
+# STEP 1.3. Take a Backend back. Its Flowsheet is left as it was, the next Simulator resets it at its first reset.
+    def Checkin(self, BACKEND):
+        with self.LOCK:
+            self.FREE.append(BACKEND)
+
+    def Close(self):
+        with self.LOCK:
+            FREE, self.FREE = self.FREE, []
+        for BACKEND in FREE:
+            BACKEND.Close()
+
+    def __len__(self):
+        return len(self.FREE)
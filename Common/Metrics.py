@@ -0,0 +1,167 @@
+#################################################################################################################
+# The "os" and "json" libraries keep the dtype of the Metrics File next to it, so a reader can map the rows.
+import os
+import json
+# The rows are written to disk by a background thread, so a step never waits for the console or the disk.
+import threading
+# "warnings" silences the mean of a metric the agent did not report yet (Eg. the loss during warm-up).
+import warnings
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+#################################################################################################################
+
+# STEP 1. Define the Metrics Sink.
+# Every finished episode pushes one record (Eg. Conversion, TC Temperatures, Reward, solve time, restarts) into a ring
+# buffer of CAPACITY rows of a fixed dtype. Push only writes the row and moves HEAD on, and the writer thread only
+# moves TAIL on, so the step never takes a lock. The writer appends the rows to PATH in batches (when BATCH rows are
+# waiting, or every FLUSH_INTERVAL seconds) as raw binary rows, and the dtype is saved once in PATH + ".json".
+# An existing File is emptied first, so the rows of an earlier run (Eg. of the notebook run again) are never mixed in.
+# With APPEND=True (Eg. for a run resumed from a Checkpoint) it is appended to instead, when it has the same dtype.
+# When the writer falls CAPACITY rows behind, new rows are
+# dropped (and counted in DROPPED) instead of making the step wait.
+
+
+class MetricsSink:
+    def __init__(self, PATH, DTYPE, CAPACITY=4096, BATCH=256, FLUSH_INTERVAL=1.0, APPEND=False):
+        self.PATH = PATH
+        self.DTYPE = np.dtype(DTYPE)
+        self.CAPACITY = CAPACITY
+        self.BATCH = BATCH
+        self.FLUSH_INTERVAL = FLUSH_INTERVAL
+        self.DATA = np.zeros(CAPACITY, dtype=self.DTYPE)
+        self.HEAD = 0   # Rows pushed, only moved by Push
+        self.TAIL = 0   # Rows written, only moved by the writer
+        self.DROPPED = 0
+        if not APPEND:
+            open(PATH, "wb").close()
+        elif os.path.exists(PATH + ".json") and Read_Dtype(PATH) != self.DTYPE:
+            raise ValueError(f"{PATH} holds rows of another dtype: {Read_Dtype(PATH)}")
+        with open(PATH + ".json", "w") as FILE:
+            json.dump(self.DTYPE.descr, FILE)
+        self.WAKE = threading.Event()
+        self.STOP = threading.Event()
+        self.WRITER = threading.Thread(target=self.Write_Loop, daemon=True)
+        self.WRITER.start()
+
+    def __len__(self):
+        return self.HEAD
+
+# STEP 1.1. Push one record, Eg. Push(EPISODE=3, CONVERSION=0.97). The Fields that are not given are 0.
+    def Push(self, **VALUES):
+        if self.HEAD - self.TAIL >= self.CAPACITY:
+            self.DROPPED += 1
+            return
+        self.DATA[self.HEAD % self.CAPACITY] = 0
+        ROW = self.DATA[self.HEAD % self.CAPACITY]
+        for FIELD, VALUE in VALUES.items():
+            ROW[FIELD] = VALUE
+        self.HEAD += 1
+        if self.HEAD - self.TAIL == self.BATCH:
+            self.WAKE.set()
+
+# STEP 1.2. The writer thread: append the waiting rows to the File, in at most two slices of the ring
+    def Write_Loop(self):
+        while not self.STOP.is_set():
+            self.WAKE.wait(self.FLUSH_INTERVAL)
+            self.WAKE.clear()
+            self.Flush()
+        self.Flush()
+
+    def Flush(self):
+        HEAD = self.HEAD
+        if HEAD == self.TAIL:
+            return
+        FIRST, LAST = self.TAIL % self.CAPACITY, HEAD % self.CAPACITY
+        with open(self.PATH, "ab") as FILE:
+            if FIRST < LAST:
+                FILE.write(self.DATA[FIRST:LAST].tobytes())
+            else:
+                FILE.write(self.DATA[FIRST:].tobytes())
+                FILE.write(self.DATA[:LAST].tobytes())
+        self.TAIL = HEAD
+
+# STEP 1.3. Write the last rows and stop the writer
+    def Close(self):
+        self.STOP.set()
+        self.WAKE.set()
+        self.WRITER.join()
+
+#################################################################################################################
+
+# STEP 2. Streaming readers of a Metrics File. The rows are read CHUNK at a time, so the plots of the notebooks never
+# need the whole run in memory (or in the Simulator).
+
+
+def Read_Dtype(PATH):
+    with open(PATH + ".json") as FILE:
+        return np.dtype([tuple(tuple(ITEM) if isinstance(ITEM, list) else ITEM for ITEM in FIELD)
+                         for FIELD in json.load(FILE)])
+
+
+def Read_Metrics(PATH, CHUNK=65536):
+    DTYPE = Read_Dtype(PATH)
+    if not os.path.exists(PATH):
+        return
+    with open(PATH, "rb") as FILE:
+        while True:
+            ROWS = np.fromfile(FILE, dtype=DTYPE, count=CHUNK)
+            if len(ROWS) == 0:
+                return
+            yield ROWS
+
+# STEP 2.1. Running mean of a Field over WINDOW rows, Eg. Running_Mean(PATH, "CONVERSION", 100) for the learning curve
+def Running_Mean(PATH, FIELD, WINDOW=100, CHUNK=65536):
+    MEANS = []
+    CARRY = np.zeros(0)  # The last WINDOW - 1 values of the previous chunk
+    for ROWS in Read_Metrics(PATH, CHUNK):
+        VALUES = np.concatenate((CARRY, ROWS[FIELD].astype(float)))
+        if len(VALUES) >= WINDOW:
+            CUMSUM = np.cumsum(np.insert(VALUES, 0, 0))
+            MEANS.append((CUMSUM[WINDOW:] - CUMSUM[:-WINDOW])/WINDOW)
+        CARRY = VALUES[len(VALUES) - WINDOW + 1:] if WINDOW > 1 else np.zeros(0)
+    return np.concatenate(MEANS) if MEANS else np.zeros(0)
+
+# STEP 2.2. The rows where a Field reached a new best, Eg. the Best Conversion Found (BCF) over the episodes
+def Improvements(PATH, FIELD="CONVERSION", KEY="EPISODE", CHUNK=65536):
+    KEYS, VALUES = [], []
+    BEST = -np.inf
+    for ROWS in Read_Metrics(PATH, CHUNK):
+        RUNNING = np.maximum.accumulate(np.concatenate(([BEST], ROWS[FIELD].astype(float))))
+        NEW = RUNNING[1:] > RUNNING[:-1]
+        KEYS.extend(ROWS[KEY][NEW].tolist())
+        VALUES.extend(ROWS[FIELD][NEW].tolist())
+        BEST = RUNNING[-1]
+    return KEYS, VALUES
+
+#################################################################################################################
+
+# STEP 3. A keras-rl Callback that replaces FileLogger, Eg. dqn.fit(env, callbacks=[Make_Callback("Agent.dat")]).
+# Instead of re-writing a growing JSON File, it pushes one row per episode (steps, reward and the mean of every metric
+# of the agent, Eg. LOSS, MAE, MEAN_Q) into a MetricsSink. keras-rl is only imported here.
+
+
+def Make_Callback(PATH, **SINK_ARGS):
+    from rl.callbacks import Callback
+
+    class Metrics_Callback(Callback):
+        def on_train_begin(self, logs={}):
+            self.NAMES = [NAME.upper() for NAME in self.model.metrics_names]
+            self.SINK = MetricsSink(PATH, [("EPISODE", "i4"), ("STEPS", "i4"), ("NB_STEPS", "i4"), ("REWARD", "f4")]
+                                    + [(NAME, "f4") for NAME in self.NAMES], **SINK_ARGS)
+            self.METRICS = []
+
+        def on_step_end(self, step, logs={}):
+            self.METRICS.append(logs["metrics"])
+
+        def on_episode_end(self, episode, logs={}):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                MEANS = np.nanmean(self.METRICS, axis=0) if self.METRICS else [np.nan]*len(self.NAMES)
+            self.SINK.Push(EPISODE=episode, STEPS=logs["nb_episode_steps"], NB_STEPS=logs["nb_steps"],
+                           REWARD=logs["episode_reward"], **dict(zip(self.NAMES, MEANS)))
+            self.METRICS = []
+
+        def on_train_end(self, logs={}):
+            self.SINK.Close()
+
+    return Metrics_Callback()
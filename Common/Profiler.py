@@ -0,0 +1,157 @@
+#################################################################################################################
+# The "time" library is used to measure every phase, "bisect" to sort a latency into its histogram bin.
+import time
+import bisect
+# "json" writes the periodic log line as one structured record.
+import json
+#################################################################################################################
+
+# STEP 1. Define the Profiler.
+# It measures where the training time goes, without touching the Simulator or the Backend code:
+#   - "step" and "reset": latency of every call, with a histogram (log-spaced bins from 10 us to 100 s).
+#   - "agent": time between the end of one step/reset and the start of the next one, spent by the DQNAgent.
+#   - Simulator phases (ENV_PHASES, Eg. Evaluate and Reset_Streams) and every Backend call, Eg. "BACKEND.Run".
+# The Backend calls are also summed per group: "solve" (Engine.Run2()), "restart" (Restart, Restore, Snapshot) and
+# "tree" (all other calls, which walk the COM tree of ASPEN+ through Elements(...) chains).
+# Attach(env) wraps the methods of that one Simulator and its Backend, so it works unchanged on any Backend. A Simulator
+# without a Profiler is not wrapped at all, and ENABLED=False makes an attached Profiler pass every call straight on.
+# Every LOG_EVERY steps LOG (Eg. print, or logging.info) gets a one-line JSON summary.
+
+
+class Profiler:
+    ENV_PHASES = ("Evaluate", "Evaluate_Train", "Evaluate_Sequence", "Screen", "Reset_Streams", "Restore_Streams",
+                  "Reset_Temp", "Connect_Feed")
+    GROUPS = {"Run": "solve", "Run_Downstream": "solve", "Reinit": "solve", "Solve": "solve", "Open": "restart",
+              "Ensure_Open": "restart", "Close": "restart", "Restart": "restart", "Restore": "restart",
+              "Snapshot": "restart"}
+    BINS = [1e-5*10**(i/4) for i in range(29)]  # Upper edges of the latency histogram [s]
+
+    def __init__(self, LOG_EVERY=1000, LOG=print, ENABLED=True):
+        self.LOG_EVERY = LOG_EVERY  # Steps between two log lines, None for no log
+        self.LOG = LOG
+        self.ENABLED = ENABLED
+        self.Reset()
+
+# STEP 1.1. Forget all the measurements
+    def Reset(self):
+        self.SECONDS = {}   # PHASE -> Total time [s]
+        self.CALLS = {}     # PHASE -> Number of calls
+        self.HISTOGRAMS = {"step": [0]*(len(self.BINS) + 1), "reset": [0]*(len(self.BINS) + 1)}
+        self.MAX = {"step": 0.0, "reset": 0.0}
+        self.LAST_END = None    # End of the last step/reset, to measure the agent
+        self.START = time.perf_counter()
+
+# STEP 1.2. Record one call of a phase
+    def Record(self, PHASE, SECONDS):
+        self.SECONDS[PHASE] = self.SECONDS.get(PHASE, 0.0) + SECONDS
+        self.CALLS[PHASE] = self.CALLS.get(PHASE, 0) + 1
+        if PHASE in self.HISTOGRAMS:
+            self.HISTOGRAMS[PHASE][bisect.bisect_left(self.BINS, SECONDS)] += 1
+            self.MAX[PHASE] = max(self.MAX[PHASE], SECONDS)
+
+# STEP 1.3. Wrap a function, so that every call of it is recorded under PHASE
+    def Timed(self, PHASE, FUNCTION):
+        def TIMED(*args, **kwargs):
+            if not self.ENABLED:
+                return FUNCTION(*args, **kwargs)
+            START = time.perf_counter()
+            try:
+                return FUNCTION(*args, **kwargs)
+            finally:
+                self.Record(PHASE, time.perf_counter() - START)
+        return TIMED
+
+# STEP 1.4. step and reset also measure the agent in front of them, and write the log line
+    def Timed_Env(self, PHASE, FUNCTION):
+        def TIMED(*args, **kwargs):
+            if not self.ENABLED:
+                return FUNCTION(*args, **kwargs)
+            START = time.perf_counter()
+            if self.LAST_END is not None:
+                self.Record("agent", START - self.LAST_END)
+            try:
+                return FUNCTION(*args, **kwargs)
+            finally:
+                self.LAST_END = time.perf_counter()
+                self.Record(PHASE, self.LAST_END - START)
+                if PHASE == "step" and self.LOG_EVERY and self.CALLS["step"] % self.LOG_EVERY == 0:
+                    self.Log()
+        return TIMED
+
+# STEP 1.5. Wrap the Simulator and its Backend
+    def Attach(self, env):
+        env.BACKEND = Profiled_Backend(env.BACKEND, self)
+        env.step = self.Timed_Env("step", env.step)
+        env.reset = self.Timed_Env("reset", env.reset)
+        for NAME in self.ENV_PHASES:
+            if hasattr(env, NAME):
+                setattr(env, NAME, self.Timed(NAME, getattr(env, NAME)))
+        return env
+
+# STEP 1.6. Latency (upper edge of its histogram bin [s]) below which a share Q of the calls fall
+    def Get_Quantile(self, PHASE, Q):
+        HISTOGRAM = self.HISTOGRAMS[PHASE]
+        TARGET = Q*sum(HISTOGRAM)
+        COUNT = 0
+        for i, N in enumerate(HISTOGRAM):
+            COUNT += N
+            if N and COUNT >= TARGET:
+                return self.BINS[i] if i < len(self.BINS) else self.MAX[PHASE]
+        return None
+
+# STEP 1.7. All the measurements as one dict, Eg. env.get_stats()["GROUPS"]["solve"]
+    def Get_Stats(self):
+        WALL = time.perf_counter() - self.START
+        GROUPS = {"solve": 0.0, "tree": 0.0, "restart": 0.0}
+        for PHASE, SECONDS in self.SECONDS.items():
+            if PHASE.startswith("BACKEND."):
+                GROUPS[self.GROUPS.get(PHASE[len("BACKEND."):], "tree")] += SECONDS
+        for PHASE in ("agent", "step", "reset"):
+            GROUPS[PHASE] = self.SECONDS.get(PHASE, 0.0)
+        LATENCY = {}
+        for PHASE in self.HISTOGRAMS:
+            N = self.CALLS.get(PHASE, 0)
+            LATENCY[PHASE] = {"CALLS": N,
+                              "MEAN": self.SECONDS[PHASE]/N if N else None,
+                              "P50": self.Get_Quantile(PHASE, 0.5),
+                              "P95": self.Get_Quantile(PHASE, 0.95),
+                              "P99": self.Get_Quantile(PHASE, 0.99),
+                              "MAX": self.MAX[PHASE] if N else None,
+                              "HISTOGRAM": list(self.HISTOGRAMS[PHASE])}
+        return {"WALL": WALL,
+                "GROUPS": GROUPS,
+                "SHARES": {PHASE: SECONDS/WALL if WALL else 0.0 for PHASE, SECONDS in GROUPS.items()},
+                "LATENCY": LATENCY,
+                "SECONDS": dict(self.SECONDS),
+                "CALLS": dict(self.CALLS),
+                "BINS": list(self.BINS)}
+
+# STEP 1.8. One structured log line, Eg. {"steps": 1000, "step_ms": 4.1, "p95_ms": 5.6, "solve": 0.62, ...}
+    def Log(self):
+        STATS = self.Get_Stats()
+        STEP = STATS["LATENCY"]["step"]
+        RECORD = {"steps": STEP["CALLS"],
+                  "step_ms": round(1000*STEP["MEAN"], 3) if STEP["MEAN"] is not None else None,
+                  "p95_ms": round(1000*STEP["P95"], 3) if STEP["P95"] is not None else None,
+                  "resets": STATS["LATENCY"]["reset"]["CALLS"]}
+        RECORD.update({PHASE: round(SHARE, 3) for PHASE, SHARE in STATS["SHARES"].items()})
+        self.LOG(json.dumps(RECORD))
+
+#################################################################################################################
+
+# STEP 2. A Backend whose calls are all recorded, as "BACKEND." + the name of the method.
+# Attributes that are not methods (Eg. REACTOR_SOLVES of a stand-in) are read from the wrapped Backend.
+
+
+class Profiled_Backend:
+    def __init__(self, BACKEND, PROFILER):
+        self.BACKEND = BACKEND
+        self.PROFILER = PROFILER
+
+    def __getattr__(self, NAME):
+        VALUE = getattr(self.BACKEND, NAME)
+        if not callable(VALUE):
+            return VALUE
+        TIMED = self.PROFILER.Timed("BACKEND." + NAME, VALUE)
+        self.__dict__[NAME] = TIMED # Wrapped once, later calls find it without __getattr__
+        return TIMED
@@ -0,0 +1,83 @@
+#################################################################################################################
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+#################################################################################################################
+
+# STEP 1. Define the Recorder.
+# Episodes and steps are written into one preallocated, structured NumPy Array (Eg. action codes as int8, Conversions
+# and Temperatures as float32) instead of growing Python lists of lists and strings. When the Array is full its
+# Capacity is doubled. With a PATH the Array is a memory-mapped File instead, so memory stays flat on long runs.
+# View() returns the recorded rows without copying them, Eg. env.EPISODES.View()["CONVERSION"].
+
+
+class Recorder:
+    def __init__(self, DTYPE, CAPACITY=1024, PATH=None):
+        self.DTYPE = np.dtype(DTYPE)
+        self.PATH = PATH
+        self.N = 0  # Number of recorded rows
+        if PATH is None:
+            self.DATA = np.zeros(CAPACITY, dtype=self.DTYPE)
+        else:
+            self.DATA = np.memmap(PATH, dtype=self.DTYPE, mode="w+", shape=(CAPACITY,))
+
+    def __len__(self):
+        return self.N
+
+# STEP 1.1. Double the Capacity, a memory-mapped File is grown on disk and mapped again
+    def Grow(self, CAPACITY):
+        if self.PATH is None:
+            DATA = np.zeros(CAPACITY, dtype=self.DTYPE)
+            DATA[:self.N] = self.DATA[:self.N]
+            self.DATA = DATA
+        else:
+            self.DATA.flush()
+            with open(self.PATH, "r+b") as FILE:
+                FILE.truncate(CAPACITY*self.DTYPE.itemsize)
+            self.DATA = np.memmap(self.PATH, dtype=self.DTYPE, mode="r+", shape=(CAPACITY,))
+
+# STEP 1.2. Record one row, Eg. Append(EPISODE=3, CONVERSION=0.97), the Fields that are not given stay 0
+    def Append(self, **VALUES):
+        if self.N == len(self.DATA):
+            self.Grow(2*len(self.DATA))
+        ROW = self.DATA[self.N]
+        for FIELD, VALUE in VALUES.items():
+            ROW[FIELD] = VALUE
+        self.N += 1
+
+# STEP 1.3. Record many rows at once, Eg. Extend(EPISODE=np.arange(8), CONVERSION=CONVERSIONS)
+    def Extend(self, **COLUMNS):
+        N_NEW = len(next(iter(COLUMNS.values())))
+        if self.N + N_NEW > len(self.DATA):
+            self.Grow(max(2*len(self.DATA), self.N + N_NEW))
+        for FIELD, COLUMN in COLUMNS.items():
+            self.DATA[FIELD][self.N:self.N + N_NEW] = COLUMN
+        self.N += N_NEW
+
+# STEP 1.4. Read the recorded rows without copying them
+    def View(self):
+        return self.DATA[:self.N]
+
+    def Flush(self):
+        if self.PATH is not None:
+            self.DATA.flush()
+
+# STEP 1.5. Hand the rows to pandas, Eg. for an Excel or CSV Export. Array Fields (Eg. TEMPS) get a column per item.
+    def To_DataFrame(self):
+        import pandas as pd
+        VIEW = self.View()
+        COLUMNS = {}
+        for FIELD in self.DTYPE.names:
+            if VIEW[FIELD].ndim == 1:
+                COLUMNS[FIELD] = VIEW[FIELD]
+            else:
+                for i in range(VIEW[FIELD].shape[1]):
+                    COLUMNS[FIELD + str(i+1)] = VIEW[FIELD][:, i]
+        return pd.DataFrame(COLUMNS, copy=False)
+
+    def Export(self, PATH):
+        DATA = self.To_DataFrame()
+        if PATH.endswith(".xlsx"):
+            DATA.to_excel(excel_writer=PATH, index=False)
+        else:
+            DATA.to_csv(PATH, index=False)
+        return DATA
@@ -0,0 +1,266 @@
+#################################################################################################################
+# The "os" and "json" libraries keep the Header of the Replay Memory (how many rows are filled) next to its File.
+import os
+import json
+# "copy" takes the last append of an episode at the moment of a Checkpoint.
+import copy
+# "namedtuple" gives the Experiences the Fields that keras-rl reads (state0, action, reward, state1, terminal1).
+from collections import namedtuple
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+#################################################################################################################
+
+# STEP 1. Define the Sum-Tree.
+# Every Leaf holds the Priority of one row, every Node the sum of its two Children, so the Root holds the Total.
+# Finding the row whose cumulative Priority reaches a value, and changing a Priority, both take O(log n) steps, and
+# both are done for a whole batch of rows at once with NumPy. The Leaves are TREE[SIZE:SIZE + CAPACITY].
+
+
+class SumTree:
+    def __init__(self, CAPACITY):
+        self.SIZE = 1
+        while self.SIZE < CAPACITY:
+            self.SIZE *= 2
+        self.DEPTH = self.SIZE.bit_length() - 1
+        self.TREE = np.zeros(2*self.SIZE)
+
+    def Total(self):
+        return self.TREE[1]
+
+# STEP 1.1. Set the Priorities of many rows, and update their Parents level by level up to the Root
+    def Update(self, INDICES, PRIORITIES):
+        NODES = np.asarray(INDICES, dtype=np.int64) + self.SIZE
+        self.TREE[NODES] = PRIORITIES
+        for _ in range(self.DEPTH):
+            NODES = np.unique(NODES//2)
+            self.TREE[NODES] = self.TREE[2*NODES] + self.TREE[2*NODES + 1]
+
+# STEP 1.2. Rebuild the whole Tree from the Priorities of all the rows, Eg. after the File was opened again
+    def Build(self, PRIORITIES):
+        self.TREE[:] = 0
+        self.TREE[self.SIZE:self.SIZE + len(PRIORITIES)] = PRIORITIES
+        LEVEL = self.SIZE
+        while LEVEL > 1:
+            LEVEL //= 2
+            self.TREE[LEVEL:2*LEVEL] = self.TREE[2*LEVEL:4*LEVEL:2] + self.TREE[2*LEVEL + 1:4*LEVEL:2]
+
+# STEP 1.3. Walk down from the Root for a batch of VALUES Ɐ [0, Total), and return the rows they fall in
+    def Find(self, VALUES):
+        VALUES = np.array(VALUES, dtype=float)
+        NODES = np.ones(len(VALUES), dtype=np.int64)
+        for _ in range(self.DEPTH):
+            LEFT = 2*NODES
+            RIGHT = VALUES >= self.TREE[LEFT]
+            VALUES -= np.where(RIGHT, self.TREE[LEFT], 0)
+            NODES = LEFT + RIGHT
+        return NODES - self.SIZE
+
+#################################################################################################################
+
+# STEP 2. Define the Prioritized Replay Memory.
+# Transitions (STATE, ACTION, REWARD, NEXT_STATE, DONE) are kept in one preallocated, structured NumPy Array of fixed
+# dtypes, which is a memory-mapped File when a PATH is given (Eg. "Replay.dat", with its Header in "Replay.dat.json").
+# A Memory whose File and Header already exist is opened again with all its rows, so training resumes with its
+# experience intact, and a ValueError is raised when the File was made with another CAPACITY or dtype.
+# When CAPACITY rows are filled the oldest ones are overwritten.
+# Rows are sampled in proportion to PRIORITY**ALPHA. Until the Learner gives the TD errors (Update_Priorities), the
+# Priority of a row is its |REWARD| + EPSILON, so the many zero-reward Temperature nudges of SimulationEnv2 are drawn
+# less often than the steps that changed the Conversion. WEIGHTS = (N*P)**-BETA correct the bias of the sampling.
+# It can replace the SequentialMemory of keras-rl (window_length=1): append, get_recent_state and sample are the
+# Methods the DQNAgent calls. Extend adds a batch of transitions at once, Eg. from the Workers of a VectorEnv.
+# The DQNAgent of keras-rl ignores the WEIGHTS and never calls Update_Priorities, the Agent of Make_Agent (STEP 3) does.
+Experience = namedtuple("Experience", "state0, action, reward, state1, terminal1")
+
+
+class ReplayMemory:
+    def __init__(self, CAPACITY=200_000, STATE_SHAPE=(1,), ACTION_SHAPE=(), ACTION_DTYPE="i4", PATH=None, ALPHA=0.6,
+                 BETA=0.4, EPSILON=0.01, FLUSH_EVERY=1000, SEED=None):
+        self.DTYPE = np.dtype([("STATE", "f4", STATE_SHAPE), ("ACTION", ACTION_DTYPE, ACTION_SHAPE), ("REWARD", "f4"),
+                               ("NEXT_STATE", "f4", STATE_SHAPE), ("DONE", "?"), ("PRIORITY", "f4")])
+        self.CAPACITY = CAPACITY
+        self.PATH = PATH
+        self.ALPHA = ALPHA
+        self.BETA = BETA
+        self.EPSILON = EPSILON
+        self.FLUSH_EVERY = FLUSH_EVERY  # Rows between two writes of the Header, None to only write it in Flush()
+        self.RNG = np.random.default_rng(SEED)
+        self.TREE = SumTree(CAPACITY)
+        self.N = 0  # Number of filled rows
+        self.HEAD = 0   # Row that is written next
+        self.UNFLUSHED = 0
+        self.PENDING = None # The last append of keras-rl, which becomes a row when the next State is known
+        self.LAST_INDICES = None    # Rows and WEIGHTS of the last sample, for Update_Priorities
+        self.LAST_WEIGHTS = None
+        self.window_length = 1
+        if PATH is None:
+            self.DATA = np.zeros(CAPACITY, dtype=self.DTYPE)
+        elif os.path.exists(PATH) and os.path.exists(PATH + ".json"):
+            self.Load()
+        else:
+            self.DATA = np.memmap(PATH, dtype=self.DTYPE, mode="w+", shape=(CAPACITY,))
+
+    def __len__(self):
+        return self.N
+
+    @property
+    def nb_entries(self):
+        return self.N
+
+# STEP 2.1. Add a batch of transitions, Eg. one per Worker. The rows are written with one slice assignment per Field.
+    def Extend(self, STATES, ACTIONS, REWARDS, NEXT_STATES, DONES, PRIORITIES=None):
+        REWARDS = np.asarray(REWARDS, dtype=float)
+        if PRIORITIES is None:
+            PRIORITIES = np.abs(REWARDS) + self.EPSILON
+        ROWS = (self.HEAD + np.arange(len(REWARDS))) % self.CAPACITY
+        self.DATA["STATE"][ROWS] = STATES
+        self.DATA["ACTION"][ROWS] = ACTIONS
+        self.DATA["REWARD"][ROWS] = REWARDS
+        self.DATA["NEXT_STATE"][ROWS] = NEXT_STATES
+        self.DATA["DONE"][ROWS] = DONES
+        self.DATA["PRIORITY"][ROWS] = PRIORITIES
+        self.TREE.Update(ROWS, np.asarray(PRIORITIES, dtype=float)**self.ALPHA)
+        self.HEAD = int(ROWS[-1] + 1) % self.CAPACITY
+        self.N = min(self.N + len(ROWS), self.CAPACITY)
+        self.UNFLUSHED += len(ROWS)
+        if self.FLUSH_EVERY is not None and self.UNFLUSHED >= self.FLUSH_EVERY:
+            self.Flush()
+
+# STEP 2.2. Sample a batch of rows in proportion to their Priority, one from every equal slice of the Total
+    def Sample(self, BATCH_SIZE):
+        TOTAL = self.TREE.Total()
+        VALUES = (np.arange(BATCH_SIZE) + self.RNG.random(BATCH_SIZE))*TOTAL/BATCH_SIZE
+        INDICES = np.minimum(self.TREE.Find(VALUES), self.N - 1)
+        PROBABILITIES = self.TREE.TREE[INDICES + self.TREE.SIZE]/TOTAL
+        WEIGHTS = (self.N*PROBABILITIES)**-self.BETA
+        self.LAST_INDICES = INDICES
+        self.LAST_WEIGHTS = WEIGHTS/WEIGHTS.max()
+        return self.DATA[INDICES], INDICES, self.LAST_WEIGHTS
+
+# STEP 2.3. Give the sampled rows their new Priorities, Eg. Update_Priorities(INDICES, TD_ERRORS)
+    def Update_Priorities(self, INDICES, ERRORS):
+        PRIORITIES = np.abs(np.asarray(ERRORS, dtype=float)) + self.EPSILON
+        self.DATA["PRIORITY"][INDICES] = PRIORITIES
+        self.TREE.Update(INDICES, PRIORITIES**self.ALPHA)
+
+# STEP 2.4. The Memory Interface of keras-rl. append(observation, action, reward, terminal) is called once per step,
+# and once more with the last State after the end of an episode (as DQNAgent.fit and ActorLearner.Run do).
+    def append(self, observation, action, reward, terminal, training=True):
+        if not training:
+            return
+        if self.PENDING is not None:
+            STATE, ACTION, REWARD, DONE = self.PENDING
+            self.Extend([STATE], [ACTION], [REWARD], [observation], [DONE])
+            if DONE:
+                self.PENDING = None # This was the last State of the episode, not a step of its own
+                return
+        self.PENDING = (observation, action, reward, terminal)
+
+    def get_recent_state(self, current_observation):
+        return [current_observation]
+
+    def sample(self, batch_size, batch_idxs=None):
+        if batch_idxs is None:
+            ROWS = self.Sample(batch_size)[0]
+        else:
+            ROWS = self.DATA[np.asarray(batch_idxs)]
+        return [Experience(state0=[ROW["STATE"]], action=ROW["ACTION"], reward=ROW["REWARD"],
+                           state1=[ROW["NEXT_STATE"]], terminal1=ROW["DONE"]) for ROW in ROWS]
+
+    def get_config(self):
+        return {"CAPACITY": self.CAPACITY, "PATH": self.PATH, "ALPHA": self.ALPHA, "BETA": self.BETA,
+                "EPSILON": self.EPSILON}
+
+# STEP 2.5. Write the rows and the Header to disk, the Header is replaced in one go so a crash never leaves half of it
+    def Flush(self):
+        self.UNFLUSHED = 0
+        if self.PATH is None:
+            return
+        self.DATA.flush()
+        TEMP_PATH = self.PATH + ".json.tmp"
+        with open(TEMP_PATH, "w") as FILE:
+            json.dump({"N": self.N, "HEAD": self.HEAD, "CAPACITY": self.CAPACITY, "DTYPE": self.DTYPE.descr}, FILE)
+        os.replace(TEMP_PATH, self.PATH + ".json")
+
+    def Load(self):
+        with open(self.PATH + ".json") as FILE:
+            HEADER = json.load(FILE)
+        if HEADER["CAPACITY"] != self.CAPACITY:
+            raise ValueError(f"{self.PATH} holds {HEADER['CAPACITY']} rows, not CAPACITY={self.CAPACITY}")
+        if HEADER.get("DTYPE") != json.loads(json.dumps(self.DTYPE.descr)):
+            raise ValueError(f"{self.PATH} holds rows of another dtype: {HEADER.get('DTYPE')}")
+        self.DATA = np.memmap(self.PATH, dtype=self.DTYPE, mode="r+", shape=(self.CAPACITY,))
+        self.N = HEADER["N"]
+        self.HEAD = HEADER["HEAD"]
+        self.TREE.Build(self.DATA["PRIORITY"][:self.N].astype(float)**self.ALPHA)
+
+# STEP 2.6. Where the Memory stands, for a Checkpoint (see Checkpoint.Checkpointer). The rows are flushed to the File,
+# and only N, HEAD, the PENDING append and the State of the RNG are returned. Set_State goes back there: the rows
+# written since are overwritten again, but once the Memory is full the older rows they replaced are not brought back.
+    def Get_State(self):
+        self.Flush()
+        return {"N": self.N, "HEAD": self.HEAD, "PENDING": copy.deepcopy(self.PENDING),
+                "RNG": self.RNG.bit_generator.state}
+
+    def Set_State(self, STATE):
+        self.N = STATE["N"]
+        self.HEAD = STATE["HEAD"]
+        self.PENDING = STATE["PENDING"]
+        self.RNG.bit_generator.state = STATE["RNG"]
+        self.TREE.Build(self.DATA["PRIORITY"][:self.N].astype(float)**self.ALPHA)
+
+#################################################################################################################
+
+# STEP 3. A DQNAgent that learns from the Prioritized Replay Memory, Eg. dqn = Make_Agent(model=model, memory=memory,
+# nb_actions=nb_actions, ...) with the arguments of DQNAgent. The DQNAgent of keras-rl samples its memory uniformly and
+# never sees the rows it trained on, so its backward is replaced by one that samples with Sample(), weights the loss of
+# every row by its Importance-Sampling WEIGHT, and gives the rows their TD errors with Update_Priorities.
+# keras-rl is only imported here, so the Replay Memory itself works without it.
+
+
+def Make_Agent(**AGENT_ARGS):
+    from rl.agents.dqn import DQNAgent
+
+    class Prioritized_DQNAgent(DQNAgent):
+        def backward(self, reward, terminal):
+            if self.step % self.memory_interval == 0:
+                self.memory.append(self.recent_observation, self.recent_action, reward, terminal,
+                                   training=self.training)
+            metrics = [np.nan for _ in self.metrics_names]
+            if not self.training:
+                return metrics
+            if self.step > self.nb_steps_warmup and self.step % self.train_interval == 0:
+                metrics = self.Train_On_Sample()
+            if self.target_model_update >= 1 and self.step % self.target_model_update == 0:
+                self.update_target_model_hard()
+            return metrics
+
+# STEP 3.1. One gradient update, as in DQNAgent.backward, on a prioritized batch
+        def Train_On_Sample(self):
+            ROWS, INDICES, WEIGHTS = self.memory.Sample(self.batch_size)
+            BATCH = np.arange(self.batch_size)
+            STATES = self.process_state_batch(ROWS["STATE"][:, None])   # window_length = 1
+            NEXT_STATES = self.process_state_batch(ROWS["NEXT_STATE"][:, None])
+            ACTIONS = ROWS["ACTION"].astype(int)
+            if self.enable_double_dqn:
+                NEXT_ACTIONS = np.argmax(self.model.predict_on_batch(NEXT_STATES), axis=1)
+                NEXT_Q = self.target_model.predict_on_batch(NEXT_STATES)[BATCH, NEXT_ACTIONS]
+            else:
+                NEXT_Q = np.max(self.target_model.predict_on_batch(NEXT_STATES), axis=1)
+            RETURNS = ROWS["REWARD"] + self.gamma*NEXT_Q*(1. - ROWS["DONE"])
+            Q = self.model.predict_on_batch(STATES)[BATCH, ACTIONS]
+            self.memory.Update_Priorities(INDICES, RETURNS - Q)
+            TARGETS = np.zeros((self.batch_size, self.nb_actions), dtype="float32")
+            MASKS = np.zeros_like(TARGETS)
+            TARGETS[BATCH, ACTIONS] = RETURNS
+            MASKS[BATCH, ACTIONS] = 1.
+            INPUTS = [STATES] if type(self.model.input) is not list else STATES
+            # The first output is the masked loss of every row, which the WEIGHTS scale, the second one has no loss
+            metrics = self.trainable_model.train_on_batch(INPUTS + [TARGETS, MASKS], [RETURNS, TARGETS],
+                                                          sample_weight=[WEIGHTS, np.ones(self.batch_size)])
+            metrics = [metric for idx, metric in enumerate(metrics) if idx not in (1, 2)]
+            metrics += self.policy.metrics
+            if self.processor is not None:
+                metrics += self.processor.metrics
+            return metrics
+
+    return Prioritized_DQNAgent(**AGENT_ARGS)
@@ -0,0 +1,103 @@
+#################################################################################################################
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+# "copy" keeps the State of the Policy apart from the one it is restored from.
+import copy
+#################################################################################################################
+
+# STEP 1. Define the Restart Policy.
+# Instead of hard-restarting ASPEN+ every 100 Cycles, the Simulator measures what actually goes wrong with a long
+# running Document, and only acts when one of these signals says so:
+#   - Step Latency Drift: the running mean of the step time grew LATENCY_DRIFT times over its value after warm-up.
+#   - Convergence Failures: MAX_FAILURES Simulations did not converge since the last roll-back.
+#   - Failed Evaluations: an Evaluation still did not converge after MAX_RETRIES re-runs.
+#   - Process Memory: the Simulation uses more than MAX_MEMORY bytes.
+# Drift and Failures ask for a cheap roll-back to the Snapshot ("restore"). Memory, or a signal that is still there
+# after MAX_RESTORES roll-backs since the last full restart, asks for a full restart of the Document ("restart").
+# A Failed Evaluation asks for a full restart at once.
+# The Policy also holds the budget of a single Evaluation: a solve that did not converge is re-run up to MAX_RETRIES
+# times, and every solve may take SOLVE_TIMEOUT seconds (None: no limit).
+
+
+class RestartPolicy:
+    # The measurements and counters, kept in a Checkpoint. The arguments of the constructor are not: a resumed run keeps
+    # the budgets and thresholds it was started with.
+    STATE_ATTRIBUTES = ("N_FAILURES", "N_FAILED_EVALUATIONS", "RESTORES", "N_RESTORES", "N_RESTARTS", "WARMUP",
+                        "BASELINE", "LATENCY", "FAILURES", "FAILED_EVALUATION")
+
+    def __init__(self, LATENCY_DRIFT=1.5, MAX_FAILURES=3, MAX_MEMORY=None, MAX_RESTORES=5, WARMUP_STEPS=50,
+                 SMOOTHING=0.05, MAX_RETRIES=2, SOLVE_TIMEOUT=None):
+        self.LATENCY_DRIFT = LATENCY_DRIFT
+        self.MAX_FAILURES = MAX_FAILURES
+        self.MAX_MEMORY = MAX_MEMORY
+        self.MAX_RESTORES = MAX_RESTORES
+        self.WARMUP_STEPS = WARMUP_STEPS
+        self.SMOOTHING = SMOOTHING  # Weight of the newest step in the running mean of the step time
+        self.MAX_RETRIES = MAX_RETRIES
+        self.SOLVE_TIMEOUT = SOLVE_TIMEOUT
+        self.N_FAILURES = 0 # Solves that did not converge over the whole run
+        self.N_FAILED_EVALUATIONS = 0   # Evaluations that used up their retries over the whole run
+        self.RESTORES = 0   # Roll-backs since the last full restart
+        self.N_RESTORES = 0 # Roll-backs over the whole run
+        self.N_RESTARTS = 0 # Full restarts over the whole run
+        self.Reset()
+
+# STEP 1.1. Forget the measurements, after the Document was rolled back or restarted
+    def Reset(self):
+        self.WARMUP = []
+        self.BASELINE = None    # Median step time after warm-up [s]
+        self.LATENCY = None     # Running mean of the step time [s]
+        self.FAILURES = 0
+        self.FAILED_EVALUATION = False
+
+# STEP 1.2. Record the measured signals
+    def Record_Step(self, SECONDS):
+        if self.BASELINE is None:
+            self.WARMUP.append(SECONDS)
+            if len(self.WARMUP) >= self.WARMUP_STEPS:
+                self.BASELINE = float(np.median(self.WARMUP))
+                self.LATENCY = self.BASELINE
+        else:
+            self.LATENCY += self.SMOOTHING*(SECONDS - self.LATENCY)
+
+    def Record_Failure(self):
+        self.FAILURES += 1
+        self.N_FAILURES += 1
+
+    def Record_Failed_Evaluation(self):
+        self.FAILED_EVALUATION = True
+        self.N_FAILED_EVALUATIONS += 1
+
+# STEP 1.3. Decide what to do at the end of a Cycle: None, "restore" or "restart"
+# GET_MEMORY (Eg. Backend.Get_Memory) is only called when a MAX_MEMORY is set, since measuring it is not free.
+    def Decide(self, GET_MEMORY=None):
+        if self.FAILED_EVALUATION:
+            return self.Restart()
+        if self.MAX_MEMORY is not None and GET_MEMORY is not None:
+            MEMORY = GET_MEMORY()
+            if MEMORY is not None and MEMORY > self.MAX_MEMORY:
+                return self.Restart()
+        DRIFTED = self.BASELINE is not None and self.LATENCY > self.LATENCY_DRIFT*self.BASELINE
+        if DRIFTED or self.FAILURES >= self.MAX_FAILURES:
+            if self.RESTORES >= self.MAX_RESTORES:
+                return self.Restart()
+            self.RESTORES += 1
+            self.N_RESTORES += 1
+            self.Reset()
+            return "restore"
+        return None
+
+    def Restart(self):
+        self.RESTORES = 0
+        self.N_RESTARTS += 1
+        self.Reset()
+        return "restart"
+
+# STEP 1.4. Where the Policy stands, for a Checkpoint (see Checkpoint.Checkpointer), and going back there
+    def Get_State(self):
+        return {NAME: copy.deepcopy(getattr(self, NAME)) for NAME in self.STATE_ATTRIBUTES}
+
+    def Set_State(self, STATE):
+        for NAME in self.STATE_ATTRIBUTES:
+            if NAME in STATE:
+                setattr(self, NAME, copy.deepcopy(STATE[NAME]))
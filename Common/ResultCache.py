@@ -0,0 +1,79 @@
+#################################################################################################################
+# The "os" and "pickle" libraries are used to keep the Cache on disk between sessions.
+import os
+import pickle
+# An "OrderedDict" remembers the order of use of the Keys, which gives the LRU eviction.
+from collections import OrderedDict
+#################################################################################################################
+
+# STEP 1. Define the Result Cache.
+# The Cache maps a canonical Flowsheet Configuration (Eg. the CHOICE_MEMORY prefix, or the tuple of TC Temperatures)
+# to the Outlet MOLEFLOW of the Reactant, so a Configuration that was already solved never reaches the Simulator again.
+# When it holds more than MAX_SIZE results, the Least Recently Used one is evicted.
+# The Key does not say what solved the Flowsheet, so the Cache only holds the Results of one SOURCE (the Backend and the
+# Topology, see ResultStore.Get_Source), which the Simulator sets and which is saved with them to the File.
+
+
+class ResultCache:
+    def __init__(self, MAX_SIZE=100_000, PATH=None):
+        self.MAX_SIZE = MAX_SIZE
+        self.PATH = PATH    # Optional Pickle File, the Cache is loaded from it and saved to it
+        self.RESULTS = OrderedDict()
+        self.SOURCE = None  # What solved the Results, None: not known yet (or a File saved without it)
+        self.ATTACHED = False   # Whether a Simulator set the SOURCE
+        self.HITS = 0
+        self.MISSES = 0
+        if self.PATH is not None and os.path.exists(self.PATH):
+            self.Load()
+
+# STEP 1.1. Look up a Configuration, None is returned (and counted as a miss) when it was never solved
+    def Get(self, KEY):
+        if KEY in self.RESULTS:
+            self.RESULTS.move_to_end(KEY)
+            self.HITS += 1
+            return self.RESULTS[KEY]
+        self.MISSES += 1
+        return None
+
+# STEP 1.2. Store the Result of a Configuration, evicting the Least Recently Used ones
+    def Put(self, KEY, VALUE):
+        self.RESULTS[KEY] = VALUE
+        self.RESULTS.move_to_end(KEY)
+        while len(self.RESULTS) > self.MAX_SIZE:
+            self.RESULTS.popitem(last=False)
+
+# STEP 1.2.1. Set the SOURCE of the Simulator that uses the Cache. Results loaded from a File of another (or an unknown)
+# SOURCE are dropped, and a Cache already used by a Simulator of another SOURCE is refused.
+    def Set_Source(self, SOURCE):
+        if SOURCE == self.SOURCE:
+            self.ATTACHED = True
+            return
+        if self.ATTACHED:
+            raise ValueError(f"The Cache holds the Results of {self.SOURCE}, and can not be used for {SOURCE}")
+        if self.RESULTS:
+            print(f"~Cache: {len(self.RESULTS)} Results of {self.SOURCE} dropped, they were not solved by {SOURCE}~")
+            self.RESULTS.clear()
+        self.SOURCE = SOURCE
+        self.ATTACHED = True
+
+    def __len__(self):
+        return len(self.RESULTS)
+
+    def Hit_Rate(self):
+        return self.HITS/max(self.HITS + self.MISSES, 1)
+
+# STEP 1.3. Save and Load the Cache, the File is replaced in one go so a crash never leaves half a Cache
+    def Save(self):
+        TEMP_PATH = self.PATH + ".tmp"
+        with open(TEMP_PATH, "wb") as FILE:
+            pickle.dump({"SOURCE": self.SOURCE, "RESULTS": list(self.RESULTS.items())}, FILE)
+        os.replace(TEMP_PATH, self.PATH)
+
+    def Load(self):
+        with open(self.PATH, "rb") as FILE:
+            DATA = pickle.load(FILE)
+        if not isinstance(DATA, dict):
+            DATA = {"SOURCE": None, "RESULTS": DATA}  # Saved before the SOURCE was kept
+        self.SOURCE = DATA["SOURCE"]
+        for KEY, VALUE in DATA["RESULTS"]:
+            self.Put(KEY, VALUE)
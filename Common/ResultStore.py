@@ -0,0 +1,99 @@
+#################################################################################################################
+# The "os" and "time" libraries are used to name every training run.
+import os
+import time
+# The "json" library turns a Flowsheet Configuration (a tuple) into Text, so it can be stored.
+import json
+# "sqlite3" gives an append-only File that several Workers can write to at the same time.
+import sqlite3
+#################################################################################################################
+
+# STEP 1. Define the Result Store.
+# Every Flowsheet Evaluation (Configuration, Outlet Flows, Conversion and Solve Time) and every finished episode
+# is appended to an SQLite File, so later training runs can look a Configuration up instead of Simulating it again.
+# The File is opened in WAL mode, so parallel Workers (see "VectorEnv.py") can all write to the same Store.
+# Every Evaluation is kept with the SOURCE that solved it (the Backend and the Topology, see Get_Source), and is only
+# served to a Simulator with the same SOURCE, so a stand-in never answers for ASPEN+ in a shared Store.
+
+
+class ResultStore:
+    TABLES = ("EVALUATIONS", "EPISODES")
+
+    def __init__(self, PATH, RUN=None):
+        self.PATH = PATH
+        # Every training run gets its own name, so its episodes can be exported on their own
+        self.RUN = RUN if RUN is not None else time.strftime("%Y%m%d-%H%M%S") + "-" + str(os.getpid())
+        self.CONNECTION = None
+
+# STEP 1.1. The Connection is opened on first use, so a Store can be handed to a new Worker process
+    def Connect(self):
+        if self.CONNECTION is None:
+            self.CONNECTION = sqlite3.connect(self.PATH, timeout=60)
+            self.CONNECTION.execute("PRAGMA journal_mode=WAL")
+            self.CONNECTION.execute("CREATE TABLE IF NOT EXISTS EVALUATIONS (CONFIGURATION TEXT, STREAM TEXT, "
+                                    "OUTLET TEXT, CONVERSION REAL, SECONDS REAL, RUN TEXT, CREATED REAL, SOURCE TEXT)")
+            # Stores made before the SOURCE was kept get it as a last Column, their Evaluations are never served
+            COLUMNS = [ROW[1] for ROW in self.CONNECTION.execute("PRAGMA table_info(EVALUATIONS)")]
+            if "SOURCE" not in COLUMNS:
+                self.CONNECTION.execute("ALTER TABLE EVALUATIONS ADD COLUMN SOURCE TEXT DEFAULT ''")
+            self.CONNECTION.execute("CREATE INDEX IF NOT EXISTS CONFIGURATIONS ON EVALUATIONS (CONFIGURATION)")
+            self.CONNECTION.execute("CREATE TABLE IF NOT EXISTS EPISODES (RUN TEXT, EPISODE INTEGER, "
+                                    "CONFIGURATION TEXT, CONVERSION REAL, REWARD REAL, CREATED REAL)")
+            self.CONNECTION.commit()
+        return self.CONNECTION
+
+    def Close(self):
+        if self.CONNECTION is not None:
+            self.CONNECTION.close()
+            self.CONNECTION = None
+
+    def __getstate__(self):
+        return dict(self.__dict__, CONNECTION=None)
+
+# STEP 1.2. Look up the Outlet Flows {Chemical: MOLEFLOW [kmol/s]} of a Configuration that SOURCE solved, None if it
+# never did
+    def Get(self, CONFIGURATION, SOURCE=""):
+        ROW = self.Connect().execute("SELECT OUTLET FROM EVALUATIONS WHERE CONFIGURATION = ? AND SOURCE = ? "
+                                     "ORDER BY CREATED DESC LIMIT 1",
+                                     (json.dumps(list(CONFIGURATION)), SOURCE)).fetchone()
+        return None if ROW is None else json.loads(ROW[0])
+
+# STEP 1.3. Append a new Flowsheet Evaluation
+    def Put(self, CONFIGURATION, STREAM, OUTLET, CONVERSION, SECONDS, SOURCE=""):
+        with self.Connect():
+            self.CONNECTION.execute("INSERT INTO EVALUATIONS VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (json.dumps(list(CONFIGURATION)), STREAM, json.dumps(OUTLET), CONVERSION,
+                                     SECONDS, self.RUN, time.time(), SOURCE))
+
+# STEP 1.4. Append a finished episode (replaces CONVERSION_MATRIX and BEST_CASE, which only live in memory)
+    def Add_Episode(self, EPISODE, CONFIGURATION, CONVERSION, REWARD):
+        with self.Connect():
+            self.CONNECTION.execute("INSERT INTO EPISODES VALUES (?, ?, ?, ?, ?, ?)",
+                                    (self.RUN, EPISODE, json.dumps(list(CONFIGURATION)), CONVERSION, REWARD,
+                                     time.time()))
+
+# STEP 1.5. Bulk Export of a Table (of this run only, or of all runs) to an Excel or CSV File
+    def Export(self, PATH, TABLE="EPISODES", ALL_RUNS=False):
+        import pandas as pd
+        if TABLE not in self.TABLES:
+            raise ValueError(f"Unknown Table {TABLE!r}, expected one of {self.TABLES}")
+        QUERY = "SELECT * FROM " + TABLE
+        PARAMETERS = ()
+        if not ALL_RUNS:
+            QUERY += " WHERE RUN = ?"
+            PARAMETERS = (self.RUN,)
+        DATA = pd.read_sql_query(QUERY, self.Connect(), params=PARAMETERS)
+        if PATH.endswith(".xlsx"):
+            DATA.to_excel(excel_writer=PATH, index=False)
+        else:
+            DATA.to_csv(PATH, index=False)
+        return DATA
+
+#################################################################################################################
+
+# STEP 2. The SOURCE of the Evaluations of a Simulator: the Backend that solves them (Eg. "AspenPlus:Case.bkp", or
+# "ConverterModel") and its Topology.
+
+
+def Get_Source(BACKEND, TOPOLOGY):
+    return BACKEND.Get_Source() + " " + json.dumps(TOPOLOGY.To_Dict(), sort_keys=True)
@@ -0,0 +1,105 @@
+#################################################################################################################
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+#################################################################################################################
+
+# STEP 1. Define the Surrogate Model.
+# The Outlet of a Reactor is a smooth function of a few inputs (the Reactor choices or TC Temperatures in front of
+# it), so a Gaussian Process, fitted on the Results of the Flowsheet, can answer most steps in well under a millisecond.
+# It also knows how uncertain it is: a step is only answered by the Surrogate when its standard deviation is below
+# MAX_STD, otherwise the Flowsheet is Simulated and the new Result is added to the Surrogate.
+# Every Outlet (KEY, Eg. the number of Reactors in front of it) gets its own Gaussian Process. The inverse of its
+# Kernel Matrix is updated with every new point (O(n^2)), so the Surrogate is never refitted from scratch.
+# A share AUDIT of the steps it could answer is Simulated anyway, to measure the error of the answers it gives.
+
+
+class Surrogate:
+    def __init__(self, MAX_STD=0.002, LENGTH_SCALE=0.3, NOISE=1e-6, SCALE=1.0, MAX_POINTS=2000, AUDIT=0.02, SEED=0):
+        self.MAX_STD = MAX_STD  # Largest standard deviation (in units of SCALE) that is answered by the Surrogate
+        self.LENGTH_SCALE = LENGTH_SCALE    # Of the squared exponential Kernel, in units of the Features
+        self.NOISE = NOISE  # Added to the diagonal of the Kernel Matrix, keeps its inverse well conditioned
+        self.SCALE = SCALE  # Outputs are divided by SCALE, Eg. the Feed Flow of the Reactant
+        self.MAX_POINTS = MAX_POINTS    # Points per Outlet, further Results are not added
+        self.AUDIT = AUDIT
+        self.RNG = np.random.default_rng(SEED)
+        self.X = {}     # KEY -> Features of the points [n, d]
+        self.Y = {}     # KEY -> Scaled Outputs of the points [n]
+        self.K_INV = {} # KEY -> Inverse of the Kernel Matrix [n, n]
+        self.PENDING = None     # (KEY, Features, Prediction, Audit?) of the last Get that was sent to the Flowsheet
+        self.QUERIES = 0
+        self.SERVED = 0
+        self.AUDIT_ERRORS = []  # |Prediction - Flowsheet| of answers the Surrogate would have given
+        self.FALLBACK_ERRORS = []   # |Prediction - Flowsheet| of answers that were too uncertain
+
+# STEP 1.1. Squared exponential Kernel between the rows of A and B
+    def Kernel(self, A, B):
+        DISTANCE = ((A[:, None, :] - B[None, :, :])**2).sum(axis=-1)
+        return np.exp(-DISTANCE/(2*self.LENGTH_SCALE**2))
+
+# STEP 1.2. Mean and standard deviation of the Output at FEATURES, (None, inf) when nothing is known yet
+    def Predict(self, KEY, FEATURES):
+        if KEY not in self.X:
+            return None, np.inf
+        X = np.asarray(FEATURES, dtype=float)[None]
+        K_STAR = self.Kernel(X, self.X[KEY])[0]
+        PRIOR = self.Y[KEY].mean()
+        WEIGHTS = self.K_INV[KEY] @ K_STAR
+        MEAN = PRIOR + WEIGHTS @ (self.Y[KEY] - PRIOR)
+        VARIANCE = max(1 + self.NOISE - K_STAR @ WEIGHTS, 0)
+        return MEAN*self.SCALE, np.sqrt(VARIANCE)*self.SCALE
+
+# STEP 1.3. Answer a step from the Surrogate, None when the Flowsheet has to be Simulated
+# A Get that is never followed by its Add (Eg. the step was screened, or did not converge) is forgotten at the next Get.
+    def Get(self, KEY, FEATURES):
+        self.QUERIES += 1
+        self.PENDING = None
+        MEAN, STD = self.Predict(KEY, FEATURES)
+        if STD > self.MAX_STD*self.SCALE:
+            self.PENDING = (KEY, np.asarray(FEATURES, dtype=float), MEAN, False)
+            return None
+        if self.RNG.random() < self.AUDIT:
+            self.PENDING = (KEY, np.asarray(FEATURES, dtype=float), MEAN, True)
+            return None
+        self.SERVED += 1
+        return float(MEAN)
+
+# STEP 1.4. Add a Result of the Flowsheet, the inverse of the Kernel Matrix grows by one row and column
+# When the Result answers the last Get (same KEY and FEATURES), the error of the Prediction is recorded first.
+    def Add(self, KEY, FEATURES, OUTPUT):
+        X = np.asarray(FEATURES, dtype=float)[None]
+        if self.PENDING is not None and self.PENDING[0] == KEY and np.array_equal(self.PENDING[1], X[0]):
+            _, _, MEAN, AUDITED = self.PENDING
+            if MEAN is not None:
+                (self.AUDIT_ERRORS if AUDITED else self.FALLBACK_ERRORS).append(float(abs(MEAN - OUTPUT)))
+            self.PENDING = None
+        if KEY not in self.X:
+            self.X[KEY] = X
+            self.Y[KEY] = np.array([OUTPUT/self.SCALE])
+            self.K_INV[KEY] = np.array([[1/(1 + self.NOISE)]])
+            return
+        if len(self.Y[KEY]) >= self.MAX_POINTS:
+            return
+        K = self.Kernel(X, self.X[KEY])[0]
+        V = self.K_INV[KEY] @ K
+        SCHUR = 1 + self.NOISE - K @ V
+        if SCHUR <= 4*self.NOISE:
+            return  # The point is (nearly) known already, adding it again would make the Kernel Matrix singular
+        N = len(V)
+        K_INV = np.empty((N + 1, N + 1))
+        K_INV[:N, :N] = self.K_INV[KEY] + np.outer(V, V)/SCHUR
+        K_INV[:N, N] = K_INV[N, :N] = -V/SCHUR
+        K_INV[N, N] = 1/SCHUR
+        self.K_INV[KEY] = K_INV
+        self.X[KEY] = np.vstack([self.X[KEY], X])
+        self.Y[KEY] = np.append(self.Y[KEY], OUTPUT/self.SCALE)
+
+# STEP 1.5. Share of the steps answered by the Surrogate, and its errors
+    def Get_Stats(self):
+        return {"QUERIES": self.QUERIES,
+                "SERVED": self.SERVED,
+                "SERVED FRACTION": self.SERVED/self.QUERIES if self.QUERIES else 0.0,
+                "POINTS": sum(len(Y) for Y in self.Y.values()),
+                "AUDITS": len(self.AUDIT_ERRORS),
+                "MEAN AUDIT ERROR": float(np.mean(self.AUDIT_ERRORS)) if self.AUDIT_ERRORS else None,
+                "MAX AUDIT ERROR": float(np.max(self.AUDIT_ERRORS)) if self.AUDIT_ERRORS else None,
+                "MEAN FALLBACK ERROR": float(np.mean(self.FALLBACK_ERRORS)) if self.FALLBACK_ERRORS else None}
@@ -0,0 +1,6 @@
+#################################################################################################################
+# The modules both Cases share: the Backends (AspenBackend), the Result Cache and Store, the Restart Policy, the
+# Recorders, the Profiler, the Document Pool, the asynchronous step (AsyncEnv), the Surrogate, the Metrics Sink, the
+# Checkpointer and the Prioritized Replay Memory. Each Case puts this package on the Path with its "Paths.py", and
+# imports the modules from it, Eg. "from Common.AspenBackend import AspenPlus".
+#################################################################################################################
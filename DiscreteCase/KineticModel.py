@@ -0,0 +1,114 @@
+#################################################################################################################
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+# "Paths" puts the top of the repository on the Path, where the "Common" package of both Cases is.
+import Paths
+# The Backend Interface that the stand-in has to implement.
+from Common.AspenBackend import Backend
+#################################################################################################################
+
+# STEP 1. Define the In-Process Stand-In for the DiscreteExample Flowsheet.
+# It keeps the same Streams, Blocks and Ports as the ".bkp" File, and solves the n-Butane -> Isobutane
+# isomerisation with a first-order reversible rate law instead of calling ASPEN+.
+# It runs on any Operating System and is used for cheap pre-training and testing.
+# With a Topology (Eg. IsomerisationModel(Default_Topology(8))) it solves a train of any number of stages.
+
+
+class IsomerisationModel(Backend):
+    # Block Types of the DiscreteExample Flowsheet: Route(A) = CSTR, Route(B) = PFR
+    BLOCK_TYPES = {"B1A": "CSTR", "B2A": "CSTR", "B3A": "CSTR", "B4A": "CSTR",
+                   "B1B": "PFR", "B2B": "PFR", "B3B": "PFR", "B4B": "PFR"}
+    CHEM = ["N-BUT-01", "ISO-B-01", "2-MET-01"] # Reactant, Product and Inert
+    K_FORWARD = 1.0 # Forward rate constant [1/s]
+    K_EQUILIBRIUM = 2.5 # [ISO-B-01]/[N-BUT-01] at Equilibrium
+    TAU = {"CSTR": 0.6, "PFR": 0.45}  # Residence time of every Block Type [s]
+
+    def __init__(self, TOPOLOGY=None):
+        if TOPOLOGY is not None:
+            self.BLOCK_TYPES = TOPOLOGY.Get_Block_Types("BLOCK")
+        self.STREAMS = {}   # Stream Name -> Input SPECS (None if the Stream is not specified)
+        self.PORTS = {}     # (Block Name, Port Name) -> Connected Stream Names
+        self.RESULTS = {}   # Stream Name -> {Chemical: MOLEFLOW [kmol/s]} after the last Run
+
+# STEP 1.1. Opening the Stand-In gives an empty Flowsheet, like a freshly loaded ".bkp" File
+    def Open(self):
+        self.STREAMS = {}
+        self.PORTS = {}
+        self.RESULTS = {}
+
+    def Close(self):
+        pass
+
+# STEP 1.2. Solve every Block whose Inlet can be traced back to a specified Stream
+    def Run(self):
+        self.RESULTS = {}
+        for Name_STRM in self.STREAMS:
+            self.RESULTS[Name_STRM] = self.Solve_Stream(Name_STRM, set())
+
+    def Solve_Stream(self, Name_STRM, VISITED):
+        if Name_STRM in self.RESULTS:
+            return self.RESULTS[Name_STRM]
+        SPECS = self.STREAMS.get(Name_STRM)
+        if SPECS is not None and "FLOW" in SPECS:
+            FLOW = dict(SPECS["FLOW"])
+        else:
+            Name_BLK = self.Find_Source(Name_STRM)
+            if Name_BLK is None or Name_BLK in VISITED:
+                FLOW = dict.fromkeys(self.CHEM, 0.0)    # Dangling Stream (or Recycle), nothing flows
+            else:
+                FLOW = self.Solve_Block(Name_BLK, VISITED | {Name_BLK})
+        self.RESULTS[Name_STRM] = FLOW
+        return FLOW
+
+    def Find_Source(self, Name_STRM):
+        for (Name_BLK, Name_PORT), Names_STRM in self.PORTS.items():
+            if Name_PORT == "P(OUT)" and Name_STRM in Names_STRM:
+                return Name_BLK
+        return None
+
+    def Solve_Block(self, Name_BLK, VISITED):
+        # Mix all the Streams that are connected to the Inlet of the Block
+        FEED = dict.fromkeys(self.CHEM, 0.0)
+        for Name_STRM in self.PORTS.get((Name_BLK, "F(IN)"), []):
+            for Name_CHEM, FLOW in self.Solve_Stream(Name_STRM, VISITED).items():
+                FEED[Name_CHEM] = FEED.get(Name_CHEM, 0.0) + FLOW
+        REAC_IN, PROD_IN = FEED[self.CHEM[0]], FEED[self.CHEM[1]]
+        REAC_OUT = self.React(REAC_IN, PROD_IN, self.BLOCK_TYPES[Name_BLK])
+        OUTLET = dict(FEED)
+        OUTLET[self.CHEM[0]] = REAC_OUT
+        OUTLET[self.CHEM[1]] = REAC_IN + PROD_IN - REAC_OUT
+        return OUTLET
+
+# STEP 1.3. First-order reversible Kinetics, A <-> B, for both Reactor Types
+# The analytic solutions are written with NumPy, so REAC_IN and PROD_IN may also be Arrays.
+    def React(self, REAC_IN, PROD_IN, BLOCK_TYPE):
+        K_SUM = self.K_FORWARD*(1 + 1/self.K_EQUILIBRIUM)   # k_forward + k_reverse
+        REAC_EQ = (np.asarray(REAC_IN) + PROD_IN)/(1 + self.K_EQUILIBRIUM)
+        if BLOCK_TYPE == "CSTR":
+            return REAC_EQ + (REAC_IN - REAC_EQ)/(1 + K_SUM*self.TAU["CSTR"])
+        return REAC_EQ + (REAC_IN - REAC_EQ)*np.exp(-K_SUM*self.TAU["PFR"])
+
+# STEP 1.4. Read the Output [kmol/s] of a Chemical in a Stream
+    def Get_Output(self, Name_STRM, Name_CHEM):
+        return self.RESULTS[Name_STRM][Name_CHEM]
+
+# STEP 1.5. Create, Delete and Connect Streams
+    def Add_Stream(self, Name_STRM, SPECS=None):
+        self.STREAMS[Name_STRM] = SPECS
+
+    def Remove_Stream(self, Name_STRM):
+        # Deleting a Stream also disconnects it from every Port
+        del self.STREAMS[Name_STRM]
+        for Names_STRM in self.PORTS.values():
+            if Name_STRM in Names_STRM:
+                Names_STRM.remove(Name_STRM)
+
+    def Remove_All_Streams(self):
+        self.STREAMS = {}
+        self.PORTS = {}
+
+    def Connect(self, Name_BLK, Name_PORT, Name_STRM):
+        self.PORTS.setdefault((Name_BLK, Name_PORT), []).append(Name_STRM)
+
+    def Disconnect(self, Name_BLK, Name_PORT, Name_STRM):
+        self.PORTS[(Name_BLK, Name_PORT)].remove(Name_STRM)
@@ -0,0 +1,66 @@
+#################################################################################################################
+# The Planner drives the same Simulator (and so the same Backend, Cache and Store) as the DQNAgent.
+from SimulationEnv import Simulator
+#################################################################################################################
+
+# STEP 1. Evaluate a Prefix of the Reactor Sequence, Eg. (0, 1) = [B1A, B2B], and return its Conversion.
+# The Prefix is replayed like the steps of an episode, the Reactors in front of the last one are read from the Cache.
+
+
+def Evaluate_Prefix(env, PREFIX):
+    env.reset()
+    for action in PREFIX:
+        env.Feed_Stream_Name = env.FEED_MEMORY[-1]
+        env.N_STEPS += 1
+        env.Agent_Makes_Choice(action)
+        REACTANT_OUTPUT = env.Evaluate(tuple(env.CHOICE_MEMORY))
+        if REACTANT_OUTPUT is None:
+            return float("-inf")    # It did not converge, so the Prefix is never kept
+    return env.Get_Conversion(REACTANT_OUTPUT)
+
+#################################################################################################################
+
+# STEP 2. Search the Reactor Sequences stage by stage, extending every kept Prefix by every choice.
+# The Outlet of a Reactor only depends on its Prefix, so every Prefix is Simulated once and shared by all the
+# Sequences that start with it: 2 + 4 + 8 + 16 = 30 Evaluations instead of 16 x 4 steps.
+# With a single Reaction and a fixed Feed, the Flowsheet after a Prefix is fully described by its Conversion, and a
+# higher inlet Conversion never gives a lower outlet Conversion. So only the KEEP best Prefixes of every stage have to
+# be extended (KEEP=1 is exact for this Flowsheet, KEEP=None enumerates every Sequence).
+
+
+def Plan(env, CHOICES=None, N_STAGES=None, KEEP=None):
+    if CHOICES is None:
+        CHOICES = range(env.TOPOLOGY.N_ROUTES)  # Every Route, Eg. (0, 1) = (CSTR, PFR)
+    if N_STAGES is None:
+        N_STAGES = env.TOPOLOGY.N_STAGES
+    SIMULATIONS = env.N_SIMULATIONS
+    PREFIXES = [()]
+    N_PREFIXES = 0
+    for STAGE in range(N_STAGES):
+        SCORED = []
+        for PREFIX in PREFIXES:
+            for CHOICE in CHOICES:
+                SCORED.append((Evaluate_Prefix(env, PREFIX + (CHOICE,)), PREFIX + (CHOICE,)))
+        N_PREFIXES += len(SCORED)
+        SCORED.sort(key=lambda SCORE: SCORE[0], reverse=True)
+        PREFIXES = [PREFIX for CONVERSION, PREFIX in SCORED[:KEEP]]
+    CONVERSION, ACTIONS = SCORED[0]
+    env.reset()
+    return {"ACTIONS": list(ACTIONS),
+            "CONFIGURATION": [env.TOPOLOGY.Name("BLOCK", i, action) for i, action in enumerate(ACTIONS)],
+            "CONVERSION": float(CONVERSION),
+            "EVALUATIONS": env.N_SIMULATIONS - SIMULATIONS,    # Flowsheet Simulations spent
+            "PREFIXES": N_PREFIXES}
+
+# STEP 3. Ground Truth of the DiscreteExample Flowsheet, Eg. compared with the BEST_CASE the DQNAgent found
+
+
+if __name__ == "__main__":
+    import sys
+    if "--stand-in" in sys.argv:
+        from KineticModel import IsomerisationModel
+        env = Simulator(IsomerisationModel())
+    else:
+        env = Simulator()
+    print(Plan(env, KEEP=1))
+    print(Plan(env))   # The Prefixes the first Plan Simulated are read from the Cache
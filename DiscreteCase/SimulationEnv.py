@@ -1,28 +1,92 @@
 #################################################################################################################
-# The "os" library is used to direct Python to the location of the ASPEN File.
-import os
-# The "win32com.client" library is used as an alternative to VBA  for the communication between ASPEN+ and Python.
-import win32com.client as win32
+# The "time" library is used to measure how long every Simulation takes.
+import time
 # The "gym" is imported since it facilitates the creation of the Simulation Environement.
 from gym import Env, spaces
 # "Numpy" is used as a mathematical extention to Python.
 import numpy as np
+# "Paths" puts the top of the repository on the Path, where the "Common" package of both Cases is.
+import Paths
+# The Backend drives the Flowsheet, either ASPEN+ itself or an in-process stand-in (see "KineticModel.py").
+from Common.AspenBackend import AspenPlus
+# Flowsheet Results are cached, so a Reactor Sequence that was already solved is not Simulated again.
+from Common.ResultCache import ResultCache
+# The Restart Policy decides, from measured signals, when the Flowsheet is rolled back or restarted.
+from Common.RestartPolicy import RestartPolicy
+# step_async/step_wait let the training loop work while the Flowsheet is solved.
+from Common.AsyncEnv import AsyncEnv
+# Episodes and steps are recorded in compact NumPy Arrays instead of growing Python lists.
+from Common.Recorder import Recorder
+# The Topology generates the Block and Stream Names for any number of stages.
+from Topology import Default_Topology
+# The Evaluations in a Store are kept apart per Backend and Topology.
+from Common.ResultStore import Get_Source
+# Finished episodes are streamed to a binary File by a background writer, instead of being printed.
+from Common.Metrics import MetricsSink
 #################################################################################################################
 
 # STEP 1. Initialise Environement and Prerequisite Variables.
 
 
-class Simulator(Env):
+class Simulator(Env, AsyncEnv):
     # The "__init__" function is used to provide the simulation all the variables it needs to initialise.
-    def __init__(self):
+    # Any Backend can be passed (Eg. KineticModel.IsomerisationModel()), by default the ASPEN+ File is opened.
+    # A ResultCache (Eg. ResultCache(PATH="Cache.pkl") to keep it between sessions) can be shared by several Simulators.
+    # A ResultStore (Eg. ResultStore("Results.db")) records every Simulation and episode, and is shared between runs.
+    # A RestartPolicy (Eg. RestartPolicy(MAX_MEMORY=2e9)) replaces the hard restart of ASPEN+ every 100 Cycles.
+    # A Surrogate (Eg. Surrogate(SCALE=IN_FLOW[0])) answers the steps it is sure about without Simulating them.
+    # A Profiler (Eg. Profiler(LOG_EVERY=1000), from Common.Profiler) times every phase, see get_stats(). Without one
+    # nothing is timed.
+    # With a RECORD_PATH (Eg. "Run1") the Recorders are the memory-mapped Files Run1_Episodes.dat and Run1_Steps.dat.
+    # A Topology (Eg. Default_Topology(8), or Topology.Load("Train.json")) sets the stages and Routes of the train.
+    # A DocumentPool (Eg. DocumentPool(lambda: AspenPlus(PATH), SIZE=4), from Common.DocumentPool) gives an open
+    # Document, close() hands it back.
+    # Without one the Document is only opened at the first reset, so making a Simulator is fast.
+    # With a METRICS_PATH (Eg. "Run1_Metrics.dat") every finished episode is streamed to that File (see "Metrics.py").
+    # The File is emptied first, with METRICS_APPEND=True (Eg. for a run resumed from a Checkpoint) it is appended to.
+    STEP_DTYPE = [("EPISODE", "i4"), ("ACTION", "i1"), ("CONVERSION", "f4"), ("REWARD", "f4")]
+
+    def __init__(self, BACKEND=None, CACHE=None, STORE=None, RESTART_POLICY=None, SURROGATE=None, RECORD_PATH=None,
+                 PROFILER=None, TOPOLOGY=None, POOL=None, METRICS_PATH=None, METRICS_APPEND=False):
         self.PATH = 'C:/Users/s2199718/Desktop/DiscreteCase/AspenSimulation/DiscreteExample.bkp'
-        # We define the document type of the Aspen+ File.
-        self.AspenSimulation = win32.Dispatch("Apwn.Document")
-        self.AspenSimulation.InitFromArchive2(os.path.abspath(self.PATH))    # Path to File
-        self.AspenSimulation.Visible = False    # Not opening the Simulation expedites training
+        self.POOL = POOL
+        self.POOLED = None  # The Backend checked out of the POOL, handed back by close()
+        if BACKEND is None and POOL is not None:
+            BACKEND = self.POOLED = POOL.Checkout()
+        if BACKEND is None:
+            BACKEND = AspenPlus(self.PATH)
+        self.BACKEND = BACKEND  # Opened at the first reset
+        if CACHE is None:
+            CACHE = ResultCache()
+        self.CACHE = CACHE
+        self.STORE = STORE
+        if RESTART_POLICY is None:
+            RESTART_POLICY = RestartPolicy()
+        self.RESTART_POLICY = RESTART_POLICY
+        self.SNAPSHOT = None # Converged Flowsheet at the start of a Cycle, taken at the first reset
+        self.N_SIMULATIONS = 0 # Evaluations that had to be Simulated (missed the Cache and the Store)
+        self.SURROGATE = SURROGATE
+        if TOPOLOGY is None:
+            TOPOLOGY = Default_Topology()
+        self.TOPOLOGY = TOPOLOGY
+        self.SOURCE = Get_Source(BACKEND, TOPOLOGY) # Only the Evaluations of this SOURCE are read from the Store
+        self.CACHE.Set_Source(self.SOURCE)  # And from the Cache
+        self.EPISODE_DTYPE = [("EPISODE", "i4"), ("CONVERSION", "f4"), ("REWARD", "f4"),
+                              ("ACTIONS", "i1", (TOPOLOGY.N_STAGES,)), ("FAILED", "?")]
+        self.EPISODES = Recorder(self.EPISODE_DTYPE, PATH=RECORD_PATH and RECORD_PATH + "_Episodes.dat")
+        self.HISTORY = Recorder(self.STEP_DTYPE, PATH=RECORD_PATH and RECORD_PATH + "_Steps.dat")
+        self.METRIC_DTYPE = [("EPISODE", "i4"), ("CONVERSION", "f4"), ("REWARD", "f4"),
+                             ("ACTIONS", "i1", (TOPOLOGY.N_STAGES,)), ("SOLVE_SECONDS", "f4"), ("N_SIMULATIONS", "i4"),
+                             ("RESTORES", "i4"), ("RESTARTS", "i4"), ("FAILED", "?")]
+        self.METRICS = None
+        if METRICS_PATH is not None:
+            self.METRICS = MetricsSink(METRICS_PATH, self.METRIC_DTYPE, APPEND=METRICS_APPEND)
+        self.PROFILER = PROFILER
+        if PROFILER is not None:
+            PROFILER.Attach(self)   # Wraps step, reset, the timed phases and the Backend of this Simulator
 
         ## We define the variables needed for the DQNAgent
-        self.action_space = spaces.Discrete(2)  # The Agent has 2 options [CSTR, PFR]
+        self.action_space = spaces.Discrete(TOPOLOGY.N_ROUTES)  # The Agent has 2 options [CSTR, PFR]
         self.observation_space = spaces.Box(low=0, high=1, shape=(1,))  # CONVERSION Ɐ [0, 1]
         self.STATE = 0  # The state of the Env equals to 0 at the start of the Simulation
         self.DONE_COUNTER = 0    # Cycle counter used to make the program more light-weight
@@ -32,15 +96,37 @@ class Simulator(Env):
         self.CHEM = ["N-BUT-01", "ISO-B-01", "2-MET-01"] # Names of the Chemicals
         self.IN_FLOW = [0.0099, 0.0001, 0.0769]  # Initial Flowrates [kmol/s]
         self.CHOICE_MEMORY = []  # All the choices made by the Agents
-        self.FEED_MEMORY = ["S1"]   # The Feed Memory, used for connecting Streams to Blocks
+        self.FEED_MEMORY = [TOPOLOGY.FEED]   # The Feed Memory, used for connecting Streams to Blocks
         self.CONVERSION_LIST = [0]   # Short-term memory of Conversion at Block Output
         self.MAX_CONVERSION = 0 # The maximum reward is 0 at Initialisation
         self.BEST_CASE = []
+        self.EPISODE_REWARD = 0 # Sum of the Rewards of the current Cycle
+        self.SOLVE_SECONDS = 0  # Time spent solving the Flowsheet in the current Cycle [s]
+        ## We define the variables needed when the Flowsheet does not converge
+        self.FAILURE_PENALTY = -1 # Reward of a step whose Sequence did not converge, which ends the episode
+        self.FAILED = set() # Sequences that did not converge within the retry budget, never Simulated again
+        self.EPISODE_FAILED = False
 
         ## We define the Stream and Block Names
-        self.STRM_INPUTS = ["S1AIN", "S2AIN", "S3AIN", "S4AIN", "S1BIN", "S2BIN", "S3BIN", "S4BIN"]
-        self.BLK_NAMES = ["B1A", "B2A", "B3A", "B4A", "B1B", "B2B", "B3B", "B4B"]
-        self.STRM_OUTPUTS = ["S1AOUT", "S2AOUT", "S3AOUT", "S4AOUT", "S1BOUT", "S2BOUT", "S3BOUT", "S4BOUT"]
+        self.STRM_INPUTS = TOPOLOGY.Names("INPUT") # Eg. ["S1AIN", "S2AIN", "S3AIN", "S4AIN", "S1BIN", ...]
+        self.BLK_NAMES = TOPOLOGY.Names("BLOCK") # Eg. ["B1A", "B2A", "B3A", "B4A", "B1B", ...]
+        self.STRM_OUTPUTS = TOPOLOGY.Names("OUTPUT") # Eg. ["S1AOUT", "S2AOUT", "S3AOUT", "S4AOUT", "S1BOUT", ...]
+        # SPECS of the Feed "S1" and of every Block Input Stream
+        self.FEED_SPECS = {"TEMP": 298, # Stream Temp [K]
+                           "PRES": 5e+06, # Pressure [N/m2]
+                           "TOTFLOW": 0.0869, # Total Flow [kmol/s]
+                           "FLOW": {self.CHEM[0]: 0.0099, self.CHEM[1]: 0.0001, self.CHEM[2]: 0.0769}, # [kmol/s]
+                           "NPHASE": 1, # Number of Phases
+                           "PHASE": "L"} # Chosen Liquid Phase
+        ## We define the variables needed for the incremental reset of the Streams
+        self.CHANGES = None # Connections changed in this Cycle (None: all Streams have to be remade)
+        N_SPECS = sum(len(VALUE) if isinstance(VALUE, dict) else 1 for VALUE in self.FEED_SPECS.values())
+        # Tree Mutations of Reset_Streams: RemoveAll, the Streams with their SPECS, and 2 Connections per Block
+        self.FULL_RESET_MUTATIONS = (1 + (len(self.STRM_INPUTS) + 1)*(1 + N_SPECS) + len(self.STRM_OUTPUTS)
+                                     + 2*len(self.BLK_NAMES))
+        self.RESTORE_MUTATIONS = 3 + N_SPECS   # Disconnect, re-create the Input Stream with its SPECS, Connect
+        self.RESET_MUTATIONS_AVOIDED = 0 # Tree Mutations saved by all incremental resets
+        self.LAST_RESET_AVOIDED = 0 # Tree Mutations saved by the last reset
 
 #################################################################################################################
 
@@ -49,62 +135,119 @@ class Simulator(Env):
     def step(self,action):
 
         ## First we need to update some variables 
+        START = time.perf_counter() # The Step Latency is measured for the Restart Policy
         self.Feed_Stream_Name = self.FEED_MEMORY[-1] # Defines the Input Name
         self.N_STEPS += 1   # The Step counter is updated
         
         ## The Agent makes its Choice and The Simulation is Updated
         self.Agent_Makes_Choice(action) # Find Custom Function Below
-        self.AspenSimulation.Engine.Run2() # Run the ASPEN+ Simulation
-        self.AspenSimulation.Engine.Run2() # Run the Simulation again to eliminate Errors
-
-        ## Next the needed Simulation are acquired
-        REACTANT_OUTPUT = self.Get_Output(self.Name_BLK_Output) # Amount of Reactant at Blocks Output [kmol/s]
-        CONVERSION = self.Get_Conversion(REACTANT_OUTPUT) # Amount of Reactant Converted at Output [0, 1]
-        ## Calculate the Reward as a function of Conversion
-        REWARD = CONVERSION - self.CONVERSION_LIST[-1]
+
+        ## Next the needed Simulation are acquired, Sequences that were solved before are read from the Cache
+        REACTANT_OUTPUT = self.Evaluate(tuple(self.CHOICE_MEMORY)) # Amount of Reactant at Blocks Output [kmol/s]
+        return self.Record_Outcome(action, REACTANT_OUTPUT, START)
+
+# STEP 2.1. Reward the Outcome of a step, and close the Cycle after the last stage
+    def Record_Outcome(self, action, REACTANT_OUTPUT, START):
+        if REACTANT_OUTPUT is None: # The Sequence did not converge within the retry budget, the episode ends here
+            self.EPISODE_FAILED = True
+            CONVERSION = self.CONVERSION_LIST[-1]
+            REWARD = self.FAILURE_PENALTY
+        else:
+            CONVERSION = self.Get_Conversion(REACTANT_OUTPUT) # Amount of Reactant Converted at Output [0, 1]
+            ## Calculate the Reward as a function of Conversion
+            REWARD = CONVERSION - self.CONVERSION_LIST[-1]
         self.STATE = np.array([self.CONVERSION_LIST[-1]])
         self.CONVERSION_LIST.append(CONVERSION)
+        self.EPISODE_REWARD += REWARD
+        self.HISTORY.Append(EPISODE=self.DONE_COUNTER, ACTION=action, CONVERSION=CONVERSION, REWARD=REWARD)
 
         ## Checkpoint: Is the Cycle Done? What is the best Case?
-        if len(self.CHOICE_MEMORY) == 4: # Max Number of Reactors = 4
+        if self.N_STEPS == self.TOPOLOGY.N_STAGES or self.EPISODE_FAILED: # Max Number of Reactors, Eg. 4
             done = True 
+            ACTIONS = [self.TOPOLOGY.Route("BLOCK", Name_BLK) for Name_BLK in self.CHOICE_MEMORY]
+            ACTIONS += [-1]*(self.TOPOLOGY.N_STAGES - len(ACTIONS)) # The stages a failed episode did not reach
+            self.EPISODES.Append(EPISODE=self.DONE_COUNTER, CONVERSION=self.CONVERSION_LIST[-1],
+                                 REWARD=self.EPISODE_REWARD, ACTIONS=ACTIONS, FAILED=self.EPISODE_FAILED)
             ## Keep Track of the Best Solutions 
-            if self.CONVERSION_LIST[3] > self.MAX_CONVERSION:
-                self.MAX_REWARD = self.CONVERSION_LIST[3]
+            if self.CONVERSION_LIST[-1] > self.MAX_CONVERSION and not self.EPISODE_FAILED:
+                self.MAX_CONVERSION = self.CONVERSION_LIST[-1]
                 self.BEST_CASE.append([self.CHOICE_MEMORY,self.MAX_CONVERSION,self.DONE_COUNTER])
             else:
                 pass
-            ## To make the Simulation more light-weight we hard-Reset it every 100 Cycles.
-            if (self.DONE_COUNTER%100)==0:
-                self.AspenSimulation.Close()    # Close the Simulation
-                # Completely restart the simulation Like Step 1
-                self.AspenSimulation = win32.Dispatch("Apwn.Document")
-                self.AspenSimulation.InitFromArchive2(os.path.abspath(self.PATH)) 
-                self.AspenSimulation.Visible = False
-                self.AspenSimulation.Engine.Run2()
-                print(f"~ASPEN+ Restarted {self.DONE_COUNTER}~")
+            if self.STORE is not None and not self.EPISODE_FAILED:
+                self.STORE.Add_Episode(self.DONE_COUNTER, self.CHOICE_MEMORY, self.CONVERSION_LIST[-1], self.EPISODE_REWARD)
+            ## To keep the Simulation light-weight the Restart Policy rolls it back, or restarts it, when needed.
+            self.RESTART_POLICY.Record_Step(time.perf_counter() - START)
+            DECISION = self.RESTART_POLICY.Decide(self.BACKEND.Get_Memory)
+            if DECISION == "restore" and self.SNAPSHOT is not None:
+                self.BACKEND.Restore(self.SNAPSHOT) # Roll back to the converged Flowsheet of the Snapshot
+                self.CHANGES = [] # The Snapshot was taken with all the Streams in place
+                if self.METRICS is None:
+                    print(f"~ASPEN+ Restored {self.DONE_COUNTER}~")
+            elif DECISION is not None:
+                self.BACKEND.Restart()  # Close and completely restart the simulation Like Step 1
+                self.CHANGES = None # The reloaded File needs all its Streams remade
+                self.SNAPSHOT = None # Taken again at the next reset
+                if self.METRICS is None:
+                    print(f"~ASPEN+ Restarted {self.DONE_COUNTER}~")
             else:
                 pass
+            if self.METRICS is not None:
+                self.METRICS.Push(EPISODE=self.DONE_COUNTER, CONVERSION=self.CONVERSION_LIST[-1],
+                                  REWARD=self.EPISODE_REWARD, ACTIONS=ACTIONS, SOLVE_SECONDS=self.SOLVE_SECONDS,
+                                  N_SIMULATIONS=self.N_SIMULATIONS, RESTORES=self.RESTART_POLICY.N_RESTORES,
+                                  RESTARTS=self.RESTART_POLICY.N_RESTARTS, FAILED=self.EPISODE_FAILED)
             self.DONE_COUNTER += 1 # End of one Full Cycle
         else:
             done = False 
-        return self.STATE, REWARD, done, {}
+            self.RESTART_POLICY.Record_Step(time.perf_counter() - START)
+        return self.STATE, REWARD, done, {"FAILED": True} if self.EPISODE_FAILED else {}
+
+# STEP 2.2. Evaluate a whole Reactor Sequence, Eg. evaluate_sequence([0, 1, 1, 0]), with a single Flowsheet solve.
+# All the Blocks and Outlet Streams are in the Flowsheet, so every Connection of the Sequence is made first, the
+# Flowsheet is solved once, and the Outlets of all the stages are read in one bulk read. The stages are then rewarded
+# exactly like the steps of an episode (same States, Rewards, Cache, Store, History and Restart Policy), and the
+# TRANSITIONS (STATE, action, REWARD, NEXT_STATE, done) can be replayed to an Agent, see ActorLearner.Replay.
+    def evaluate_sequence(self, actions):
+        if not 1 <= len(actions) <= self.TOPOLOGY.N_STAGES:
+            raise ValueError(f"A Sequence has 1 to {self.TOPOLOGY.N_STAGES} actions, not {len(actions)}")
+        STATE = self.reset()
+        for action in actions:
+            self.Feed_Stream_Name = self.FEED_MEMORY[-1]
+            self.N_STEPS += 1
+            self.Agent_Makes_Choice(action) # Only Connects the Feed, nothing is solved yet
+        START = time.perf_counter()
+        REACTANT_OUTPUTS = self.Evaluate_Sequence(tuple(self.CHOICE_MEMORY))
+        SHARE = (time.perf_counter() - START)/len(actions) # Every stage is charged an equal share of the solve
+        TRANSITIONS = []
+        for STAGE, action in enumerate(actions):
+            self.N_STEPS = STAGE + 1
+            if REACTANT_OUTPUTS[STAGE] is None: # The stages after a failure are never reached, like when stepping
+                del self.CHOICE_MEMORY[self.N_STEPS:]
+                del self.FEED_MEMORY[self.N_STEPS + 1:]
+            NEXT_STATE, REWARD, done, INFO = self.Record_Outcome(action, REACTANT_OUTPUTS[STAGE],
+                                                                 time.perf_counter() - SHARE)
+            TRANSITIONS.append((STATE, action, REWARD, NEXT_STATE, done))
+            STATE = NEXT_STATE
+            if self.EPISODE_FAILED:
+                break
+        return {"CONVERSIONS": self.CONVERSION_LIST[1:],
+                "REWARDS": [REWARD for STATE, action, REWARD, NEXT_STATE, done in TRANSITIONS],
+                "TRANSITIONS": TRANSITIONS,
+                "FAILED": self.EPISODE_FAILED}
 
 ##################################################################################################################
 
 # STEP 3. Define the Agent Make Choice Function
 
     def Agent_Makes_Choice(self, action):
-        if action == 0: 
-            ROUTE = "A" # Route(A) = CSTR
-        else:
-            ROUTE = "B" # Route(B) = PFR
-        
-        # Define the Names of the Block and Streams
-        self.Name_BLK = "B" + str(self.N_STEPS) + ROUTE # Eg. Name_BLK = B1A, B(Block)1(STEP)A(CSTR)
+        # The action is the Route: Route(A) = CSTR, Route(B) = PFR
+        # Look up the Names of the Block and Streams of this stage and Route
+        STAGE = self.N_STEPS - 1
+        self.Name_BLK = self.TOPOLOGY.Name("BLOCK", STAGE, action) # Eg. Name_BLK = B1A, B(Block)1(STEP)A(CSTR)
         self.CHOICE_MEMORY.append(self.Name_BLK)
-        self.Name_BLK_Input = "S"+str(self.N_STEPS)+ROUTE+"IN" # Preset Block Input Eg. S1AIN
-        self.Name_BLK_Output = "S" + str(self.N_STEPS) + ROUTE + "OUT" # Preset Block Input Eg. S1AOUT
+        self.Name_BLK_Input = self.TOPOLOGY.Name("INPUT", STAGE, action) # Preset Block Input Eg. S1AIN
+        self.Name_BLK_Output = self.TOPOLOGY.Name("OUTPUT", STAGE, action) # Preset Block Input Eg. S1AOUT
         self.FEED_MEMORY.append(self.Name_BLK_Output) # The Output of this step is the Input of the next.
         self.Connect_Feed() # We connect the Feed(step-1) to the chosen Block
 
@@ -114,14 +257,44 @@ class Simulator(Env):
 
     def reset(self):
         # Now all Variables that need to be reset Every Cycle are Reset
-        self.N_STEPS = 0    # reset the number of steps taken (inside a cycle (max=4))
+        self.N_STEPS = 0    # reset the number of steps taken (inside a cycle (max=N_STAGES))
         self.CHOICE_MEMORY = [] # reset the choice memory of the cycle
         self.CONVERSION_LIST = [0] # reset the convrsion list of the cycle
-        self.FEED_MEMORY = ["S1"] # the first feed is set again to be S1
+        self.FEED_MEMORY = [self.TOPOLOGY.FEED] # the first feed is set again to be S1
         self.STATE = np.array([0]) # reset the State 
-        self.Reset_Streams() # Remake all the streams to how they were before
+        self.EPISODE_REWARD = 0 # reset the Reward of the cycle
+        self.EPISODE_FAILED = False
+        self.SOLVE_SECONDS = 0
+        self.BACKEND.Ensure_Open() # Open the Document at the first reset
+        if self.CHANGES is None:
+            self.Reset_Streams() # Remake all the streams to how they were before
+            self.LAST_RESET_AVOIDED = 0
+        else:
+            self.Restore_Streams() # Only undo the Connections changed in the last cycle
+        self.CHANGES = []
+        if self.SNAPSHOT is None:
+            self.BACKEND.Run() # Converge the clean Flowsheet once, and keep it to roll back to
+            self.SNAPSHOT = self.BACKEND.Snapshot()
         return self.STATE 
 
+# STEP 4.1. Timers, call counters and latency histograms of the Profiler (empty without one)
+    def get_stats(self):
+        if self.PROFILER is None:
+            return {}
+        return self.PROFILER.Get_Stats()
+
+# STEP 4.2. Hand the Document back to the Pool, still open, for the next Simulator, and write the last Metrics and the
+# Cache (when it has a PATH), so the next session starts with every Result of this one
+    def close(self):
+        self.close_async()
+        if self.CACHE.PATH is not None:
+            self.CACHE.Save()
+        if self.METRICS is not None:
+            self.METRICS.Close()
+        if self.POOLED is not None:
+            self.POOL.Checkin(self.POOLED)
+            self.POOLED = None
+
 ##################################################################################################################
 
 # STEP 5. Implement all Auxiliary Functions that are needed for the previous steps.
@@ -130,7 +303,7 @@ class Simulator(Env):
 # STEP 5.1. Get the Output [kmol/s] of Reactant
     def Get_Output(self,Name_BLK_OUT):
         # We Navigate to the ASPEN Node containing the Value of the Output Streams
-        REAC_OUT = self.AspenSimulation.Tree.Elements("Data").Elements("Streams").Elements(Name_BLK_OUT).Elements("Output").Elements("MOLEFLOW").Elements("MIXED").Elements(self.CHEM[0]).Value
+        REAC_OUT = self.BACKEND.Get_Output(Name_BLK_OUT, self.CHEM[0])
         return REAC_OUT
 
 # STEP 5.2. Calculate the Conversion at the Output of Every Block
@@ -140,16 +313,15 @@ class Simulator(Env):
 
 # STEP 5.3. Define the Connect Feed Function
     def Connect_Feed(self):
-        BLK_INPUT = self.AspenSimulation.Tree.Elements("Data").Elements("Blocks") # Find the ASPEN Node for all Blocks
-        STRM_INPUT = self.AspenSimulation.Tree.Elements("Data").Elements("Streams") # Find the ASPEN Node for all Streams
-        STRM_INPUT.Elements.Remove(self.Name_BLK_Input) # Delete the Stream that is already connected to the Block
-        BLK_INPUT.Elements(self.Name_BLK).Elements("Ports").Elements("F(IN)").Elements.Add(self.Feed_Stream_Name) # Connect the OutputStream[step-1]
+        self.BACKEND.Remove_Stream(self.Name_BLK_Input) # Delete the Stream that is already connected to the Block
+        self.BACKEND.Connect(self.Name_BLK, "F(IN)", self.Feed_Stream_Name) # Connect the OutputStream[step-1]
+        if self.CHANGES is not None:
+            self.CHANGES.append((self.Name_BLK, self.Name_BLK_Input, self.Feed_Stream_Name)) # Remembered for reset
 
 # STEP 5.4. Define the Reset Streams Function
 
     def Reset_Streams(self):
-        self.STRM = self.AspenSimulation.Tree.Elements("Data").Elements("Streams") # Find the ASPEN Node for all Streams
-        self.STRM.RemoveAll() # This Deletes all the streams present in the Flowsheet
+        self.BACKEND.Remove_All_Streams() # This Deletes all the streams present in the Flowsheet
         # To re-create all the Deleted Streams the following 4-sub commands are used.
         self.Add_Input_Streams()
         self.Add_Output_Streams()
@@ -159,36 +331,114 @@ class Simulator(Env):
 # STEP 5.4.1. Create all the Input Streams -"S1"
     def Add_Input_Streams(self):
         for STRM_Name in self.STRM_INPUTS: # For every name in the Stream Inputs
-            self.STRM.Elements.Add(STRM_Name) # Create a Stream with that Name and the following SPECS
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("TEMP").Elements("MIXED").Value = 298 # Stream Temp [K]
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("PRES").Elements("MIXED").Value = 5e+06 # Pressure [N/m2]
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("TOTFLOW").Elements("MIXED").Value = 0.0869 # Total Flow [kmol/s]
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("FLOW").Elements("MIXED").Elements(self.CHEM[0]).Value = 0.0099 # [kmol/s]
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("FLOW").Elements("MIXED").Elements(self.CHEM[1]).Value  = 0.0001 # [kmol/s]
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("FLOW").Elements("MIXED").Elements(self.CHEM[2]).Value  = 0.0769 # [kmol/s]
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("NPHASE").Elements("MIXED").Value = 1 # Number of Phases
-            self.STRM.Elements(STRM_Name).Elements("Input").Elements("PHASE").Elements("MIXED").Value = "L" # Chosen Liquid Phase
+            self.BACKEND.Add_Stream(STRM_Name, self.FEED_SPECS) # Create a Stream with that Name and the Feed SPECS
 
 # STEP 5.4.2. Create All of the Output Streams 
     def Add_Output_Streams(self):
         for STRM_OUT in self.STRM_OUTPUTS: # For every name in the Stream Outputs
-            self.STRM.Elements.Add(STRM_OUT) # create a stream with that name 
+            self.BACKEND.Add_Stream(STRM_OUT) # create a stream with that name 
 
 # STEP 5.4.3. Create The first Feed Stream [S1]
     def Add_Feed_Stream(self):
-        FeedConfig = self.STRM.Elements.Add("S1") # Create "S1" and select the following SPECS
-        FeedConfig.Elements("Input").Elements("TEMP").Elements("MIXED").Value = 298
-        FeedConfig.Elements("Input").Elements("PRES").Elements("MIXED").Value = 5e+06
-        FeedConfig.Elements("Input").Elements("TOTFLOW").Elements("MIXED").Value = 0.0869
-        FeedConfig.Elements("Input").Elements("FLOW").Elements("MIXED").Elements("N-BUT-01").Value = 0.0099
-        FeedConfig.Elements("Input").Elements("FLOW").Elements("MIXED").Elements("ISO-B-01").Value = 0.0001
-        FeedConfig.Elements("Input").Elements("FLOW").Elements("MIXED").Elements("2-MET-01").Value = 0.0769
-        FeedConfig.Elements("Input").Elements("NPHASE").Elements("MIXED").Value = 1
-        FeedConfig.Elements("Input").Elements("PHASE").Elements("MIXED").Value = "L"
+        self.BACKEND.Add_Stream(self.TOPOLOGY.FEED, self.FEED_SPECS) # Create "S1" and select the Feed SPECS
 
 # STEP 5.4.4. Connect All Input and Output Streams to their Corresponding Blocks
     def Connect_Streams(self):
-        BLK = self.AspenSimulation.Tree.Elements("Data").Elements("Blocks")
         for i in range(0,len(self.BLK_NAMES)): # for every Name in Blocks: Connect Input and Output 
-            BLK.Elements(self.BLK_NAMES[i]).Elements("Ports").Elements("F(IN)").Elements.Add(self.STRM_INPUTS[i])
-            BLK.Elements(self.BLK_NAMES[i]).Elements("Ports").Elements("P(OUT)").Elements.Add(self.STRM_OUTPUTS[i])
\ No newline at end of file
+            self.BACKEND.Connect(self.BLK_NAMES[i], "F(IN)", self.STRM_INPUTS[i])
+            self.BACKEND.Connect(self.BLK_NAMES[i], "P(OUT)", self.STRM_OUTPUTS[i])
+
+# STEP 5.4.5. Undo only the Connections changed in the last Cycle, instead of remaking all the Streams
+    def Restore_Streams(self):
+        for Name_BLK, Name_BLK_Input, Feed_Stream_Name in reversed(self.CHANGES):
+            self.BACKEND.Disconnect(Name_BLK, "F(IN)", Feed_Stream_Name) # Disconnect the OutputStream[step-1]
+            self.BACKEND.Add_Stream(Name_BLK_Input, self.FEED_SPECS) # Re-create the deleted Input Stream
+            self.BACKEND.Connect(Name_BLK, "F(IN)", Name_BLK_Input)
+        self.LAST_RESET_AVOIDED = self.FULL_RESET_MUTATIONS - self.RESTORE_MUTATIONS*len(self.CHANGES)
+        self.RESET_MUTATIONS_AVOIDED += self.LAST_RESET_AVOIDED
+
+# STEP 5.5. Evaluate a Reactor Sequence: first look it up in the Cache and in the Store, and only Simulate it when both miss
+    def Evaluate(self, CONFIGURATION):
+        if CONFIGURATION in self.FAILED:
+            return None # It did not converge before, so it is not Simulated again
+        REAC_OUT = self.CACHE.Get(CONFIGURATION)
+        if REAC_OUT is None and self.STORE is not None:
+            OUTLET = self.STORE.Get(CONFIGURATION, self.SOURCE)
+            if OUTLET is not None:
+                REAC_OUT = OUTLET[self.CHEM[0]]
+                if self.SURROGATE is not None:
+                    self.SURROGATE.Add(len(CONFIGURATION), self.Get_Features(CONFIGURATION), REAC_OUT)
+        if REAC_OUT is None and self.SURROGATE is not None:
+            PREDICTION = self.SURROGATE.Get(len(CONFIGURATION), self.Get_Features(CONFIGURATION))
+            if PREDICTION is not None:
+                return PREDICTION # Not Cached, so a Simulation can still replace it later
+        if REAC_OUT is None:
+            START = time.perf_counter()
+            self.N_SIMULATIONS += 1
+            if not self.Solve(): # Run the ASPEN+ Simulation, and again only when it did not converge
+                self.FAILED.add(CONFIGURATION)
+                return None
+            REAC_OUT = self.Get_Output(self.Name_BLK_Output)
+            if self.STORE is not None:
+                OUTLET = {Name_CHEM: self.BACKEND.Get_Output(self.Name_BLK_Output, Name_CHEM) for Name_CHEM in self.CHEM}
+                self.STORE.Put(CONFIGURATION, self.Name_BLK_Output, OUTLET, self.Get_Conversion(REAC_OUT),
+                               time.perf_counter() - START, self.SOURCE)
+            if self.SURROGATE is not None:
+                self.SURROGATE.Add(len(CONFIGURATION), self.Get_Features(CONFIGURATION), REAC_OUT)
+        self.CACHE.Put(CONFIGURATION, REAC_OUT)
+        return REAC_OUT
+
+# STEP 5.5.1. Features of a Reactor Sequence for the Surrogate: the Route (0: CSTR, 1: PFR) at every position
+    def Get_Features(self, CONFIGURATION):
+        return [self.TOPOLOGY.Route("BLOCK", Name_BLK) for Name_BLK in CONFIGURATION]
+
+# STEP 5.5.2. Evaluate every Prefix of a wired Reactor Sequence with a single solve, Eg. (B1A, B2B) gives the Outlets of
+# (B1A,) and (B1A, B2B). Prefixes that were solved before are read from the Cache and the Store, when one of them
+# misses the Flowsheet is solved once and all the Outlets are read at once. After a failed solve only the Prefixes that
+# were known are returned, and None for the others (the episode fails at the first None).
+    def Evaluate_Sequence(self, CONFIGURATION):
+        PREFIXES = [CONFIGURATION[:i+1] for i in range(len(CONFIGURATION))]
+        REAC_OUTS = [self.CACHE.Get(PREFIX) for PREFIX in PREFIXES]
+        for i, PREFIX in enumerate(PREFIXES):
+            if REAC_OUTS[i] is None and self.STORE is not None:
+                OUTLET = self.STORE.Get(PREFIX, self.SOURCE)
+                if OUTLET is not None:
+                    REAC_OUTS[i] = OUTLET[self.CHEM[0]]
+                    self.CACHE.Put(PREFIX, REAC_OUTS[i])
+        if None not in REAC_OUTS or CONFIGURATION in self.FAILED:
+            return REAC_OUTS
+        START = time.perf_counter()
+        self.N_SIMULATIONS += 1
+        if not self.Solve():
+            self.FAILED.add(CONFIGURATION)
+            return REAC_OUTS
+        Names_CHEM = self.CHEM if self.STORE is not None else self.CHEM[:1]
+        FLOWS = self.BACKEND.Get_Outputs([(Name_STRM, Name_CHEM) for Name_STRM in self.FEED_MEMORY[1:]
+                                          for Name_CHEM in Names_CHEM])
+        SECONDS = time.perf_counter() - START
+        for i, PREFIX in enumerate(PREFIXES):
+            OUTLET = dict(zip(Names_CHEM, FLOWS[i*len(Names_CHEM):(i + 1)*len(Names_CHEM)]))
+            REAC_OUTS[i] = OUTLET[self.CHEM[0]]
+            self.CACHE.Put(PREFIX, REAC_OUTS[i])
+            if self.STORE is not None:
+                self.STORE.Put(PREFIX, self.FEED_MEMORY[i+1], OUTLET, self.Get_Conversion(REAC_OUTS[i]), SECONDS,
+                               self.SOURCE)
+            if self.SURROGATE is not None:
+                self.SURROGATE.Add(len(PREFIX), self.Get_Features(PREFIX), REAC_OUTS[i])
+        return REAC_OUTS
+
+# STEP 5.5.3. Solve the Flowsheet, and re-run it only when it did not converge, within the budget of the Restart Policy
+# (MAX_RETRIES re-runs, SOLVE_TIMEOUT seconds per solve). Every failure counts towards a roll-back, and a Sequence
+# that used up its retries makes the Restart Policy restart the Document at the end of the episode.
+    def Solve(self):
+        START = time.perf_counter()
+        CONVERGED = False
+        for ATTEMPT in range(1 + self.RESTART_POLICY.MAX_RETRIES):
+            if self.BACKEND.Solve(self.RESTART_POLICY.SOLVE_TIMEOUT):
+                CONVERGED = True
+                break
+            self.RESTART_POLICY.Record_Failure()
+        else:
+            self.RESTART_POLICY.Record_Failed_Evaluation()
+        self.SOLVE_SECONDS += time.perf_counter() - START
+        return CONVERGED
@@ -0,0 +1,47 @@
+#################################################################################################################
+# The Metrics File is tested on the in-process stand-in: a new run starts it again, unless it is appended to, and
+# closing the Simulator writes every episode before the File is read.
+import io
+import contextlib
+import pytest
+import Paths
+from Common.Metrics import MetricsSink, Read_Metrics
+from SimulationEnv import Simulator
+from KineticModel import IsomerisationModel
+#################################################################################################################
+
+# STEP 1. Run N_EPISODES on a Simulator that streams to PATH, and close it.
+
+
+def Run(PATH, N_EPISODES, **ENV_ARGS):
+    env = Simulator(IsomerisationModel(), METRICS_PATH=PATH, **ENV_ARGS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(N_EPISODES):
+            env.reset()
+            done = False
+            while not done:
+                STATE, REWARD, done, INFO = env.step(0)
+    env.close()
+
+
+def Episodes(PATH):
+    return sum(len(ROWS) for ROWS in Read_Metrics(PATH))
+
+# STEP 2. A run again from the start empties the File, a resumed run appends to it.
+
+
+def test_Rerun_Starts_Again(tmp_path):
+    PATH = str(tmp_path/"Episodes.dat")
+    Run(PATH, 3)
+    assert Episodes(PATH) == 3
+    Run(PATH, 2)
+    assert Episodes(PATH) == 2
+    Run(PATH, 4, METRICS_APPEND=True)
+    assert Episodes(PATH) == 6
+
+
+def test_Append_Checks_Dtype(tmp_path):
+    PATH = str(tmp_path/"Episodes.dat")
+    Run(PATH, 1)
+    with pytest.raises(ValueError):
+        MetricsSink(PATH, [("EPISODE", "i4")], APPEND=True)
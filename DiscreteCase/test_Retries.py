@@ -0,0 +1,72 @@
+#################################################################################################################
+# The retry budget of a Simulation is tested with failures injected into the in-process stand-in.
+import io
+import contextlib
+from SimulationEnv import Simulator
+from KineticModel import IsomerisationModel
+import Paths
+from Common.RestartPolicy import RestartPolicy
+#################################################################################################################
+
+# STEP 1. A stand-in that counts its solves, and converges again after HEAL_AFTER solves (None: never).
+
+
+class Counting_Model(IsomerisationModel):
+    COUNTERS = IsomerisationModel.COUNTERS + ("SOLVES",)   # Not rolled back by a Restore
+
+    def __init__(self, HEAL_AFTER=None):
+        super().__init__()
+        self.SOLVES = 0
+        self.HEAL_AFTER = HEAL_AFTER
+
+    def Solve(self, TIMEOUT=None):
+        self.SOLVES += 1
+        CONVERGED = super().Solve(TIMEOUT)
+        if self.SOLVES == self.HEAL_AFTER:
+            self.FAIL_RATE = 0.0
+        return CONVERGED
+
+
+def Make_Env(BACKEND, MAX_RETRIES=2):
+    return Simulator(BACKEND, RESTART_POLICY=RestartPolicy(LATENCY_DRIFT=float("inf"), MAX_RETRIES=MAX_RETRIES))
+
+#################################################################################################################
+
+# STEP 2. A solve that did not converge is re-run, and the step goes on as usual when a re-run converges.
+
+
+def test_Retry_Converges():
+    BACKEND = Counting_Model(HEAL_AFTER=2).Inject_Failures(1.0)
+    env = Make_Env(BACKEND)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        STATE, REWARD, done, INFO = env.step(0)
+    assert BACKEND.SOLVES == 3  # Two failures, then the last retry of the budget converged
+    assert env.RESTART_POLICY.N_FAILURES == 2 and env.RESTART_POLICY.N_FAILED_EVALUATIONS == 0
+    assert not done and INFO == {} and REWARD > 0 and not env.FAILED
+
+# STEP 3. A Sequence that used up its retries ends the episode with the FAILURE_PENALTY, restarts the Document and is
+# never Simulated again.
+
+
+def test_Failed_Evaluation():
+    BACKEND = Counting_Model().Inject_Failures(1.0)
+    env = Make_Env(BACKEND, MAX_RETRIES=3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        STATE, REWARD, done, INFO = env.step(0)
+    assert BACKEND.SOLVES == 1 + 3
+    assert done and INFO == {"FAILED": True} and REWARD == env.FAILURE_PENALTY
+    assert env.FAILED == {("B1A",)}
+    assert env.RESTART_POLICY.N_FAILED_EVALUATIONS == 1 and env.RESTART_POLICY.N_RESTARTS == 1
+    assert env.SNAPSHOT is None # Taken again after the restart
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        STATE, REWARD, done, INFO = env.step(0)
+    assert BACKEND.SOLVES == 1 + 3  # The failed Sequence was skipped
+    assert done and INFO == {"FAILED": True} and REWARD == env.FAILURE_PENALTY
+    assert env.EPISODES.View()["FAILED"].tolist() == [True, True]
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        STATE, REWARD, done, INFO = env.step(1)   # Another Sequence is still Simulated
+    assert BACKEND.SOLVES == 2*(1 + 3)
@@ -0,0 +1,30 @@
+#################################################################################################################
+# A whole Reactor Sequence evaluated with one solve is tested against stepping the same actions one by one.
+import io
+import contextlib
+import pytest
+from SimulationEnv import Simulator
+from KineticModel import IsomerisationModel
+#################################################################################################################
+
+# STEP 1. The same Conversions and Rewards as stepping, and a clear error for a Sequence of no or too many actions.
+
+
+def test_Sequence_Matches_Steps():
+    ACTIONS = [0, 1, 1, 0]
+    env = Simulator(IsomerisationModel())
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        REWARDS = [env.step(action)[1] for action in ACTIONS]
+        CONVERSIONS = env.CONVERSION_LIST[1:]
+        RESULT = Simulator(IsomerisationModel()).evaluate_sequence(ACTIONS)
+    assert RESULT["CONVERSIONS"] == pytest.approx(CONVERSIONS)
+    assert RESULT["REWARDS"] == pytest.approx(REWARDS)
+    assert len(RESULT["TRANSITIONS"]) == len(ACTIONS) and RESULT["TRANSITIONS"][-1][-1]
+
+
+@pytest.mark.parametrize("ACTIONS", [[], [0]*5])
+def test_Sequence_Length_Is_Checked(ACTIONS):
+    env = Simulator(IsomerisationModel())
+    with pytest.raises(ValueError):
+        env.evaluate_sequence(ACTIONS)
@@ -0,0 +1,143 @@
+#################################################################################################################
+# The "gym" is imported since it facilitates the creation of the Simulation Environement.
+from gym import spaces
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+# "Paths" puts the top of the repository on the Path, where the "Common" package of both Cases is.
+import Paths
+# The Backend drives the Flowsheet, either ASPEN+ itself or an in-process stand-in (see "KineticModel.py").
+from Common.AspenBackend import AspenPlus
+# Finished episodes are recorded in a compact NumPy Array instead of a growing Python list.
+from Common.Recorder import Recorder
+# The Topology gives the number of TCs and Reactors of the train.
+from Topology import Default_Topology
+#################################################################################################################
+
+# STEP 1. Initialise the Batch of Environements and Prerequisite Variables.
+# The BatchSimulator holds N independent episodes of "SimulationEnv2.py" as NumPy Arrays, and advances all of them
+# with one call of step(). Finished episodes are reset automatically, so reset() is only needed once.
+
+
+class BatchSimulator:
+    # Any Backend can be passed (Eg. KineticModel.ConverterModel()), by default the ASPEN+ File is opened.
+    def __init__(self, N_ENVS, BACKEND=None, TOPOLOGY=None):
+        self.PATH = 'C:/Users/s2199718/Desktop/Second Case Example/AspenSimulation/SimulationCaseFile.bkp'
+        if BACKEND is None:
+            BACKEND = AspenPlus(self.PATH, EARLY_BINDING=True)
+        self.BACKEND = BACKEND  # Opened at the first reset
+        self.N_ENVS = N_ENVS
+        self.TOPOLOGY = TOPOLOGY or Default_Topology()
+
+        ## We define the variables needed for the DQNAgent (for a single Environement)
+        self.action_space = spaces.Discrete(5)  # [MOVE, +5, -5, +10, -10]
+        # [CONVERSION, TC1-TC4 / 600]
+        self.observation_space = spaces.Box(low=0, high=1, shape=(1 + self.TOPOLOGY.N_STAGES,))
+        self.TEMP_CHANGE = np.array([0, 5, -5, 10, -10]) # Temperature Change of every action [K]
+
+        ## We define the variables needed for the Simulation
+        self.CHEM = ["SO2", "SO3", "O2", "N2"] # Names of the Chemicals
+        self.IN_FLOW = [16.7878, 0, 23.0833, 169.977]  # Initial Flowrates [kmol/s]
+        self.TEMP_CHANGER = self.TOPOLOGY.Names("TEMP_CHANGER")
+        self.N_REACTORS = self.TOPOLOGY.N_STAGES
+        self.T_IN = 350
+        self.T_max = 600
+        self.T_min = 300
+        self.CLAMP_PENALTY = -1 # Reward when a Temperature Change is clamped to [T_min, T_max]
+
+        ## The State of every episode is kept in one Array per variable
+        self.CONVERSION = np.zeros(N_ENVS)  # Last Conversion reached (CONVERSION_LIST[-1])
+        self.TEMPS = np.full((N_ENVS, self.N_REACTORS), float(self.T_IN)) # TC1-TC4 Temperatures [K]
+        self.N_STEPS = np.zeros(N_ENVS, dtype=int)  # Reactors passed in the episode
+        self.DONE = np.zeros(N_ENVS, dtype=bool)
+        self.STATE = self.Get_State(self.CONVERSION)
+
+        ## Results over all episodes, like in "SimulationEnv2.py"
+        self.DONE_COUNTER = 0
+        self.MAX_CONVERSION = 0
+        self.BEST_CASE = []
+        self.EPISODES = Recorder([("EPISODE", "i4"), ("CONVERSION", "f4"), ("TEMPS", "f4", (self.N_REACTORS,))])
+
+#################################################################################################################
+
+# STEP 2. Implement the Step function for the whole Batch
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        CONVERSION_STATE = self.CONVERSION.copy()   # The State shows the Conversion before this step's move
+        REWARD = np.zeros(self.N_ENVS)
+
+        ## Temperature Changes act on the TC in front of the next Reactor, clamped to [T_min, T_max]
+        ROWS = np.nonzero(actions != 0)[0]
+        STAGE = self.N_STEPS[ROWS]
+        new_temp = self.TEMPS[ROWS, STAGE] + self.TEMP_CHANGE[actions[ROWS]]
+        CLAMPED = (new_temp > self.T_max) | (new_temp < self.T_min)
+        self.TEMPS[ROWS, STAGE] = np.clip(new_temp, self.T_min, self.T_max)
+        REWARD[ROWS] = np.where(CLAMPED, self.CLAMP_PENALTY, 0)
+
+        ## Moving to the next Reactor solves the Flowsheet of every moving episode at once
+        ROWS = np.nonzero(actions == 0)[0]
+        self.N_STEPS[ROWS] += 1
+        REACTANT_OUTPUT = self.Get_Batch_Output(self.TEMPS[ROWS], self.N_STEPS[ROWS])
+        CONVERSION = (self.IN_FLOW[0] - REACTANT_OUTPUT)/self.IN_FLOW[0]
+        REWARD[ROWS] = CONVERSION - self.CONVERSION[ROWS]
+        self.CONVERSION[ROWS] = CONVERSION
+
+        self.STATE = self.Get_State(CONVERSION_STATE)
+        self.DONE = self.N_STEPS == self.N_REACTORS
+        FINAL_STATE = self.STATE.copy()
+        if self.DONE.any():
+            self.Finish_Episodes(self.DONE)
+        return self.STATE, REWARD, self.DONE.copy(), {"FINAL_STATE": FINAL_STATE}
+
+##################################################################################################################
+
+# STEP 3. Define the Reset Function for the Batch.
+
+    def reset(self):
+        self.BACKEND.Ensure_Open()
+        self.Reset_Episodes(np.ones(self.N_ENVS, dtype=bool))
+        return self.STATE
+
+##################################################################################################################
+
+# STEP 4. Implement all Auxiliary Functions that are needed for the previous steps.
+
+# STEP 4.1. Stack the Conversion and the normalised TC Temperatures
+    def Get_State(self, CONVERSION_STATE):
+        return np.column_stack((CONVERSION_STATE, self.TEMPS/600))
+
+# STEP 4.2. Get the Output [kmol/s] of Reactant after Reactor STAGES[i] for every row of TEMPS
+    def Get_Batch_Output(self, TEMPS, STAGES):
+        if hasattr(self.BACKEND, "Run_Batch"): # Vectorised Backends solve all rows in one call
+            return self.BACKEND.Run_Batch(TEMPS, STAGES)[:, 0]
+        # An ASPEN+ Document holds one Flowsheet at a time, so the rows are solved one after the other
+        REAC_OUT = np.zeros(len(STAGES))
+        for i in range(len(STAGES)):
+            for j in range(self.N_REACTORS):
+                self.BACKEND.Set_Temp(self.TEMP_CHANGER[j], TEMPS[i, j])
+            self.BACKEND.Run()
+            REAC_OUT[i] = self.BACKEND.Get_Output(self.TOPOLOGY.Name("OUTPUT", STAGES[i] - 1), self.CHEM[0])
+        return REAC_OUT
+
+# STEP 4.3. Keep Track of the finished episodes and of the Best Solutions, then reset them
+    def Finish_Episodes(self, DONE):
+        FINISHED = self.CONVERSION[DONE]
+        self.EPISODES.Extend(EPISODE=self.DONE_COUNTER + np.arange(len(FINISHED)), CONVERSION=FINISHED,
+                             TEMPS=self.TEMPS[DONE])
+        BEST = np.argmax(FINISHED)
+        if FINISHED[BEST] > self.MAX_CONVERSION:
+            self.MAX_CONVERSION = float(FINISHED[BEST])
+            TC_Temp_End = self.TEMPS[DONE][BEST].tolist()
+            self.BEST_CASE.append([TC_Temp_End, self.MAX_CONVERSION, self.DONE_COUNTER + int(BEST)])
+        self.DONE_COUNTER += len(FINISHED)
+        self.Reset_Episodes(DONE)
+
+    @property
+    def CONVERSION_MATRIX(self):
+        return self.EPISODES.View()["CONVERSION"]
+
+    def Reset_Episodes(self, ROWS):
+        self.CONVERSION[ROWS] = 0
+        self.TEMPS[ROWS] = self.T_IN
+        self.N_STEPS[ROWS] = 0
+        self.STATE[ROWS] = self.Get_State(self.CONVERSION)[ROWS]
@@ -0,0 +1,145 @@
+#################################################################################################################
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+# "Paths" puts the top of the repository on the Path, where the "Common" package of both Cases is.
+import Paths
+# The Backend Interface that the stand-in has to implement.
+from Common.AspenBackend import Backend
+#################################################################################################################
+
+# STEP 1. Define the In-Process Stand-In for the SimulationCaseFile Flowsheet.
+# The SO2 Converter is a train of 4 Reactors (R1-R4), each fed through a Temperature Changer (TC1-TC4):
+#   FEED -> TC1 -> R1 -> S1OUT -> TC2 -> R2 -> S2OUT -> TC3 -> R3 -> S3OUT -> TC4 -> R4 -> S4OUT
+# Every Reactor is an isothermal PFR at the outlet Temperature of its TC, solving SO2 + 1/2 O2 <-> SO3.
+# Run() only integrates the Reactors downstream of the first TC that changed, the Outlets of the unchanged Reactors
+# in front of it are kept from the last Run (WARM_START=False integrates the whole train every time).
+# It runs on any Operating System and is used for cheap pre-training and testing.
+# With a Topology (Eg. ConverterModel(TOPOLOGY=Default_Topology(8))) it solves a train of any number of Reactors.
+
+
+class ConverterModel(Backend):
+    CHEM = ["SO2", "SO3", "O2", "N2"] # Names of the Chemicals
+    NU = np.array([-1, 1, -0.5, 0])  # Stoichiometry of SO2 + 1/2 O2 -> SO3
+    IN_FLOW = [16.7878, 0, 23.0833, 169.977]  # Feed Flowrates [kmol/s]
+    TEMP_CHANGER = ["TC1", "TC2", "TC3", "TC4", "TC5", "TC6"]
+    N_REACTORS = 4
+    REACTORS = ["R1", "R2", "R3", "R4"]
+    OUTLETS = ["S1OUT", "S2OUT", "S3OUT", "S4OUT"]  # Outlet Stream of every Reactor
+    FEED = "FEED"
+    T_REF = 600 # Reference Temperature of the Kinetic Constants [K]
+    K_REF = 9   # Equilibrium Constant at T_REF [1/sqrt(bar)]
+    DH_R = 11800    # -Heat of Reaction / R [K], the Reaction is Exothermic
+    DA_REF = 20 # Damkohler Number of a Reactor at T_REF
+    EA_R = 6000 # Activation Energy / R [K]
+    N_SEGMENTS = 20 # Number of RK4 steps along every PFR
+    # A screening solve integrates every PFR with 5 RK4 steps, 4 times cheaper and within 0.001 of the full Conversion
+    FIDELITIES = ("FULL", "SCREEN")
+    FIDELITY_SEGMENTS = {"FULL": N_SEGMENTS, "SCREEN": 5}
+    COUNTERS = ("REACTOR_SOLVES",)
+
+    def __init__(self, T_IN=350, WARM_START=True, TOPOLOGY=None):
+        if TOPOLOGY is not None:
+            self.N_REACTORS = TOPOLOGY.N_STAGES
+            self.TEMP_CHANGER = TOPOLOGY.Names("TEMP_CHANGER")
+            self.REACTORS = TOPOLOGY.Names("REACTOR")
+            self.OUTLETS = TOPOLOGY.Names("OUTPUT")
+            self.FEED = TOPOLOGY.FEED
+        self.T_IN = T_IN
+        self.WARM_START = WARM_START
+        self.TEMPS = {}     # Temperature Changer Name -> Outlet Temperature [K]
+        self.RESULTS = {}   # Stream Name -> MOLEFLOW Array [kmol/s] after the last Run
+        self.SOLVED = 0     # Number of Reactors (from the Feed on) whose RESULTS are still valid
+        self.REACTOR_SOLVES = 0 # Number of Reactors integrated by Run
+
+# STEP 1.1. Opening the Stand-In gives the Flowsheet as it is stored in the ".bkp" File
+    def Open(self):
+        self.TEMPS = dict.fromkeys(self.TEMP_CHANGER, self.T_IN)
+        self.RESULTS = {}
+        self.Set_Fidelity("FULL")
+        self.SOLVED = 0
+
+    def Close(self):
+        pass
+
+# STEP 1.2. Solve the Reactor Train one Reactor after the other, starting from the Outlet of the last valid Reactor
+    def Run(self):
+        if not self.WARM_START:
+            self.SOLVED = 0
+        if self.SOLVED == 0:
+            self.RESULTS = {self.FEED: np.array(self.IN_FLOW, dtype=float)}
+        FLOW = self.RESULTS[self.FEED if self.SOLVED == 0 else self.OUTLETS[self.SOLVED - 1]]
+        for i in range(self.SOLVED, self.N_REACTORS):
+            FLOW = self.React(FLOW, self.TEMPS[self.TEMP_CHANGER[i]])
+            self.RESULTS[self.OUTLETS[i]] = FLOW
+        self.REACTOR_SOLVES += self.N_REACTORS - self.SOLVED
+        self.SOLVED = self.N_REACTORS
+
+# The Outlets solved at the other Fidelity are stale, so the next Run integrates the whole train
+    def Set_Fidelity(self, FIDELITY):
+        if FIDELITY != self.FIDELITY:
+            self.SOLVED = 0
+        self.FIDELITY = FIDELITY
+        self.N_SEGMENTS = self.FIDELITY_SEGMENTS[FIDELITY]
+
+    def Run_Downstream(self, Names_BLK):
+        # TC(i+1) and R(i+1) are both in front of Reactor i, everything from there on is solved again
+        for Name_BLK in Names_BLK:
+            if Name_BLK in self.TEMP_CHANGER[:self.N_REACTORS]:
+                self.SOLVED = min(self.SOLVED, self.TEMP_CHANGER.index(Name_BLK))
+            elif Name_BLK in self.REACTORS:
+                self.SOLVED = min(self.SOLVED, self.REACTORS.index(Name_BLK))
+        self.Run()
+
+# STEP 1.3. Isothermal PFR, integrated with RK4 for the Extent of Reaction over the dimensionless Reactor Length
+# FLOW has shape (..., 4) and TEMP shape (...), so many Reactors can be integrated in one call.
+# A single Reactor is integrated with plain Python floats, which is much faster than 0-d NumPy Arrays.
+    def React(self, FLOW, TEMP):
+        FLOW = np.asarray(FLOW, dtype=float)
+        if FLOW.ndim == 1:
+            SO2, SO3, O2, N2 = (float(F) for F in FLOW)
+            TEMP = float(TEMP)
+        else:
+            SO2, SO3, O2, N2 = FLOW[..., 0], FLOW[..., 1], FLOW[..., 2], FLOW[..., 3]
+            TEMP = np.asarray(TEMP, dtype=float)
+        K_EQ = self.K_REF*np.exp(self.DH_R*(1/TEMP - 1/self.T_REF))
+        DA = self.DA_REF*np.exp(-self.EA_R*(1/TEMP - 1/self.T_REF))
+        F_TOT = SO2 + SO3 + O2 + N2
+        H = 1/self.N_SEGMENTS
+
+        def RATE(EXTENT):
+            O2_OUT = O2 - EXTENT/2
+            O2_FRACTION = (O2_OUT + abs(O2_OUT))/(2*(F_TOT - EXTENT/2))    # Never below 0
+            return DA*((SO2 - EXTENT)*O2_FRACTION**0.5 - (SO3 + EXTENT)/K_EQ)
+
+        EXTENT = 0*SO2
+        for _ in range(self.N_SEGMENTS):
+            K1 = RATE(EXTENT)
+            K2 = RATE(EXTENT + H/2*K1)
+            K3 = RATE(EXTENT + H/2*K2)
+            K4 = RATE(EXTENT + H*K3)
+            EXTENT = EXTENT + H/6*(K1 + 2*K2 + 2*K3 + K4)
+        return FLOW + np.asarray(EXTENT)[..., None]*self.NU
+
+# STEP 1.4. Read the Output [kmol/s] of a Chemical in a Stream
+    def Get_Output(self, Name_STRM, Name_CHEM):
+        return float(self.RESULTS[Name_STRM][self.CHEM.index(Name_CHEM)])
+
+# STEP 1.5. Read and Write the Temperature [K] of a Temperature Changer
+    def Get_Temp(self, Name_BLK):
+        return self.TEMPS[Name_BLK]
+
+    def Set_Temp(self, Name_BLK, Temperature):
+        if Name_BLK in self.TEMP_CHANGER[:self.N_REACTORS] and self.TEMPS[Name_BLK] != Temperature:
+            self.SOLVED = min(self.SOLVED, self.TEMP_CHANGER.index(Name_BLK))   # Reactors from here on are stale
+        self.TEMPS[Name_BLK] = Temperature
+
+# STEP 1.6. Solve many Flowsheets in one call, row i is solved up to Reactor STAGES[i] with the Temperatures TEMPS[i]
+# The loop runs over the Reactors of the train, never over the Flowsheets. Returns the MOLEFLOW Array of every row.
+    def Run_Batch(self, TEMPS, STAGES):
+        TEMPS = np.asarray(TEMPS, dtype=float)
+        STAGES = np.asarray(STAGES)
+        FLOW = np.tile(np.asarray(self.IN_FLOW, dtype=float), (len(STAGES), 1))
+        for i in range(STAGES.max(initial=0)):
+            ACTIVE = STAGES > i
+            FLOW[ACTIVE] = self.React(FLOW[ACTIVE], TEMPS[ACTIVE, i])
+        return FLOW
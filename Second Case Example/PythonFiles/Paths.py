@@ -0,0 +1,11 @@
+#################################################################################################################
+# The "os" and "sys" libraries put the top of the repository on the Path of Python, so the modules both Cases share
+# are imported from the "Common" package, Eg. "from Common.ResultCache import ResultCache". Importing this module is
+# enough, Eg. "import Paths" at the top of a module or a notebook of this Case.
+import os
+import sys
+#################################################################################################################
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -0,0 +1,66 @@
+#################################################################################################################
+# The Planner drives the same Simulator (and so the same Backend, Cache and Store) as the DQNAgent.
+from SimulationEnv2 import Simulator
+#################################################################################################################
+
+# STEP 1. Evaluate a Prefix of TC Temperatures, Eg. (560, 530) = TC1 at 560 K and TC2 at 530 K, and return the
+# Conversion at the Outlet of its last Reactor. Only the TCs that differ from the Flowsheet are written.
+
+
+def Evaluate_Prefix(env, PREFIX):
+    for i, TEMP in enumerate(PREFIX):
+        if env.TC_TEMP.get(env.TEMP_CHANGER[i]) != TEMP:
+            env.RESET_TEMP(env.TEMP_CHANGER[i], TEMP)
+    env.N_STEPS = len(PREFIX)
+    env.Name_BLK_Output = env.TOPOLOGY.Name("OUTPUT", env.N_STEPS - 1)
+    REACTANT_OUTPUT = env.Evaluate(env.Get_Configuration())
+    if REACTANT_OUTPUT is None:
+        return float("-inf")    # It did not converge, so the Prefix is never kept
+    return env.Get_Conversion(REACTANT_OUTPUT)
+
+#################################################################################################################
+
+# STEP 2. Search the TC Temperatures stage by stage, extending every kept Prefix by every Temperature of the lattice.
+# The Outlet of a Reactor only depends on the Temperatures in front of it, so every Prefix is Simulated once (and is
+# shared with the DQNAgent through the Cache and the Store).
+# With a single Reaction and a fixed Feed, the Flowsheet after a Prefix is fully described by its Conversion, and a
+# higher inlet Conversion never gives a lower outlet Conversion. So only the KEEP best Prefixes of every stage have to
+# be extended: KEEP=1 is exact for this Flowsheet and needs 4 x 61 Evaluations on the 5 K lattice, where
+# KEEP=None would enumerate all 61^4 = 13.8 million Configurations.
+
+
+def Plan(env, TEMPS=None, N_STAGES=None, KEEP=1):
+    if N_STAGES is None:
+        N_STAGES = env.TOPOLOGY.N_STAGES
+    if TEMPS is None:
+        TEMPS = range(env.T_min, env.T_max + 1, 5)    # The Temperatures the DQNAgent can reach from T_IN
+    SIMULATIONS = env.N_SIMULATIONS
+    env.reset()
+    PREFIXES = [()]
+    N_PREFIXES = 0
+    for STAGE in range(N_STAGES):
+        SCORED = []
+        for PREFIX in PREFIXES:
+            for TEMP in TEMPS:
+                SCORED.append((Evaluate_Prefix(env, PREFIX + (TEMP,)), PREFIX + (TEMP,)))
+        N_PREFIXES += len(SCORED)
+        SCORED.sort(key=lambda SCORE: SCORE[0], reverse=True)
+        PREFIXES = [PREFIX for CONVERSION, PREFIX in SCORED[:KEEP]]
+    CONVERSION, CONFIGURATION = SCORED[0]
+    env.reset()
+    return {"CONFIGURATION": list(CONFIGURATION),
+            "CONVERSION": float(CONVERSION),
+            "EVALUATIONS": env.N_SIMULATIONS - SIMULATIONS,    # Flowsheet Simulations spent
+            "PREFIXES": N_PREFIXES}
+
+# STEP 3. Ground Truth of the SimulationCaseFile Flowsheet, Eg. compared with the BEST_CASE the DQNAgent found
+
+
+if __name__ == "__main__":
+    import sys
+    if "--stand-in" in sys.argv:
+        from KineticModel import ConverterModel
+        env = Simulator(ConverterModel())
+    else:
+        env = Simulator()
+    print(Plan(env))
@@ -1,32 +1,115 @@
 #################################################################################################################
-# The "os" library is used to direct Python to the location of the ASPEN File.
-import os
-# The "win32com.client" library is used as an alternative to VBA  for the communication between ASPEN+ and Python.
-import win32com.client as win32
+# The "time" library is used to measure how long every Simulation takes.
+import time
 # The "gym" is imported since it facilitates the creation of the Simulation Environement.
 from gym import Env, spaces
 # "Numpy" is used as a mathematical extention to Python.
 import numpy as np
+# "Paths" puts the top of the repository on the Path, where the "Common" package of both Cases is.
+import Paths
+# The Backend drives the Flowsheet, either ASPEN+ itself or an in-process stand-in (see "KineticModel.py").
+from Common.AspenBackend import AspenPlus
+# Flowsheet Results are cached, so TC Temperatures that were already solved are not Simulated again.
+from Common.ResultCache import ResultCache
+# The Restart Policy decides, from measured signals, when the Flowsheet is rolled back or restarted.
+from Common.RestartPolicy import RestartPolicy
+# step_async/step_wait let the training loop work while the Flowsheet is solved.
+from Common.AsyncEnv import AsyncEnv
+# Episodes and steps are recorded in compact NumPy Arrays instead of growing Python lists.
+from Common.Recorder import Recorder
+# The Topology generates the Block and Stream Names for any number of stages.
+from Topology import Default_Topology
+# The Evaluations in a Store are kept apart per Backend and Topology.
+from Common.ResultStore import Get_Source
+# Finished episodes are streamed to a binary File by a background writer, instead of being printed.
+from Common.Metrics import MetricsSink
 #################################################################################################################
 
 # STEP 1. Initialise Environement and Prerequisite Variables.
 
 
-class Simulator(Env):
+class Simulator(Env, AsyncEnv):
+    PATH = 'C:/Users/s2199718/Desktop/Second Case Example/AspenSimulation/SimulationCaseFile.bkp'
+    SCREEN_SAMPLE = 0.05    # Share of the screened Reactors that are also solved at full Fidelity
     # The "__init__" function is used to provide the simulation all the variables it needs to initialise.
-    def __init__(self):
-        self.PATH = 'C:/Users/s2199718/Desktop/Second Case Example/AspenSimulation/SimulationCaseFile.bkp'
-        # We define the document type of the Aspen+ File.
-        self.AspenSimulation = win32.gencache.EnsureDispatch("Apwn.Document")
-        self.AspenSimulation.InitFromArchive2(os.path.abspath(self.PATH))    # Path to File
-        self.AspenSimulation.Visible = False    # Not opening the Simulation expedites training
+    # Any Backend can be passed (Eg. KineticModel.ConverterModel()), by default the ASPEN+ File is opened.
+    # A ResultCache (Eg. ResultCache(PATH="Cache.pkl") to keep it between sessions) can be shared by several Simulators.
+    # A ResultStore (Eg. ResultStore("Results.db")) records every Simulation and episode, and is shared between runs.
+    # A RestartPolicy (Eg. RestartPolicy(MAX_MEMORY=2e9)) replaces the hard restart of ASPEN+ every 100 Cycles.
+    # A Surrogate (Eg. Surrogate(SCALE=IN_FLOW[0])) answers the steps it is sure about without Simulating them.
+    # A Profiler (Eg. Profiler(LOG_EVERY=1000), from Common.Profiler) times every phase, see get_stats(). Without one
+    # nothing is timed.
+    # With a RECORD_PATH (Eg. "Run1") the Recorders are the memory-mapped Files Run1_Episodes.dat and Run1_Steps.dat.
+    # A Topology (Eg. Default_Topology(8), or Topology.Load("Train.json")) sets the number of stages of the train.
+    # A DocumentPool (Eg. DocumentPool(lambda: AspenPlus(PATH), SIZE=4), from Common.DocumentPool) gives an open
+    # Document, close() hands it back.
+    # Without one the Document is only opened at the first reset, so making a Simulator is fast.
+    # With CONTINUOUS=True one action sets all TC Temperatures [K] and solves the whole train, see Step_Setpoints.
+    # With a METRICS_PATH (Eg. "Run1_Metrics.dat") every finished episode is streamed to that File (see "Metrics.py")
+    # instead of being printed. The File is emptied first, with METRICS_APPEND=True (Eg. for a run resumed from a
+    # Checkpoint) it is appended to.
+    # With a SCREEN_MARGIN (Eg. 0.01) and a Backend that has a "SCREEN" Fidelity, the Reactors in front of the last two
+    # are first solved cheaply, and only solved again at full Fidelity when they come within SCREEN_MARGIN of the best
+    # full Fidelity Conversion found at the same stage (see Screen). The last two Reactors, whose Conversions make the
+    # terminal Reward, are always solved at full Fidelity. A random SCREEN_SAMPLE of the screened Reactors is solved at
+    # full Fidelity too, to measure the error of the screening solves (see get_fidelity_stats).
+    def __init__(self, BACKEND=None, CACHE=None, STORE=None, RESTART_POLICY=None, SURROGATE=None, RECORD_PATH=None,
+                 PROFILER=None, TOPOLOGY=None, POOL=None, CONTINUOUS=False, METRICS_PATH=None, SCREEN_MARGIN=None,
+                 METRICS_APPEND=False):
+        self.POOL = POOL
+        self.POOLED = None  # The Backend checked out of the POOL, handed back by close()
+        if BACKEND is None and POOL is not None:
+            BACKEND = self.POOLED = POOL.Checkout()
+        if BACKEND is None:
+            BACKEND = AspenPlus(self.PATH, EARLY_BINDING=True)
+        self.BACKEND = BACKEND  # Opened at the first reset
+        if CACHE is None:
+            CACHE = ResultCache()
+        self.CACHE = CACHE
+        self.STORE = STORE
+        if RESTART_POLICY is None:
+            RESTART_POLICY = RestartPolicy()
+        self.RESTART_POLICY = RESTART_POLICY
+        self.SNAPSHOT = None # Converged Flowsheet at the start of a Cycle, taken at the first reset
+        self.N_SIMULATIONS = 0 # Evaluations that had to be Simulated (missed the Cache and the Store)
+        self.SURROGATE = SURROGATE
+        self.SCREEN_MARGIN = SCREEN_MARGIN
+        self.SCREENING = SCREEN_MARGIN is not None and "SCREEN" in BACKEND.FIDELITIES
+        self.SCREEN_CACHE = ResultCache()   # Screened Outlets, kept apart so they never stand in for a full solve
+        self.FIDELITY_SOLVES = {"SCREEN": 0, "FULL": 0} # Solves and their time [s] at every Fidelity
+        self.FIDELITY_SECONDS = {"SCREEN": 0.0, "FULL": 0.0}
+        self.ESCALATIONS = 0    # Screened Configurations that came within SCREEN_MARGIN, and were solved at full Fidelity
+        self.STAGE_BEST = {}    # Best full Fidelity Conversion found at every stage, Eg. {1: 0.41, 2: 0.63}
+        self.SCREEN_RNG = np.random.default_rng(0)  # Draws the SCREEN_SAMPLE
+        self.SCREEN_ERRORS = []  # |Screened - Full| Conversion of every Configuration of the SCREEN_SAMPLE
+        if TOPOLOGY is None:
+            TOPOLOGY = Default_Topology()
+        self.TOPOLOGY = TOPOLOGY
+        self.SOURCE = Get_Source(BACKEND, TOPOLOGY) # Only the Evaluations of this SOURCE are read from the Store
+        self.CACHE.Set_Source(self.SOURCE)  # And from the Cache
+        N_STAGES = TOPOLOGY.N_STAGES
+        self.EPISODE_DTYPE = [("EPISODE", "i4"), ("CONVERSION", "f4"), ("REWARD", "f4"), ("N_ACTIONS", "i4"),
+                              ("TEMPS", "f4", (N_STAGES,)), ("FAILED", "?")]
+        self.STEP_DTYPE = [("EPISODE", "i4"), ("ACTION", "i1"), ("CONVERSION", "f4"), ("REWARD", "f4"),
+                           ("TEMPS", "f4", (N_STAGES,))]
+        self.EPISODES = Recorder(self.EPISODE_DTYPE, PATH=RECORD_PATH and RECORD_PATH + "_Episodes.dat")
+        self.HISTORY = Recorder(self.STEP_DTYPE, PATH=RECORD_PATH and RECORD_PATH + "_Steps.dat")
+        self.METRIC_DTYPE = [("EPISODE", "i4"), ("CONVERSION", "f4"), ("REWARD", "f4"), ("TEMPS", "f4", (N_STAGES,)),
+                             ("SOLVE_SECONDS", "f4"), ("N_SIMULATIONS", "i4"), ("RESTORES", "i4"), ("RESTARTS", "i4"),
+                             ("FAILED", "?")]
+        self.METRICS = None
+        if METRICS_PATH is not None:
+            self.METRICS = MetricsSink(METRICS_PATH, self.METRIC_DTYPE, APPEND=METRICS_APPEND)
+        self.PROFILER = PROFILER
+        if PROFILER is not None:
+            PROFILER.Attach(self)   # Wraps step, reset, the timed phases and the Backend of this Simulator
 
         ## We define the variables needed for the DQNAgent
-        self.action_space = spaces.Discrete(5)  # The Agent has 2 options [CSTR, PFR]
-        self.observation_space = spaces.Box(low=0, high=1, shape=(5,))  # CONVERSION Ɐ [0, 1]
-        self.TEMP_CHANGER = ["TC1","TC2","TC3","TC4","TC5","TC6"]
+        self.action_space = spaces.Discrete(5)  # The Agent has 5 options [Move, +5, -5, +10, -10 K]
+        self.observation_space = spaces.Box(low=0, high=1, shape=(1 + N_STAGES,))  # CONVERSION Ɐ [0, 1], TC1-TCn
+        self.TEMP_CHANGER = TOPOLOGY.Names("TEMP_CHANGER") # Eg. ["TC1","TC2","TC3","TC4"]
         self.CONVERSION_LIST = [0]
-        self.Get_Input_Temp = np.array([350,350,350,350])/600
+        self.Get_Input_Temp = np.full(N_STAGES, 350)/600
         self.CONVERSION_STATE = np.array([int(self.CONVERSION_LIST[-1])])
         self.STATE = np.concatenate((self.CONVERSION_STATE,self.Get_Input_Temp))
         # The state of the Env equals to 0 at the start of the 
@@ -39,14 +122,27 @@ class Simulator(Env):
         self.T_IN = 350
         self.T_max = 600
         self.T_min = 300
+        self.CLAMP_PENALTY = -1 # Reward when a Temperature Change is clamped to [T_min, T_max]
+        self.TEMP_CHANGE = [0, 5, -5, 10, -10] # Temperature Change of every action [K], action 0 is the Move
+        self.CONTINUOUS = CONTINUOUS
+        if CONTINUOUS: # The Agent gives the Temperature of every TC at once, Eg. [560, 525, 510, 500]
+            self.action_space = spaces.Box(low=self.T_min, high=self.T_max, shape=(N_STAGES,))
         self.CHOICE_MEMORY = []  # All the choices made by the Agents
-        self.CHOICE_MATRIX = []
-        self.FEED_MEMORY = ["FEED"]   # The Feed Memory, used for connecting Streams to Blocks
-        self.Name_BLK_Output = "FEED"
+        self.FEED_MEMORY = [TOPOLOGY.FEED]   # The Feed Memory, used for connecting Streams to Blocks
+        self.Name_BLK_Output = TOPOLOGY.FEED
            # Short-term memory of Conversion at Block Output
         self.MAX_CONVERSION = 0 # The maximum reward is 0 at Initialisation
         self.BEST_CASE = []
-        self.CONVERSION_MATRIX = [] 
+        self.TC_TEMP = {}   # Last Temperature written to every TC (empty: unknown, Eg. after a restart)
+        self.RESET_WRITES_AVOIDED = 0   # TC Temperatures Reset_Temp did not have to write
+        self.DIRTY_STAGE = None # First stage whose TC changed since the last solve (None: the Flowsheet is solved)
+        self.SOLVES_AVOIDED = 0 # Temperature Changes that did not have to solve the Flowsheet
+        self.EPISODE_REWARD = 0 # Sum of the Rewards of the current Cycle
+        self.SOLVE_SECONDS = 0  # Time spent solving the Flowsheet in the current Cycle [s]
+        ## We define the variables needed when the Flowsheet does not converge
+        self.FAILURE_PENALTY = -1 # Reward of a Move whose TC Temperatures did not converge, which ends the episode
+        self.FAILED = set() # TC Temperatures that did not converge within the retry budget, never Simulated again
+        self.EPISODE_FAILED = False
 
         ## We define the Stream and Block Names
 
@@ -56,8 +152,11 @@ class Simulator(Env):
 # STEP 2. Implement the Step function for the Environement
 
     def step(self,action):
+        if self.CONTINUOUS:
+            return self.Step_Setpoints(action)
 
         ## First we need to update some variables 
+        START = time.perf_counter() # The Step Latency is measured for the Restart Policy
         self.Feed_Stream_Name = self.FEED_MEMORY[-1] # Defines the Input Name
         
         ## The Agent makes its Choice and The Simulation is Updated
@@ -65,7 +164,9 @@ class Simulator(Env):
 
         ## Calculate the Reward as a function of Conversion
         REWARD = self.REWARD_SIGNAL 
-        self.Get_Input_Temp = np.array(self.GET_FINAL_TEMP())/600
+        self.EPISODE_REWARD += REWARD
+        TEMPS = self.GET_FINAL_TEMP()
+        self.Get_Input_Temp = np.array(TEMPS)/600
         self.CONVERSION_STATE = np.array([self.CONVERSION_LIST[-1]])
         self.STATE = np.concatenate((self.CONVERSION_STATE,self.Get_Input_Temp))
         if action == 0:
@@ -73,37 +174,93 @@ class Simulator(Env):
             #print(self.CONVERSION_LIST)
         else:
             pass
+        self.HISTORY.Append(EPISODE=self.DONE_COUNTER, ACTION=action, CONVERSION=self.CONVERSION_LIST[-1],
+                            REWARD=REWARD, TEMPS=TEMPS)
 
         ## Checkpoint: Is the Cycle Done? What is the best Case?
-        if self.N_STEPS == 4: # Max Number of Reactors = 4
+        if self.N_STEPS == self.TOPOLOGY.N_STAGES or self.EPISODE_FAILED: # Max Number of Reactors, Eg. 4
             done = True 
-            self.CONVERSION_MATRIX.append(self.CONVERSION_LIST[-1])
-            self.CHOICE_MATRIX.append(self.CHOICE_MEMORY)
-            TC_Temp_End = self.GET_FINAL_TEMP()
-            FORM_CONV = "{:.2f}".format(self.CONVERSION_LIST[-1])
-            #print(f"CONV: {self.CONVERSION_LIST}")
-            print(f" TC_TEMP: [{TC_Temp_End}||{FORM_CONV}]")
-            ## Keep Track of the Best Solutions 
-            if self.CONVERSION_LIST[-1] > self.MAX_CONVERSION:
-                self.MAX_CONVERSION = self.CONVERSION_LIST[-1]
-                self.BEST_CASE.append([TC_Temp_End,self.MAX_CONVERSION,self.DONE_COUNTER])
-            else:
-                pass
-            ## To make the Simulation more light-weight we hard-Reset it every 100 Cycles.
-            if (self.DONE_COUNTER%100)==0:
-                self.AspenSimulation.Close()    # Close the Simulation
-                # Completely restart the simulation Like Step 1
-                self.AspenSimulation = win32.gencache.EnsureDispatch("Apwn.Document")
-                self.AspenSimulation.InitFromArchive2(os.path.abspath(self.PATH)) 
-                self.AspenSimulation.Visible = False
-                self.AspenSimulation.Engine.Run2()
-                #print(f"~ASPEN+ Restarted {self.DONE_COUNTER}~")
-            else:
-                pass
-            self.DONE_COUNTER += 1 # End of one Full Cycle
+            self.Finish_Episode(START)
         else:
             done = False 
-        return self.STATE, REWARD, done, {}
+            self.RESTART_POLICY.Record_Step(time.perf_counter() - START)
+        return self.STATE, REWARD, done, {"FAILED": True} if self.EPISODE_FAILED else {}
+
+# STEP 2.1. Record the finished Cycle, keep track of the best Case, and let the Restart Policy decide
+    def Finish_Episode(self, START):
+        TC_Temp_End = self.GET_FINAL_TEMP()
+        self.EPISODES.Append(EPISODE=self.DONE_COUNTER, CONVERSION=self.CONVERSION_LIST[-1],
+                             REWARD=self.EPISODE_REWARD, N_ACTIONS=len(self.CHOICE_MEMORY), TEMPS=TC_Temp_End,
+                             FAILED=self.EPISODE_FAILED)
+        FORM_CONV = "{:.2f}".format(self.CONVERSION_LIST[-1])
+        #print(f"CONV: {self.CONVERSION_LIST}")
+        if self.METRICS is None:
+            print(f" TC_TEMP: [{TC_Temp_End}||{FORM_CONV}]")
+        ## Keep Track of the Best Solutions 
+        if self.CONVERSION_LIST[-1] > self.MAX_CONVERSION and not self.EPISODE_FAILED:
+            self.MAX_CONVERSION = self.CONVERSION_LIST[-1]
+            self.BEST_CASE.append([TC_Temp_End,self.MAX_CONVERSION,self.DONE_COUNTER])
+        else:
+            pass
+        if self.STORE is not None and not self.EPISODE_FAILED:
+            self.STORE.Add_Episode(self.DONE_COUNTER, TC_Temp_End, self.CONVERSION_LIST[-1], self.EPISODE_REWARD)
+        ## To keep the Simulation light-weight the Restart Policy rolls it back, or restarts it, when needed.
+        self.RESTART_POLICY.Record_Step(time.perf_counter() - START)
+        DECISION = self.RESTART_POLICY.Decide(self.BACKEND.Get_Memory)
+        if DECISION == "restore" and self.SNAPSHOT is not None:
+            self.BACKEND.Restore(self.SNAPSHOT) # Roll back to the converged Flowsheet of the Snapshot
+            self.TC_TEMP = dict.fromkeys(self.TEMP_CHANGER, self.T_IN) # The Snapshot was taken at T_IN
+            self.DIRTY_STAGE = None
+            #print(f"~ASPEN+ Restored {self.DONE_COUNTER}~")
+        elif DECISION is not None:
+            self.BACKEND.Restart()  # Close and completely restart the simulation Like Step 1
+            self.TC_TEMP = {}   # The reloaded File may hold any Temperatures
+            self.DIRTY_STAGE = None # Restart() solves the reloaded File
+            self.SNAPSHOT = None # Taken again at the next reset
+            #print(f"~ASPEN+ Restarted {self.DONE_COUNTER}~")
+        else:
+            pass
+        if self.METRICS is not None:
+            self.METRICS.Push(EPISODE=self.DONE_COUNTER, CONVERSION=self.CONVERSION_LIST[-1],
+                              REWARD=self.EPISODE_REWARD, TEMPS=TC_Temp_End, SOLVE_SECONDS=self.SOLVE_SECONDS,
+                              N_SIMULATIONS=self.N_SIMULATIONS, RESTORES=self.RESTART_POLICY.N_RESTORES,
+                              RESTARTS=self.RESTART_POLICY.N_RESTARTS, FAILED=self.EPISODE_FAILED)
+        self.DONE_COUNTER += 1 # End of one Full Cycle
+
+# STEP 2.2. The continuous Step: all TC Temperatures are written in one operation, and the train is solved once.
+# The Reward is the one the Agent would have collected moving Reactor by Reactor with these Temperatures (the Move
+# Rewards of every Reactor, plus CLAMP_PENALTY for every Temperature outside [T_min, T_max]), and the episode is done.
+    def Step_Setpoints(self, action):
+        START = time.perf_counter() # The Step Latency is measured for the Restart Policy
+        TEMPS = np.asarray(action, dtype=float).reshape(-1)
+        PENALTY = self.CLAMP_PENALTY*int(np.sum((TEMPS > self.T_max) | (TEMPS < self.T_min)))
+        TEMPS = np.clip(TEMPS, self.T_min, self.T_max)
+        self.CHOICE_MEMORY.append(f"SET {self.TEMP_CHANGER} = {TEMPS.tolist()}")
+        CHANGED = {Name: float(T) for Name, T in zip(self.TEMP_CHANGER, TEMPS) if self.TC_TEMP.get(Name) != float(T)}
+        if CHANGED:
+            self.BACKEND.Set_Temps(CHANGED) # TC1-TCn in one operation
+            self.TC_TEMP.update(CHANGED)
+            self.Mark_Dirty(CHANGED)
+        self.N_STEPS = self.TOPOLOGY.N_STAGES
+        self.Name_BLK_Output = self.TOPOLOGY.Name("OUTPUT", self.N_STEPS - 1)
+        REWARD = PENALTY
+        REAC_OUTS = self.Evaluate_Train(tuple(round(float(T), 6) for T in TEMPS))
+        if REAC_OUTS is None: # The train did not converge within the retry budget
+            self.EPISODE_FAILED = True
+            REAC_OUTS = []
+            REWARD += self.FAILURE_PENALTY
+        for REAC_OUT in REAC_OUTS:
+            self.CONVERSION = self.Get_Conversion(REAC_OUT)
+            REWARD += self.Get_Move_Reward()
+            self.CONVERSION_LIST.append(self.CONVERSION)
+        self.EPISODE_REWARD += REWARD
+        self.Get_Input_Temp = TEMPS/600
+        self.CONVERSION_STATE = np.array([self.CONVERSION_LIST[-1]])
+        self.STATE = np.concatenate((self.CONVERSION_STATE,self.Get_Input_Temp))
+        self.HISTORY.Append(EPISODE=self.DONE_COUNTER, ACTION=-1, CONVERSION=self.CONVERSION_LIST[-1],
+                            REWARD=REWARD, TEMPS=TEMPS) # ACTION -1: all TC Temperatures set at once
+        self.Finish_Episode(START)
+        return self.STATE, REWARD, True, {"FAILED": True} if self.EPISODE_FAILED else {}
 
 ##################################################################################################################
 
@@ -114,62 +271,40 @@ class Simulator(Env):
         if action == 0: 
             self.CHOICE_MEMORY.append(f"MOVE {self.N_STEPS}->{self.N_STEPS+1}")
             self.N_STEPS += 1   # The Step counter is updated
-            self.Name_BLK = "R" + str(self.N_STEPS)  # Eg. Name_BLK = R1, R(Reactor)1(STEP)
-            self.Name_BLK_Input = "S"+str(self.N_STEPS)+"IN" # Preset Block Input Eg. S1AIN
-            self.Name_BLK_Output = "S" + str(self.N_STEPS)+ "OUT" # Preset Block Input Eg. S1AOUT
+            self.Name_BLK = self.TOPOLOGY.Name("REACTOR", self.N_STEPS - 1)  # Eg. Name_BLK = R1, R(Reactor)1(STEP)
+            self.Name_BLK_Input = self.TOPOLOGY.Name("INPUT", self.N_STEPS - 1) # Preset Block Input Eg. S1IN
+            self.Name_BLK_Output = self.TOPOLOGY.Name("OUTPUT", self.N_STEPS - 1) # Preset Block Output Eg. S1OUT
             self.FEED_MEMORY.append(self.Name_BLK_Output) # The Output of this step is the Input of the next.
-            self.AspenSimulation.Engine.Run2() # Run the ASPEN+ Simulation
-            ## Next the needed Simulation are acquired
-            self.REACTANT_OUTPUT = self.Get_Output(self.Name_BLK_Output) # Amount of Reactant at Blocks Output [kmol/s]
-            self.CONVERSION = self.Get_Conversion(self.REACTANT_OUTPUT) # Amount of Reactant Converted at Output [0, 1]
-            self.REWARD_SIGNAL = self.CONVERSION - self.CONVERSION_LIST[-1] 
-        elif action == 1:
-            self.CHOICE_MEMORY.append(f"T Change in {self.TEMP_CHANGER[self.N_STEPS]} + 5")
-            new_temp = self.CHANGE_TEMP(self.TEMP_CHANGER[self.N_STEPS],5)
-            PENALTY = 0
-            if new_temp > self.T_max:
-                self.RESET_TEMP(self.TEMP_CHANGER[self.N_STEPS],self.T_max)
-                PENALTY = - 1
+            ## Next the needed Simulation are acquired, TC Temperatures solved before are read from the Cache
+            CONFIGURATION = self.Get_Configuration()
+            self.REACTANT_OUTPUT = self.Evaluate(CONFIGURATION) # Amount of Reactant at Blocks Output [kmol/s]
+            if self.REACTANT_OUTPUT is None: # Did not converge within the retry budget, the episode ends here
+                self.EPISODE_FAILED = True
+                self.CONVERSION = self.CONVERSION_LIST[-1]
+                self.REWARD_SIGNAL = self.FAILURE_PENALTY
             else:
-                pass
-            self.AspenSimulation.Engine.Run2() # Run the ASPEN+ Simulation
-            self.CONVERSION = 0
-            self.REWARD_SIGNAL = PENALTY
-        elif action == 2:
-            self.CHOICE_MEMORY.append(f"T Change in {self.TEMP_CHANGER[self.N_STEPS]} - 5")
-            new_temp = self.CHANGE_TEMP(self.TEMP_CHANGER[self.N_STEPS],-5)
+                self.CONVERSION = self.Get_Conversion(self.REACTANT_OUTPUT) # Reactant Converted at Output [0, 1]
+                self.REWARD_SIGNAL = self.Get_Move_Reward()
+        else: # Temperature Changes: 1: +5, 2: -5, 3: +10, 4: -10 [K]
+            CHANGE = self.TEMP_CHANGE[action]
+            Name_TC = self.TEMP_CHANGER[self.N_STEPS]
+            self.CHOICE_MEMORY.append(f"T Change in {Name_TC} {'+' if CHANGE > 0 else '-'} {abs(CHANGE)}")
+            current_Temp = self.TC_TEMP.get(Name_TC)
+            if current_Temp is None: # Unknown, Eg. after a restart
+                current_Temp = self.BACKEND.Get_Temp(Name_TC)
+            new_temp = current_Temp + CHANGE
             PENALTY = 0
-            if new_temp < self.T_min:
-                self.RESET_TEMP(self.TEMP_CHANGER[self.N_STEPS],self.T_min)
-                PENALTY = - 1
+            if new_temp > self.T_max or new_temp < self.T_min:
+                new_temp = min(max(new_temp, self.T_min), self.T_max)
+                PENALTY = self.CLAMP_PENALTY
             else:
                 pass
-            self.AspenSimulation.Engine.Run2() # Run the ASPEN+ Simulation
-            self.CONVERSION = 0            
-            self.REWARD_SIGNAL = PENALTY
-        elif action == 3:
-            self.CHOICE_MEMORY.append(f"T Change in {self.TEMP_CHANGER[self.N_STEPS]} + 10")
-            new_temp = self.CHANGE_TEMP(self.TEMP_CHANGER[self.N_STEPS],+10)
-            PENALTY = 0
-            if new_temp < self.T_min:
-                self.RESET_TEMP(self.TEMP_CHANGER[self.N_STEPS],self.T_min)
-                PENALTY = - 1
+            if new_temp != current_Temp:
+                self.RESET_TEMP(Name_TC, new_temp) # Not solved here, the next Move solves from this stage on
             else:
                 pass
-            self.AspenSimulation.Engine.Run2() # Run the ASPEN+ Simulation
-            self.CONVERSION = 0            
-            self.REWARD_SIGNAL = PENALTY
-        elif action == 4:
-            self.CHOICE_MEMORY.append(f"T Change in {self.TEMP_CHANGER[self.N_STEPS]} - 10")
-            new_temp = self.CHANGE_TEMP(self.TEMP_CHANGER[self.N_STEPS],-10)
-            PENALTY = 0
-            if new_temp < self.T_min:
-                self.RESET_TEMP(self.TEMP_CHANGER[self.N_STEPS],self.T_min)
-                PENALTY = - 1
-            else:
-                pass
-            self.AspenSimulation.Engine.Run2() # Run the ASPEN+ Simulation
-            self.CONVERSION = 0            
+            self.SOLVES_AVOIDED += 1 # The Outlets of a Temperature Change are never read, so it is not solved
+            self.CONVERSION = 0
             self.REWARD_SIGNAL = PENALTY
 
 
@@ -180,19 +315,60 @@ class Simulator(Env):
 
     def reset(self):
         # Now all Variables that need to be reset Every Cycle are Reset
-        self.N_STEPS = 0    # reset the number of steps taken (inside a cycle (max=4))
+        self.N_STEPS = 0    # reset the number of steps taken (inside a cycle (max=N_STAGES))
         self.CHOICE_MEMORY = [] # reset the choice memory of the cycle
         self.CONVERSION_LIST = [0] # reset the convrsion list of the cycle
-        self.FEED_MEMORY = ["FEED"] # the first feed is set again to be S1
-        self.Name_BLK_Output = "FEED"
-        self.Get_Input_Temp = np.array([350,350,350,350])/600
+        self.FEED_MEMORY = [self.TOPOLOGY.FEED] # the first feed is set again to be S1
+        self.Name_BLK_Output = self.TOPOLOGY.FEED
+        self.Get_Input_Temp = np.full(self.TOPOLOGY.N_STAGES, 350)/600
         self.CONVERSION_STATE = np.array([0])
         self.STATE = np.concatenate((self.CONVERSION_STATE,self.Get_Input_Temp))
-        self.Reset_Temp()
+        self.BACKEND.Ensure_Open() # Open the Document at the first reset
+        if not self.CONTINUOUS or self.SNAPSHOT is None:
+            self.Reset_Temp() # A continuous Step writes every TC anyway
+        if self.SNAPSHOT is None:
+            self.BACKEND.Run() # Converge the Flowsheet at T_IN once, and keep it to roll back to
+            self.DIRTY_STAGE = None
+            self.SNAPSHOT = self.BACKEND.Snapshot()
         self.CONVERSION = 0
         self.REWARD_SIGNAL = 0 # Remake all the streams to how they were before
+        self.EPISODE_REWARD = 0
+        self.EPISODE_FAILED = False
+        self.SOLVE_SECONDS = 0
         return self.STATE 
 
+# STEP 4.1. The Conversion of every finished episode, read from the Recorder without copying it
+    @property
+    def CONVERSION_MATRIX(self):
+        return self.EPISODES.View()["CONVERSION"]
+
+# STEP 4.2. Timers, call counters and latency histograms of the Profiler (empty without one)
+    def get_stats(self):
+        if self.PROFILER is None:
+            return {}
+        return self.PROFILER.Get_Stats()
+
+# STEP 4.2.1. Solves and time per Fidelity, how many screened Configurations were escalated, and the Conversion error
+# of the screening solves, measured on the random SCREEN_SAMPLE (the escalated ones alone are the best, not a sample)
+    def get_fidelity_stats(self):
+        ERRORS = np.array(self.SCREEN_ERRORS)
+        return {"SOLVES": dict(self.FIDELITY_SOLVES), "SECONDS": dict(self.FIDELITY_SECONDS),
+                "ESCALATIONS": self.ESCALATIONS,
+                "SCREEN_ERROR": {"N": len(ERRORS), "MEAN": float(ERRORS.mean()) if len(ERRORS) else None,
+                                 "MAX": float(ERRORS.max()) if len(ERRORS) else None}}
+
+# STEP 4.3. Hand the Document back to the Pool, still open, for the next Simulator, and write the last Metrics and the
+# Cache (when it has a PATH), so the next session starts with every Result of this one
+    def close(self):
+        self.close_async()
+        if self.CACHE.PATH is not None:
+            self.CACHE.Save()
+        if self.METRICS is not None:
+            self.METRICS.Close()
+        if self.POOLED is not None:
+            self.POOL.Checkin(self.POOLED)
+            self.POOLED = None
+
 ##################################################################################################################
 
 # STEP 5. Implement all Auxiliary Functions that are needed for the previous steps.
@@ -201,7 +377,7 @@ class Simulator(Env):
 # STEP 5.1. Get the Output [kmol/s] of Reactant
     def Get_Output(self,Name_BLK_OUT):
         # We Navigate to the ASPEN Node containing the Value of the Output Streams
-        REAC_OUT = self.AspenSimulation.Tree.Elements("Data").Elements("Streams").Elements(Name_BLK_OUT).Elements("Output").Elements("MOLEFLOW").Elements("MIXED").Elements(self.CHEM[0]).Value
+        REAC_OUT = self.BACKEND.Get_Output(Name_BLK_OUT, self.CHEM[0])
         return REAC_OUT
 
 # STEP 5.2. Calculate the Conversion at the Output of Every Block
@@ -209,27 +385,195 @@ class Simulator(Env):
         CONV = (self.IN_FLOW[0] - REAC_OUT)/self.IN_FLOW[0]  # CONVERSION Ɐ [0, 1]
         return CONV
 
-# STEP 5.4. Define the Reset Streams Function
+# STEP 5.3. The Outlet of Reactor N_STEPS only depends on the Temperatures of the TCs in front of it
+    def Get_Configuration(self):
+        return tuple(round(float(T), 6) for T in self.GET_FINAL_TEMP()[:self.N_STEPS])
+
+# STEP 5.4. Calculate the Reward of moving to the next Reactor
+    def Get_Move_Reward(self):
+        return self.CONVERSION - self.CONVERSION_LIST[-1]
+
+# STEP 5.5. Define the Reset Streams Function
 
     def Reset_Temp(self):
-        self.BLK = self.AspenSimulation.Tree.Elements("Data").Elements("Blocks") # Find the ASPEN Node for all Streams
-        self.BLK.Elements(self.TEMP_CHANGER[0]).Elements("Input").Elements("TEMP").Value = self.T_IN
-        self.BLK.Elements(self.TEMP_CHANGER[1]).Elements("Input").Elements("TEMP").Value = self.T_IN
-        self.BLK.Elements(self.TEMP_CHANGER[2]).Elements("Input").Elements("TEMP").Value = self.T_IN
-        self.BLK.Elements(self.TEMP_CHANGER[3]).Elements("Input").Elements("TEMP").Value = self.T_IN
+        # Only the TCs that are not at T_IN already are written, TC1-TCn in one operation
+        CHANGED = {Name: self.T_IN for Name in self.TEMP_CHANGER if self.TC_TEMP.get(Name) != self.T_IN}
+        self.RESET_WRITES_AVOIDED += len(self.TEMP_CHANGER) - len(CHANGED)
+        if CHANGED:
+            self.BACKEND.Set_Temps(CHANGED)
+            self.TC_TEMP.update(CHANGED)
+            self.Mark_Dirty(CHANGED)
 
     def CHANGE_TEMP(self,Name_Temp_Changer,Temperature_Change):
-        current_Temp = self.BLK.Elements(Name_Temp_Changer).Elements("Input").Elements("TEMP").Value
+        current_Temp = self.BACKEND.Get_Temp(Name_Temp_Changer)
         new_Temp = current_Temp + Temperature_Change
-        self.BLK.Elements(Name_Temp_Changer).Elements("Input").Elements("TEMP").Value = new_Temp
+        self.BACKEND.Set_Temp(Name_Temp_Changer, new_Temp)
+        self.TC_TEMP[Name_Temp_Changer] = new_Temp
+        self.Mark_Dirty([Name_Temp_Changer])
         return new_Temp
     def RESET_TEMP(self,Name_Temp_Changer,Temperature):
-        self.BLK.Elements(Name_Temp_Changer).Elements("Input").Elements("TEMP").Value = Temperature
+        self.BACKEND.Set_Temp(Name_Temp_Changer, Temperature)
+        self.TC_TEMP[Name_Temp_Changer] = Temperature
+        self.Mark_Dirty([Name_Temp_Changer])
 
     def GET_FINAL_TEMP(self):
-        self.BLK = self.AspenSimulation.Tree.Elements("Data").Elements("Blocks")
-        T1 = self.BLK.Elements(self.TEMP_CHANGER[0]).Elements("Input").Elements("TEMP").Value
-        T2 =self.BLK.Elements(self.TEMP_CHANGER[1]).Elements("Input").Elements("TEMP").Value 
-        T3 = self.BLK.Elements(self.TEMP_CHANGER[2]).Elements("Input").Elements("TEMP").Value 
-        T4 =self.BLK.Elements(self.TEMP_CHANGER[3]).Elements("Input").Elements("TEMP").Value 
-        return [T1, T2, T3, T4 ]
\ No newline at end of file
+        # The Temperatures the Simulator wrote itself are known without a COM call, Eg. TC_TEMP is empty after a restart
+        TEMPS = [self.TC_TEMP.get(Name) for Name in self.TEMP_CHANGER]
+        if None in TEMPS:
+            return list(self.BACKEND.Get_Temps(self.TEMP_CHANGER)) # TC1-TCn in one operation
+        return TEMPS
+
+# STEP 5.5.1. A written TC Temperature is not solved: the Outlets of a Temperature Change are never read. The first stage whose TC
+# changed since the last solve is kept instead, and the next solve (of a Move) starts from there (see Solve).
+    def Mark_Dirty(self, Names_TC):
+        STAGE = min(self.TEMP_CHANGER.index(Name) for Name in Names_TC)
+        if self.DIRTY_STAGE is None or STAGE < self.DIRTY_STAGE:
+            self.DIRTY_STAGE = STAGE
+
+# STEP 5.5.2. The first TC changed since the last solve, and every TC and Reactor after it, Eg. [TC2, R2, TC3, R3, TC4,
+# R4]. Empty when nothing changed.
+    def Get_Downstream(self):
+        Names_BLK = []
+        if self.DIRTY_STAGE is None:
+            return Names_BLK
+        for i in range(self.DIRTY_STAGE, self.TOPOLOGY.N_STAGES):
+            Names_BLK += [self.TOPOLOGY.Name("TEMP_CHANGER", i), self.TOPOLOGY.Name("REACTOR", i)]
+        return Names_BLK
+
+# STEP 5.6. Evaluate TC Temperatures: first look them up in the Cache and in the Store, and only Simulate when both miss
+    def Evaluate(self, CONFIGURATION):
+        if CONFIGURATION in self.FAILED:
+            return None # It did not converge before, so it is not Simulated again
+        REAC_OUT = self.Look_Up(CONFIGURATION)
+        if REAC_OUT is None and self.SURROGATE is not None:
+            PREDICTION = self.SURROGATE.Get(len(CONFIGURATION), self.Get_Features(CONFIGURATION))
+            if PREDICTION is not None:
+                return PREDICTION # Not Cached, so a Simulation can still replace it later
+        SCREENED = None
+        if REAC_OUT is None and self.SCREENING and len(CONFIGURATION) < self.TOPOLOGY.N_STAGES - 1:
+            SCREENED = self.Screen(CONFIGURATION)
+            SAMPLED = self.SCREEN_RNG.random() < self.SCREEN_SAMPLE
+            ESCALATED = SCREENED is None or (self.Get_Conversion(SCREENED) + self.SCREEN_MARGIN
+                                             >= self.STAGE_BEST.get(len(CONFIGURATION), -np.inf))
+            if not ESCALATED and not SAMPLED:
+                return SCREENED # It can not beat the best of its stage, so it is not solved at full Fidelity (nor Cached)
+        if REAC_OUT is None:
+            START = time.perf_counter()
+            self.N_SIMULATIONS += 1
+            if not self.Solve(): # Run the ASPEN+ Simulation, and again only when it did not converge
+                self.FAILED.add(CONFIGURATION)
+                return None
+            REAC_OUT = self.Get_Output(self.Name_BLK_Output)
+            if SCREENED is not None:
+                self.ESCALATIONS += ESCALATED
+                if SAMPLED:
+                    self.SCREEN_ERRORS.append(abs(self.Get_Conversion(SCREENED) - self.Get_Conversion(REAC_OUT)))
+            if self.STORE is not None:
+                OUTLET = {Name_CHEM: self.BACKEND.Get_Output(self.Name_BLK_Output, Name_CHEM) for Name_CHEM in self.CHEM}
+                self.STORE.Put(CONFIGURATION, self.Name_BLK_Output, OUTLET, self.Get_Conversion(REAC_OUT),
+                               time.perf_counter() - START, self.SOURCE)
+            if self.SURROGATE is not None:
+                self.SURROGATE.Add(len(CONFIGURATION), self.Get_Features(CONFIGURATION), REAC_OUT)
+        if self.SCREENING:
+            STAGE = len(CONFIGURATION)
+            self.STAGE_BEST[STAGE] = max(self.STAGE_BEST.get(STAGE, -np.inf), self.Get_Conversion(REAC_OUT))
+        self.CACHE.Put(CONFIGURATION, REAC_OUT)
+        return REAC_OUT
+
+# STEP 5.6.1. Evaluate every Reactor of the train with at most one Simulation, for the continuous Step.
+# Every Prefix of CONFIGURATION is looked up as in Evaluate: the failed TC Temperatures, the Cache, the Store and the
+# Surrogate. When one still misses, the train is solved once, and the Outlets of all the Reactors are read in one
+# operation and Cached.
+    def Evaluate_Train(self, CONFIGURATION):
+        PREFIXES = [CONFIGURATION[:i+1] for i in range(len(CONFIGURATION))]
+        if any(PREFIX in self.FAILED for PREFIX in PREFIXES):
+            return None
+        REAC_OUTS = [self.Look_Up(PREFIX) for PREFIX in PREFIXES]
+        MISSING = [i for i, REAC_OUT in enumerate(REAC_OUTS) if REAC_OUT is None]
+        for PREFIX, REAC_OUT in zip(PREFIXES, REAC_OUTS):
+            if REAC_OUT is not None:
+                self.CACHE.Put(PREFIX, REAC_OUT)
+        if not MISSING:
+            return REAC_OUTS
+        if self.SURROGATE is not None:
+            PREDICTED = list(REAC_OUTS)
+            for i in MISSING:
+                PREDICTED[i] = self.SURROGATE.Get(i + 1, self.Get_Features(PREFIXES[i]))
+                if PREDICTED[i] is None:
+                    break
+            else:
+                return PREDICTED # Not Cached, so a Simulation can still replace them later
+        START = time.perf_counter()
+        self.N_SIMULATIONS += 1
+        if not self.Solve():
+            self.FAILED.add(CONFIGURATION)
+            return None
+        OUTLETS = self.TOPOLOGY.Names("OUTPUT")
+        CHEMS = self.CHEM if self.STORE is not None else self.CHEM[:1]
+        FLOWS = self.BACKEND.Get_Outputs([(Name_STRM, Name_CHEM) for Name_STRM in OUTLETS for Name_CHEM in CHEMS])
+        SECONDS = time.perf_counter() - START
+        for i, PREFIX in enumerate(PREFIXES):
+            OUTLET = dict(zip(CHEMS, FLOWS[i*len(CHEMS):(i + 1)*len(CHEMS)]))
+            REAC_OUTS[i] = OUTLET[self.CHEM[0]]
+            self.CACHE.Put(PREFIX, REAC_OUTS[i])
+            if i in MISSING:
+                if self.STORE is not None:
+                    self.STORE.Put(PREFIX, OUTLETS[i], OUTLET, self.Get_Conversion(REAC_OUTS[i]), SECONDS,
+                                   self.SOURCE)
+                if self.SURROGATE is not None:
+                    self.SURROGATE.Add(i + 1, self.Get_Features(PREFIX), REAC_OUTS[i])
+        return REAC_OUTS
+
+# STEP 5.6.2. Features of TC Temperatures for the Surrogate, in units of 100 K
+    def Get_Features(self, CONFIGURATION):
+        return [TEMP/100 for TEMP in CONFIGURATION]
+
+# STEP 5.6.3. Solve the Flowsheet, and re-run it only when it did not converge, within the budget of the Restart Policy
+# (MAX_RETRIES re-runs, SOLVE_TIMEOUT seconds per solve). Every failure counts towards a roll-back, and TC Temperatures
+# that used up their retries make the Restart Policy restart the Document at the end of the episode.
+# Only the Blocks from the first changed stage on are solved (see Get_Downstream), the ones in front keep their Outlets.
+    def Solve(self, FIDELITY="FULL"):
+        if self.SCREENING and FIDELITY != self.BACKEND.FIDELITY:
+            self.BACKEND.Set_Fidelity(FIDELITY)
+            self.DIRTY_STAGE = 0    # The Outlets solved at the other Fidelity are stale
+        START = time.perf_counter()
+        CONVERGED = False
+        for ATTEMPT in range(1 + self.RESTART_POLICY.MAX_RETRIES):
+            if self.BACKEND.Solve(self.RESTART_POLICY.SOLVE_TIMEOUT, self.Get_Downstream()):
+                CONVERGED = True
+                self.DIRTY_STAGE = None
+                break
+            self.RESTART_POLICY.Record_Failure()
+        else:
+            self.RESTART_POLICY.Record_Failed_Evaluation()
+        self.Count_Solve(FIDELITY, time.perf_counter() - START)
+        return CONVERGED
+
+    def Count_Solve(self, FIDELITY, SECONDS):
+        self.SOLVE_SECONDS += SECONDS
+        self.FIDELITY_SOLVES[FIDELITY] += 1
+        self.FIDELITY_SECONDS[FIDELITY] += SECONDS
+
+# STEP 5.6.4. Screen TC Temperatures: solve them at the "SCREEN" Fidelity, or read the Outlet of an earlier screening
+# solve. None when the screening solve did not converge, so the full solve decides whether they fail.
+    def Screen(self, CONFIGURATION):
+        REAC_OUT = self.SCREEN_CACHE.Get(CONFIGURATION)
+        if REAC_OUT is None:
+            self.N_SIMULATIONS += 1
+            if not self.Solve("SCREEN"):
+                return None
+            REAC_OUT = self.Get_Output(self.Name_BLK_Output)
+            self.SCREEN_CACHE.Put(CONFIGURATION, REAC_OUT)
+        return REAC_OUT
+
+# STEP 5.6.5. Look TC Temperatures up in the Cache, and then in the Store, whose Outlet is given to the Surrogate too.
+# None when both miss.
+    def Look_Up(self, CONFIGURATION):
+        REAC_OUT = self.CACHE.Get(CONFIGURATION)
+        if REAC_OUT is None and self.STORE is not None:
+            OUTLET = self.STORE.Get(CONFIGURATION, self.SOURCE)
+            if OUTLET is not None:
+                REAC_OUT = OUTLET[self.CHEM[0]]
+                if self.SURROGATE is not None:
+                    self.SURROGATE.Add(len(CONFIGURATION), self.Get_Features(CONFIGURATION), REAC_OUT)
+        return REAC_OUT
\ No newline at end of file
@@ -0,0 +1,46 @@
+#################################################################################################################
+# The "time" library is used to measure how long every step takes.
+import time
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+# The Simulation Environement and the in-process stand-in of the Flowsheet.
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+import Paths
+from Common.ResultCache import ResultCache
+#################################################################################################################
+
+# STEP 1. Step-Latency Benchmark of the warm-started Flowsheet.
+# The same random actions are played once with every Run solving the whole Reactor train, and once with only the
+# Reactors downstream of the changed TC being solved again. The Cache is switched off, so every step is Simulated.
+
+
+def Measure(WARM_START, N_STEPS=5000, SEED=0):
+    env = Simulator(ConverterModel(WARM_START=WARM_START), ResultCache(MAX_SIZE=0))
+    env.reset()
+    RNG = np.random.default_rng(SEED)
+    LATENCY = np.zeros(N_STEPS)
+    for i in range(N_STEPS):
+        START = time.perf_counter()
+        STATE, REWARD, done, INFO = env.step(int(RNG.integers(env.action_space.n)))
+        if done:
+            env.reset()
+        LATENCY[i] = time.perf_counter() - START
+    return {"WARM_START": WARM_START,
+            "MEAN [ms]": 1000*LATENCY.mean(),
+            "MEDIAN [ms]": 1000*np.median(LATENCY),
+            "P95 [ms]": 1000*np.percentile(LATENCY, 95),
+            "REACTORS PER STEP": env.BACKEND.REACTOR_SOLVES/N_STEPS}
+
+# STEP 2. Print both Measurements and the Speedup of the Mean Step Latency
+
+
+if __name__ == "__main__":
+    import contextlib, io
+    with contextlib.redirect_stdout(io.StringIO()):   # The Simulator prints every finished episode
+        FULL = Measure(WARM_START=False)
+        WARM = Measure(WARM_START=True)
+    for RESULT in (FULL, WARM):
+        print(", ".join(f"{KEY}: {VALUE:.3f}" if isinstance(VALUE, float) else f"{KEY}: {VALUE}"
+                        for KEY, VALUE in RESULT.items()))
+    print(f"Speedup: {FULL['MEAN [ms]']/WARM['MEAN [ms]']:.2f}x")
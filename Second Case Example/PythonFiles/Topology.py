@@ -0,0 +1,71 @@
+#################################################################################################################
+# "json" is used to save a Topology to a config File and to load it back.
+import json
+#################################################################################################################
+
+# STEP 1. Define the Topology of a Flowsheet: a train of N_STAGES stages, with a choice of ROUTES at every stage.
+# ROUTES maps the Route letter to its Block Type, Eg. {"A": "CSTR", "B": "PFR"}, or is {"": None} for a single route.
+# NAMES maps a Table to the template of its names, Eg. {"BLOCK": "B{STAGE}{ROUTE}"} gives B1A, B1B, B2A, ... B4B.
+# All the names are generated once, and then looked up by index: Name("BLOCK", STAGE, ROUTE), STAGE from 0 on.
+# The ".bkp" File has to contain the Blocks and Streams of the Topology, the stand-ins build any number of stages.
+
+
+class Topology:
+    def __init__(self, N_STAGES=4, NAMES=None, ROUTES=None, FEED="FEED"):
+        self.N_STAGES = N_STAGES
+        self.NAMES = dict(NAMES or {})
+        self.ROUTES = dict(ROUTES or {"": None})
+        self.FEED = FEED    # Name of the Feed Stream of the first stage
+        self.ROUTE_NAMES = list(self.ROUTES)
+        self.BLOCK_TYPES = list(self.ROUTES.values())
+        self.N_ROUTES = len(self.ROUTE_NAMES)
+        # TABLES[TABLE][STAGE][ROUTE] -> Name, and INDEX[TABLE][Name] -> (STAGE, ROUTE)
+        self.TABLES = {}
+        self.INDEX = {}
+        for TABLE, TEMPLATE in self.NAMES.items():
+            self.TABLES[TABLE] = [[TEMPLATE.format(STAGE=i+1, ROUTE=ROUTE) for ROUTE in self.ROUTE_NAMES]
+                                  for i in range(N_STAGES)]
+            self.INDEX[TABLE] = {Name: (i, j) for i, ROW in enumerate(self.TABLES[TABLE]) for j, Name in enumerate(ROW)}
+
+# STEP 1.1. Indexed lookups
+    def Name(self, TABLE, STAGE, ROUTE=0):
+        return self.TABLES[TABLE][STAGE][ROUTE]
+
+    def Names(self, TABLE):
+        # Route by Route, Eg. [B1A, B2A, B3A, B4A, B1B, B2B, B3B, B4B]
+        return [self.TABLES[TABLE][i][j] for j in range(self.N_ROUTES) for i in range(self.N_STAGES)]
+
+    def Stage(self, TABLE, Name):
+        return self.INDEX[TABLE][Name][0]
+
+    def Route(self, TABLE, Name):
+        return self.INDEX[TABLE][Name][1]
+
+    def Get_Block_Types(self, TABLE):
+        return {Name: self.BLOCK_TYPES[j] for Name, (i, j) in self.INDEX[TABLE].items()}
+
+# STEP 1.2. Save the Topology to a JSON config File, and load it back
+    def To_Dict(self):
+        return {"N_STAGES": self.N_STAGES, "NAMES": self.NAMES, "ROUTES": self.ROUTES, "FEED": self.FEED}
+
+    def Save(self, PATH):
+        with open(PATH, "w") as FILE:
+            json.dump(self.To_Dict(), FILE, indent=2)
+
+    @classmethod
+    def Load(cls, PATH):
+        with open(PATH) as FILE:
+            return cls(**json.load(FILE))
+
+#################################################################################################################
+
+# STEP 2. The SimulationCaseFile Flowsheet: every stage is a Temperature Changer in front of a Reactor.
+#   FEED -> TC1 -> R1 -> S1OUT -> TC2 -> R2 -> S2OUT -> ... -> TCn -> Rn -> SnOUT
+# Eg. Default_Topology(8) for a train of 8 stages.
+
+
+def Default_Topology(N_STAGES=4):
+    return Topology(N_STAGES,
+                    NAMES={"TEMP_CHANGER": "TC{STAGE}", "REACTOR": "R{STAGE}",
+                           "INPUT": "S{STAGE}IN", "OUTPUT": "S{STAGE}OUT"},
+                    FEED="FEED")
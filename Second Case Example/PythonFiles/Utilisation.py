@@ -0,0 +1,121 @@
+#################################################################################################################
+# The "time" library is used to emulate the solve time of ASPEN+ and to measure the utilisation.
+import time
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+# The Simulation Environement, the in-process stand-in of the Flowsheet and the Actor/Learner Driver.
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+import Paths
+from Common.ResultCache import ResultCache
+from Common.AsyncEnv import ActorLearner
+#################################################################################################################
+
+# STEP 1. Utilisation Benchmark of the Actor/Learner Driver.
+# DQNAgent.fit alternates between the Flowsheet and the Network: while one works, the other waits.
+# The same number of steps and gradient updates is run once like that, and once with the ActorLearner.
+# ASPEN+ solves in its own process, so its solve time is emulated with a sleep, which also releases the GIL.
+
+
+class Slow_ConverterModel(ConverterModel):
+    SOLVE_DELAY = 0.004 # Seconds every Run takes on top of the stand-in
+
+    def Run(self):
+        time.sleep(self.SOLVE_DELAY)
+        super().Run()
+
+# STEP 1.1. A Replay Memory and a NumPy Network of the size used in "AgentTraining.ipynb" (5-128-64-64-5)
+# The NumPy update has far less overhead than a Keras one, so a larger batch is used to give it a similar cost.
+
+
+class Memory:
+    def __init__(self):
+        self.ENTRIES = []
+
+    def append(self, STATE, action, REWARD, done):
+        self.ENTRIES.append((STATE, action, REWARD, done))
+
+
+class Network:
+    def __init__(self, SIZES=(5, 128, 64, 64, 5), BATCH_SIZE=512, SEED=0):
+        RNG = np.random.default_rng(SEED)
+        self.WEIGHTS = [RNG.normal(0, 1/np.sqrt(N_IN), (N_IN, N_OUT)) for N_IN, N_OUT in zip(SIZES[:-1], SIZES[1:])]
+        self.BATCH_SIZE = BATCH_SIZE
+        self.RNG = RNG
+
+    def Predict(self, STATES):
+        for W in self.WEIGHTS[:-1]:
+            STATES = np.maximum(STATES @ W, 0)
+        return STATES @ self.WEIGHTS[-1]
+
+    def Select_Action(self, STATE):
+        return int(np.argmax(self.Predict(np.asarray(STATE, dtype=float)[None])[0]))
+
+    def Train(self, MEMORY, LEARNING_RATE=1e-3):
+        # One SGD update towards the observed Rewards, the cost of a DQN update without its Target Network
+        ROWS = self.RNG.integers(len(MEMORY.ENTRIES), size=self.BATCH_SIZE)
+        STATES = np.array([MEMORY.ENTRIES[i][0] for i in ROWS], dtype=float)
+        TARGETS = np.array([MEMORY.ENTRIES[i][2] for i in ROWS], dtype=float)
+        LAYERS = [STATES]
+        for W in self.WEIGHTS[:-1]:
+            LAYERS.append(np.maximum(LAYERS[-1] @ W, 0))
+        GRADIENT = (LAYERS[-1] @ self.WEIGHTS[-1] - TARGETS[:, None])/self.BATCH_SIZE
+        for i in range(len(self.WEIGHTS) - 1, -1, -1):
+            UPDATE = LAYERS[i].T @ GRADIENT
+            GRADIENT = (GRADIENT @ self.WEIGHTS[i].T)*(LAYERS[i] > 0)
+            self.WEIGHTS[i] -= LEARNING_RATE*UPDATE
+
+# STEP 2. The synchronous loop of DQNAgent.fit: one step, then one gradient update
+
+
+def Measure_Synchronous(N_STEPS, WARMUP_STEPS):
+    env = Simulator(Slow_ConverterModel(), ResultCache(MAX_SIZE=0))
+    MEMORY, NETWORK = Memory(), Network()
+    ENV_BUSY, LEARNER_BUSY, UPDATES = 0, 0, 0
+    START = time.perf_counter()
+    STATE = env.reset()
+    for i in range(N_STEPS):
+        action = NETWORK.Select_Action(STATE)
+        STEP_START = time.perf_counter()
+        NEXT_STATE, REWARD, done, INFO = env.step(action)
+        if done:
+            FINAL_STATE, NEXT_STATE = NEXT_STATE, env.reset()
+        ENV_BUSY += time.perf_counter() - STEP_START
+        MEMORY.append(STATE, action, REWARD, done)
+        if done:
+            MEMORY.append(FINAL_STATE, 0, 0., False)
+        if i + 1 >= WARMUP_STEPS:
+            TRAIN_START = time.perf_counter()
+            NETWORK.Train(MEMORY)
+            LEARNER_BUSY += time.perf_counter() - TRAIN_START
+            UPDATES += 1
+        STATE = NEXT_STATE
+    SECONDS = time.perf_counter() - START
+    return {"STEPS": N_STEPS, "UPDATES": UPDATES, "SECONDS": SECONDS,
+            "ENV UTILISATION": ENV_BUSY/SECONDS, "LEARNER UTILISATION": LEARNER_BUSY/SECONDS}
+
+# STEP 3. The same work with the Actor/Learner Driver
+
+
+def Measure_Actor_Learner(N_STEPS, WARMUP_STEPS):
+    env = Simulator(Slow_ConverterModel(), ResultCache(MAX_SIZE=0))
+    MEMORY, NETWORK = Memory(), Network()
+    DRIVER = ActorLearner(env, NETWORK.Select_Action, MEMORY, lambda: NETWORK.Train(MEMORY), WARMUP_STEPS)
+    RESULT = DRIVER.Run(N_STEPS)
+    env.close_async()
+    return RESULT
+
+
+if __name__ == "__main__":
+    import contextlib, io
+    # The overlap helps most when the solve and the gradient update take about as long
+    for SOLVE_DELAY in (0.004, 0.001):
+        Slow_ConverterModel.SOLVE_DELAY = SOLVE_DELAY
+        with contextlib.redirect_stdout(io.StringIO()):   # The Simulator prints every finished episode
+            SYNCHRONOUS = Measure_Synchronous(N_STEPS=2000, WARMUP_STEPS=100)
+            ASYNCHRONOUS = Measure_Actor_Learner(N_STEPS=2000, WARMUP_STEPS=100)
+        print(f"SOLVE_DELAY: {1000*SOLVE_DELAY:.1f} ms")
+        for NAME, RESULT in (("Synchronous", SYNCHRONOUS), ("Actor/Learner", ASYNCHRONOUS)):
+            print("  " + NAME + ": " + ", ".join(f"{KEY}: {VALUE:.3f}" if isinstance(VALUE, float) else f"{KEY}: {VALUE}"
+                                                 for KEY, VALUE in RESULT.items()))
+        print(f"  Speedup: {SYNCHRONOUS['SECONDS']/ASYNCHRONOUS['SECONDS']:.2f}x")
@@ -0,0 +1,205 @@
+#################################################################################################################
+# The "os", "shutil" and "tempfile" libraries are used to give every Worker its own copy of the ASPEN File.
+import os
+import shutil
+import tempfile
+# The "multiprocessing" library starts the Workers and connects them to the training loop through Pipes.
+import multiprocessing as mp
+# "time" bounds how long the training loop waits for the answer of a Worker.
+import time
+# "Numpy" is used as a mathematical extention to Python.
+import numpy as np
+#################################################################################################################
+
+# STEP 1. Define how a Worker creates its Environement.
+# These functions are defined at module level, so they can be sent to a freshly started process.
+
+# STEP 1.1. Every Worker opens its own copy of the ".bkp" File, since one ASPEN+ Document can only solve one Flowsheet
+# The copy is made in the DIRECTORY of the Worker, which the VectorEnv deletes when the Worker is closed or restarted.
+def Make_Aspen_Env(WORKER_ID, DIRECTORY, METRICS_DIRECTORY=None):
+    from SimulationEnv2 import Simulator
+    from Common.AspenBackend import AspenPlus
+    COPY = os.path.join(DIRECTORY, os.path.basename(Simulator.PATH))
+    shutil.copy(os.path.abspath(Simulator.PATH), COPY)
+    return Simulator(AspenPlus(COPY, EARLY_BINDING=True),
+                     METRICS_PATH=Get_Metrics_Path(WORKER_ID, DIRECTORY, METRICS_DIRECTORY))
+
+# STEP 1.2. The in-process stand-in, used to run the Workers on any Operating System
+def Make_Stand_In_Env(WORKER_ID, DIRECTORY, METRICS_DIRECTORY=None):
+    from SimulationEnv2 import Simulator
+    from KineticModel import ConverterModel
+    return Simulator(ConverterModel(), METRICS_PATH=Get_Metrics_Path(WORKER_ID, DIRECTORY, METRICS_DIRECTORY))
+
+# STEP 1.2.1. Every Worker streams its episodes to a Metrics File of its own, instead of printing them.
+# By default the File is in the DIRECTORY of the Worker, and deleted with it. To keep them, the Files are written to a
+# METRICS_DIRECTORY, Eg. VectorEnv(4, MAKE_ENV=functools.partial(Make_Aspen_Env, METRICS_DIRECTORY="Logs")), one per
+# Worker process, so a restarted Worker does not overwrite the episodes of the one it replaced.
+def Get_Metrics_Path(WORKER_ID, DIRECTORY, METRICS_DIRECTORY=None):
+    if METRICS_DIRECTORY is None:
+        return os.path.join(DIRECTORY, "Metrics.dat")
+    return os.path.join(METRICS_DIRECTORY, "Worker" + str(WORKER_ID) + "-" + str(os.getpid()) + "_Metrics.dat")
+
+# STEP 1.3. The loop every Worker runs: receive a command, apply it to the Environement and send back the result
+# Finished episodes are reset inside the Worker, the last State of the episode is returned as INFO["FINAL_STATE"].
+def Worker(MAKE_ENV, WORKER_ID, DIRECTORY, PIPE):
+    env = MAKE_ENV(WORKER_ID, DIRECTORY)
+    while True:
+        COMMAND, DATA = PIPE.recv()
+        if COMMAND == "step":
+            STATE, REWARD, done, INFO = env.step(DATA)
+            if done:
+                INFO = dict(INFO, FINAL_STATE=STATE)
+                STATE = env.reset()
+            PIPE.send((STATE, REWARD, done, INFO))
+        elif COMMAND == "reset":
+            PIPE.send(env.reset())
+        elif COMMAND == "close":
+            env.close() # Writes the last Metrics, saves the Cache and hands a pooled Document back
+            if env.BACKEND.OPENED and env.POOL is None: # The Document is only opened at the first reset
+                env.BACKEND.Close()
+            PIPE.close()
+            break
+
+#################################################################################################################
+
+# STEP 2. The Vector Environement, which steps K Workers in parallel.
+
+
+# A Worker that does not answer within STEP_TIMEOUT [s] (None: no limit) is treated as crashed, and restarted.
+
+
+class VectorEnv:
+    def __init__(self, N_WORKERS, MAKE_ENV=Make_Aspen_Env, STEP_TIMEOUT=600):
+        # COM Documents can not be inherited by forked processes, so the Workers are always spawned
+        self.CONTEXT = mp.get_context("spawn")
+        self.N_WORKERS = N_WORKERS
+        self.MAKE_ENV = MAKE_ENV
+        self.STEP_TIMEOUT = STEP_TIMEOUT
+        self.PROCESSES = [None]*N_WORKERS
+        self.PIPES = [None]*N_WORKERS
+        self.DIRECTORIES = [None]*N_WORKERS # Temporary Directory of every Worker, Eg. for its copy of the ".bkp" File
+        self.RESTARTS = 0   # Number of Workers restarted after a crash
+        self.STATE = None
+        for k in range(N_WORKERS):
+            self.Start_Worker(k)
+
+##################################################################################################################
+
+# STEP 3. Implement the Step and Reset functions for all Workers at once
+
+    def step(self, actions):
+        for k in range(self.N_WORKERS):
+            self.Send(k, ("step", int(actions[k])))
+        STATES, REWARDS, DONES, INFOS = [], [], [], []
+        END = None if self.STEP_TIMEOUT is None else time.perf_counter() + self.STEP_TIMEOUT
+        for k in range(self.N_WORKERS):
+            try:
+                STATE, REWARD, done, INFO = self.Receive(k, END)
+            except (EOFError, OSError):
+                # The Worker crashed or hung: its episode is lost, a new Worker is started on a new episode
+                self.Restart_Worker(k)
+                STATE, REWARD, done, INFO = self.Reset_Worker(k), 0, True, {"RESTARTED": True}
+            STATES.append(STATE)
+            REWARDS.append(REWARD)
+            DONES.append(done)
+            INFOS.append(INFO)
+        self.STATE = np.array(STATES)
+        return self.STATE, np.array(REWARDS), np.array(DONES), INFOS
+
+    def reset(self):
+        self.STATE = np.array([self.Reset_Worker(k) for k in range(self.N_WORKERS)])
+        return self.STATE
+
+    def close(self):
+        for k in range(self.N_WORKERS):
+            self.Send(k, ("close", None))
+        for PROCESS in self.PROCESSES:
+            PROCESS.join(timeout=10)
+            if PROCESS.is_alive():
+                PROCESS.terminate()
+        for k in range(self.N_WORKERS):
+            self.Remove_Directory(k)
+
+##################################################################################################################
+
+# STEP 4. Feed the Replay Memory of the DQNAgent with the experience of all Workers.
+# SELECT_ACTION maps a State to an action, Eg. lambda S: dqn.policy.select_action(dqn.compute_q_values([S])).
+# keras-rl's SequentialMemory pairs every entry with the next one, so the transitions of each Worker are kept
+# apart and written as one block when its episode is done (followed by the final State, like DQNAgent.fit does).
+
+    def Fill_Memory(self, MEMORY, SELECT_ACTION, N_STEPS):
+        if self.STATE is None:
+            self.reset()
+        EPISODES = [[] for _ in range(self.N_WORKERS)]
+        N_STORED = 0
+        for _ in range(-(-N_STEPS//self.N_WORKERS)):
+            STATES = self.STATE
+            actions = [SELECT_ACTION(STATE) for STATE in STATES]
+            _, REWARDS, DONES, INFOS = self.step(actions)
+            for k in range(self.N_WORKERS):
+                if INFOS[k].get("RESTARTED"):
+                    EPISODES[k] = []    # The episode of a crashed Worker is incomplete
+                    continue
+                EPISODES[k].append((STATES[k], actions[k], REWARDS[k], DONES[k]))
+                if DONES[k]:
+                    for STATE, action, REWARD, done in EPISODES[k]:
+                        MEMORY.append(STATE, action, REWARD, done)
+                    MEMORY.append(INFOS[k]["FINAL_STATE"], 0, 0., False)
+                    N_STORED += len(EPISODES[k])
+                    EPISODES[k] = []
+        return N_STORED
+
+##################################################################################################################
+
+# STEP 5. Implement all Auxiliary Functions that are needed for the previous steps.
+
+# STEP 5.1. Start a Worker process in a new temporary Directory, and keep our end of its Pipe
+    def Start_Worker(self, k):
+        self.DIRECTORIES[k] = tempfile.mkdtemp(prefix="Worker" + str(k) + "_")
+        PARENT, CHILD = self.CONTEXT.Pipe()
+        PROCESS = self.CONTEXT.Process(target=Worker, args=(self.MAKE_ENV, k, self.DIRECTORIES[k], CHILD), daemon=True)
+        PROCESS.start()
+        CHILD.close()
+        self.PROCESSES[k] = PROCESS
+        self.PIPES[k] = PARENT
+
+# STEP 5.2. Replace a crashed Worker by a new one
+    def Restart_Worker(self, k):
+        if self.PROCESSES[k].is_alive():
+            self.PROCESSES[k].kill()    # A hung Worker may never handle a terminate
+        self.PROCESSES[k].join()
+        self.PIPES[k].close()
+        self.Remove_Directory(k)  # The copy of the crashed Worker may be left in any State
+        self.Start_Worker(k)
+        self.RESTARTS += 1
+        print(f"~Worker {k} Restarted ({self.RESTARTS})~")
+
+# STEP 5.3. Sending to a crashed Worker fails silently, the crash is handled when its answer is read
+    def Send(self, k, MESSAGE):
+        try:
+            self.PIPES[k].send(MESSAGE)
+        except (BrokenPipeError, OSError):
+            pass
+
+# STEP 5.4. Reset one Worker, giving up when a new Worker crashes again and again (Eg. ASPEN+ is not installed)
+    def Reset_Worker(self, k, MAX_TRIES=3):
+        for _ in range(MAX_TRIES):
+            try:
+                self.PIPES[k].send(("reset", None))
+                return self.Receive(k, None if self.STEP_TIMEOUT is None else time.perf_counter() + self.STEP_TIMEOUT)
+            except (EOFError, OSError):
+                self.Restart_Worker(k)
+        raise RuntimeError(f"Worker {k} crashed {MAX_TRIES} times in a row")
+
+# STEP 5.5. Delete the temporary Directory of a Worker whose process has ended
+    def Remove_Directory(self, k):
+        if self.DIRECTORIES[k] is not None:
+            shutil.rmtree(self.DIRECTORIES[k], ignore_errors=True)
+            self.DIRECTORIES[k] = None
+
+# STEP 5.6. Read the answer of a Worker, waiting until END (a time.perf_counter() value, None: no limit). A Worker
+# that has not answered by then is hung, Eg. in a solve that never returns, and is handled like a crashed one.
+    def Receive(self, k, END):
+        if END is not None and not self.PIPES[k].poll(max(0., END - time.perf_counter())):
+            raise TimeoutError(f"Worker {k} did not answer within {self.STEP_TIMEOUT} s")
+        return self.PIPES[k].recv()
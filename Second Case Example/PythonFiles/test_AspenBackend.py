@@ -0,0 +1,253 @@
+#################################################################################################################
+# The ASPEN+ Backend is tested on a fake COM Tree, which counts every hop through Elements(...), so it runs without
+# ASPEN+ (and without win32com) on any Operating System.
+import io
+import contextlib
+import types
+import Paths
+from Common import AspenBackend
+from Common.AspenBackend import AspenPlus
+from Common.RestartPolicy import RestartPolicy
+from Common.ResultCache import ResultCache
+from Common.ResultStore import ResultStore
+from SimulationEnv2 import Simulator
+#################################################################################################################
+
+# STEP 1. Define the fake Document: a Tree of Nodes with Elements(Name), Elements.Add/Remove, RemoveAll and Value.
+
+
+class Fake_Elements:
+    def __init__(self, NODE):
+        self.NODE = NODE
+
+    def __call__(self, Name):
+        self.NODE.COUNTER["HOPS"] += 1
+        if Name not in self.NODE.CHILDREN:
+            self.NODE.CHILDREN[Name] = Fake_Node(self.NODE.COUNTER)
+        return self.NODE.CHILDREN[Name]
+
+    def Add(self, Name):
+        self.NODE.CHILDREN[Name] = Fake_Node(self.NODE.COUNTER)
+
+    def Remove(self, Name):
+        self.NODE.CHILDREN.pop(Name, None)
+
+
+class Fake_Node:
+    def __init__(self, COUNTER):
+        self.COUNTER = COUNTER
+        self.CHILDREN = {}
+        self.Value = 0.0
+        self.Elements = Fake_Elements(self)
+
+    def RemoveAll(self):
+        self.CHILDREN.clear()
+
+
+class Fake_Engine:
+    IsRunning = False
+
+    def __init__(self):
+        self.RUNS = 0       # Number of Run2 calls
+        self.REINITS = []   # Blocks reinitialised, in order
+
+    def Run2(self, ASYNCHRONOUS=False):
+        self.RUNS += 1
+
+    def Reinit(self, TYPE, Name_BLK):
+        self.REINITS.append(Name_BLK)
+
+
+class Fake_Document:
+    def __init__(self):
+        self.COUNTER = {"HOPS": 0}
+        self.Tree = Fake_Node(self.COUNTER)
+        self.Engine = Fake_Engine()
+
+    def SaveAs(self, PATH, OVERWRITE):
+        pass
+
+    def InitFromArchive2(self, PATH):
+        pass
+
+
+def Make_Backend():
+    BACKEND = AspenPlus("SimulationCaseFile.bkp")
+    BACKEND.AspenSimulation = Fake_Document()
+    BACKEND.OPENED = True   # Open() would start ASPEN+ through win32com
+    return BACKEND
+
+
+def Hops(BACKEND):
+    return BACKEND.AspenSimulation.COUNTER["HOPS"]
+
+#################################################################################################################
+
+# STEP 2. A Path is resolved once: the second read or write of the same Variable makes no hop through the Tree.
+
+
+def test_Second_Call_Makes_No_Hops():
+    BACKEND = Make_Backend()
+    BACKEND.Get_Output("S1OUT", "SO2")
+    assert Hops(BACKEND) == 7   # Data, Streams, S1OUT, Output, MOLEFLOW, MIXED, SO2
+    BACKEND.Get_Output("S1OUT", "SO2")
+    assert Hops(BACKEND) == 7
+    BACKEND.Set_Temp("TC1", 500)
+    HOPS = Hops(BACKEND)
+    assert HOPS == 7 + 4    # Data is known already: Blocks, TC1, Input, TEMP
+    BACKEND.Set_Temp("TC1", 510)
+    assert Hops(BACKEND) == HOPS
+    assert BACKEND.Get_Temp("TC1") == 510
+
+# STEP 3. Bulk calls cost one COM call per Variable once their Paths are known, and one per new Node before that.
+
+
+def test_Bulk_Calls():
+    BACKEND = Make_Backend()
+    Names_BLK = ["TC1", "TC2", "TC3", "TC4"]
+    BACKEND.Get_Temps(Names_BLK)
+    assert Hops(BACKEND) == 2 + 3*4 # Data, Blocks, and TCn, Input, TEMP for every TC
+    assert BACKEND.TREE_CALLS == 1 + 2 + 3*4 + 4    # The Tree, every new Node and every Value
+    CALLS = BACKEND.TREE_CALLS
+    BACKEND.Set_Temps(dict.fromkeys(Names_BLK, 400))
+    assert BACKEND.TREE_CALLS - CALLS == 4 and Hops(BACKEND) == 2 + 3*4
+    assert BACKEND.Get_Temps(Names_BLK) == [400]*4
+    assert BACKEND.TREE_CALLS - CALLS == 8
+
+# STEP 4. The Handles of a deleted Stream are forgotten, and resolved again when the Stream is made again.
+
+
+def test_Removed_Stream_Is_Resolved_Again():
+    BACKEND = Make_Backend()
+    BACKEND.Get_Output("S1OUT", "SO2")
+    BACKEND.Remove_Stream("S1OUT")
+    assert not any(PATH[:3] == ("Data", "Streams", "S1OUT") for PATH in BACKEND.NODES)
+    HOPS = Hops(BACKEND)
+    BACKEND.Get_Output("S1OUT", "SO2")
+    assert Hops(BACKEND) == HOPS + 5    # S1OUT, Output, MOLEFLOW, MIXED, SO2
+
+# STEP 5. A Simulator on the fake Tree makes at most 6 COM calls per step once all its Paths are known. Without a Cache
+# every Move is Simulated: a Temperature Change writes one TC, a Move reads the Run Status and the Outlet.
+
+
+def test_Steady_State_Step_Calls():
+    BACKEND = Make_Backend()
+    env = Simulator(BACKEND, ResultCache(MAX_SIZE=0), RESTART_POLICY=RestartPolicy(LATENCY_DRIFT=float("inf")))
+    BACKEND.Set_Values({AspenPlus.RUN_STATUS: 8})   # Every Run converged with Results
+    ACTIONS = [1, 3, 0, 2, 0, 4, 1, 0, 0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(3):  # The first episodes resolve every Path
+            env.reset()
+            for action in ACTIONS:
+                env.step(action)
+        HOPS = Hops(BACKEND)
+        CALLS = []
+        env.reset()
+        for action in ACTIONS:
+            START = BACKEND.TREE_CALLS
+            env.step(action)
+            CALLS.append(BACKEND.TREE_CALLS - START)
+    assert Hops(BACKEND) == HOPS
+    assert CALLS == [1, 1, 2, 1, 2, 1, 1, 2, 2]
+    assert max(CALLS) <= 6
+
+# STEP 6. A Temperature Change makes no Run, and a Move only reinitialises the Blocks from the first TC that changed
+# since the last solve, Eg. TC2 changed twice: one Run for TC2, R2, TC3, R3, TC4 and R4.
+
+
+def test_Move_Solves_Downstream_Of_First_Change():
+    BACKEND = Make_Backend()
+    ENGINE = BACKEND.AspenSimulation.Engine
+    env = Simulator(BACKEND, ResultCache(MAX_SIZE=0), RESTART_POLICY=RestartPolicy(LATENCY_DRIFT=float("inf")))
+    BACKEND.Set_Values({AspenPlus.RUN_STATUS: 8})   # Every Run converged with Results
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        env.step(0)
+        RUNS, REINITS = ENGINE.RUNS, len(ENGINE.REINITS)
+        env.step(1)
+        env.step(3)
+        assert ENGINE.RUNS == RUNS and len(ENGINE.REINITS) == REINITS
+        env.step(0)
+        assert ENGINE.RUNS == RUNS + 1
+        assert ENGINE.REINITS[REINITS:] == ["TC2", "R2", "TC3", "R3", "TC4", "R4"]
+        env.step(2)
+        env.step(0)
+        assert ENGINE.RUNS == RUNS + 2
+        assert ENGINE.REINITS[REINITS + 6:] == ["TC3", "R3", "TC4", "R4"]
+
+# STEP 7. The Memory of a Document is the one of the AspenPlus.exe started when it was opened, and of the apmain.exe
+# below it, and not the one of the engines of the other Documents on the machine.
+
+
+class Fake_Process:
+    def __init__(self, PID, NAME, RSS, CHILDREN=()):
+        self.pid = PID
+        self.info = {"name": NAME}
+        self.RSS = RSS
+        self.CHILDREN = list(CHILDREN)
+
+    def name(self):
+        return self.info["name"]
+
+    def memory_info(self):
+        return types.SimpleNamespace(rss=self.RSS)
+
+    def children(self, recursive=False):
+        return [GRANDCHILD for CHILD in self.CHILDREN for GRANDCHILD in [CHILD] + CHILD.children(recursive)]
+
+
+class Fake_psutil:
+    NoSuchProcess = LookupError
+
+    def __init__(self):
+        self.PROCESSES = {}
+
+    def Start(self, PID, RSS):
+        # An AspenPlus.exe with its apmain.exe, as Dispatch("Apwn.Document") starts them
+        self.PROCESSES[PID] = Fake_Process(PID, "AspenPlus.exe", RSS, [Fake_Process(PID + 1, "apmain.exe", RSS)])
+
+    def process_iter(self, ATTRS):
+        return list(self.PROCESSES.values())
+
+    def Process(self, PID):
+        if PID not in self.PROCESSES:
+            raise self.NoSuchProcess(PID)
+        return self.PROCESSES[PID]
+
+
+def test_Memory_Of_Own_Engine(monkeypatch):
+    PSUTIL = Fake_psutil()
+    PSUTIL.Start(10, RSS=100)   # The engine of another Document
+    STARTED = iter([(20, 1000), (30, 5)])
+    def Dispatch(NAME):
+        PSUTIL.Start(*next(STARTED))
+        return Fake_Document()
+    monkeypatch.setattr(AspenBackend, "psutil", PSUTIL)
+    monkeypatch.setattr(AspenBackend, "win32", types.SimpleNamespace(Dispatch=Dispatch))
+    FIRST, SECOND = AspenPlus("SimulationCaseFile.bkp"), AspenPlus("SimulationCaseFile.bkp")
+    FIRST.Open()
+    SECOND.Open()
+    assert FIRST.ENGINE_PIDS == {20} and SECOND.ENGINE_PIDS == {30}
+    assert FIRST.Get_Memory() == 2*1000 and SECOND.Get_Memory() == 2*5
+    del PSUTIL.PROCESSES[30]    # Closed
+    assert SECOND.Get_Memory() == 0
+
+# STEP 8. A continuous Step reads the Outlets of every Reactor, and every Chemical the Store keeps, in one bulk read.
+
+
+def test_Continuous_Step_Reads_Outlets_At_Once(tmp_path):
+    BACKEND = Make_Backend()
+    env = Simulator(BACKEND, STORE=ResultStore(str(tmp_path/"Results.db")), CONTINUOUS=True,
+                    RESTART_POLICY=RestartPolicy(LATENCY_DRIFT=float("inf")))
+    BACKEND.Set_Values({AspenPlus.RUN_STATUS: 8})   # Every Run converged with Results
+    READS = []
+    GET_VALUES = BACKEND.Get_Values
+    def Get_Values(PATHS):
+        READS.append(len(PATHS))
+        return GET_VALUES(PATHS)
+    BACKEND.Get_Values = Get_Values
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        READS.clear()
+        env.step([560, 525, 510, 500])
+    assert READS == [1, 4*4]    # The Run Status, and the 4 Chemicals of the 4 Outlets
@@ -0,0 +1,39 @@
+#################################################################################################################
+# The BatchSimulator is tested against N independent Simulators of "SimulationEnv2.py" on the in-process stand-in:
+# stepped with the same seeded actions, every row of the Batch has to see what its own Simulator sees.
+import io
+import contextlib
+import numpy as np
+import Paths
+from Common.ResultCache import ResultCache
+from BatchSimulator import BatchSimulator
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+#################################################################################################################
+
+# STEP 1. The same Observations, Rewards, done flags and finished episodes, row by row.
+# A finished row of the Batch is reset at once, its last State is in INFO["FINAL_STATE"].
+
+
+def test_Batch_Matches_Independent_Simulators():
+    N_ENVS, N_STEPS, SEED = 6, 400, 0
+    BATCH = BatchSimulator(N_ENVS, ConverterModel())
+    ENVS = [Simulator(ConverterModel(), ResultCache(MAX_SIZE=0)) for _ in range(N_ENVS)]
+    RNG = np.random.default_rng(SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        STATES = BATCH.reset()
+        assert np.allclose(STATES, [env.reset() for env in ENVS])
+        for _ in range(N_STEPS):
+            actions = RNG.choice([0, 1, 2, 3, 4, 1, 2, 3, 4, 3], size=N_ENVS)
+            STATES, REWARDS, DONES, INFO = BATCH.step(actions)
+            for k, env in enumerate(ENVS):
+                STATE, REWARD, done, _ = env.step(int(actions[k]))
+                assert done == DONES[k]
+                assert np.isclose(REWARD, REWARDS[k], rtol=0, atol=1e-9)
+                assert np.allclose(STATE, INFO["FINAL_STATE"][k], rtol=0, atol=1e-9)
+                if done:
+                    STATE = env.reset()
+                assert np.allclose(STATE, STATES[k], rtol=0, atol=1e-9)
+    N_EPISODES = sum(len(env.EPISODES) for env in ENVS)
+    assert N_EPISODES == len(BATCH.EPISODES) > 0
+    assert np.isclose(BATCH.MAX_CONVERSION, max(env.MAX_CONVERSION for env in ENVS), rtol=0, atol=1e-9)
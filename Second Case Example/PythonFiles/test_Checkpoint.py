@@ -0,0 +1,91 @@
+#################################################################################################################
+# The Checkpointer is tested without Keras: the Models and Optimizers are small holders of weights, so a Restore can
+# be checked to bring back the weights, the moments of the Optimizer, the Replay Memory and the random State.
+import io
+import contextlib
+import numpy as np
+import Paths
+from Common.Checkpoint import Checkpointer, Has_Checkpoint
+from Common.ReplayMemory import ReplayMemory
+from Common.RestartPolicy import RestartPolicy
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+#################################################################################################################
+
+# STEP 1. A holder of weights, with the Methods of a Keras Model or Optimizer. BUILT=False has no weights yet, like an
+# Optimizer before its training function is made.
+
+
+class Weights:
+    def __init__(self, VALUE, BUILT=True):
+        self.WEIGHTS = [np.full(3, VALUE)] if BUILT else []
+
+    def get_weights(self):
+        return [np.copy(WEIGHT) for WEIGHT in self.WEIGHTS]
+
+    def set_weights(self, WEIGHTS):
+        self.WEIGHTS = [np.copy(WEIGHT) for WEIGHT in WEIGHTS]
+
+
+def Fill(MEMORY, N):
+    for k in range(N):
+        MEMORY.append(np.full(5, k, dtype="f4"), k % 5, float(k), k % 4 == 3)
+
+#################################################################################################################
+
+# STEP 2. A Restore goes back to the Checkpoint: weights, Optimizer, Memory (rows, PENDING and RNG) and random State.
+
+
+def test_Restore_Is_Exact(tmp_path):
+    MODEL, OPTIMIZER = Weights(1.), Weights(2.)
+    MEMORY = ReplayMemory(CAPACITY=64, STATE_SHAPE=(5,), PATH=str(tmp_path/"Replay.dat"), SEED=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = Simulator(ConverterModel())
+    CHECKPOINTER = Checkpointer(str(tmp_path/"Backups"), MODELS={"model": MODEL}, env=env,
+                                OPTIMIZERS={"optimizer": OPTIMIZER}, MEMORY=MEMORY)
+    Fill(MEMORY, 10)
+    np.random.seed(0)
+    assert not Has_Checkpoint(str(tmp_path/"Backups"))
+    CHECKPOINTER.Save(STEP=1000, SCORE=1.)
+    CHECKPOINTER.Wait()
+    assert Has_Checkpoint(str(tmp_path/"Backups"))   # A resumed run appends to its Metrics Files
+    SAMPLE, RANDOM, PENDING = MEMORY.Sample(8)[1], np.random.random(), MEMORY.PENDING
+    MODEL.set_weights([np.zeros(3)])
+    OPTIMIZER.set_weights([np.zeros(3)])
+    Fill(MEMORY, 7)
+
+    MEMORY = ReplayMemory(CAPACITY=64, STATE_SHAPE=(5,), PATH=str(tmp_path/"Replay.dat"), SEED=1)   # A new session
+    OPTIMIZER = Weights(0., BUILT=False)
+    RESUMED = Checkpointer(str(tmp_path/"Backups"), MODELS={"model": MODEL}, OPTIMIZERS={"optimizer": OPTIMIZER},
+                           MEMORY=MEMORY)
+    assert RESUMED.Restore()["STEP"] == 1000 and RESUMED.RESUMED_STEP == 1000
+    assert MODEL.get_weights()[0].tolist() == [1.]*3
+    assert len(MEMORY) == 7 and MEMORY.PENDING[1] == PENDING[1] and MEMORY.PENDING[2] == PENDING[2]
+    assert MEMORY.Sample(8)[1].tolist() == SAMPLE.tolist() and np.random.random() == RANDOM
+    assert OPTIMIZER.get_weights() == [] and "optimizer" in RESUMED.OPTIMIZER_WEIGHTS
+    OPTIMIZER.WEIGHTS = [np.zeros(3)]   # Its training function was built
+    RESUMED.Restore_Optimizers()
+    assert OPTIMIZER.get_weights()[0].tolist() == [2.]*3 and not RESUMED.OPTIMIZER_WEIGHTS
+
+# STEP 3. The counters and measurements of the Restart Policy are restored, its thresholds and budgets are the ones the
+# resumed run was started with.
+
+
+def test_Restart_Policy_Keeps_Its_Arguments(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = Simulator(ConverterModel(), RESTART_POLICY=RestartPolicy(WARMUP_STEPS=2, MAX_RETRIES=2))
+    env.RESTART_POLICY.Record_Failure()
+    env.RESTART_POLICY.Restart()
+    for SECONDS in (1., 3., 5.):
+        env.RESTART_POLICY.Record_Step(SECONDS)
+    CHECKPOINTER = Checkpointer(str(tmp_path/"Backups"), env=env)
+    CHECKPOINTER.Save(STEP=10)
+    CHECKPOINTER.Wait()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = Simulator(ConverterModel(), RESTART_POLICY=RestartPolicy(MAX_MEMORY=2e9, MAX_RETRIES=5))
+    Checkpointer(str(tmp_path/"Backups"), env=env).Restore()
+    POLICY = env.RESTART_POLICY
+    assert POLICY.N_FAILURES == 1 and POLICY.N_RESTARTS == 1 and POLICY.RESTORES == 0
+    assert POLICY.BASELINE == 2. and POLICY.LATENCY == 2. + 0.05*3.
+    assert POLICY.MAX_MEMORY == 2e9 and POLICY.MAX_RETRIES == 5 and POLICY.WARMUP_STEPS == 50
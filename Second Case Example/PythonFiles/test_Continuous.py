@@ -0,0 +1,38 @@
+#################################################################################################################
+# The continuous Step looks every Reactor of the train up like a Move does: TC Temperatures found in the Store are not
+# Simulated again, and a train with a Prefix that did not converge is not Simulated at all.
+import io
+import contextlib
+import Paths
+from Common.ResultCache import ResultCache
+from Common.ResultStore import ResultStore
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+#################################################################################################################
+
+# STEP 1. A new Simulator (with an empty Cache) reads the train of an earlier one from the Store.
+
+
+def test_Train_Is_Read_From_The_Store(tmp_path):
+    STORE = ResultStore(str(tmp_path/"Results.db"))
+    TEMPS = [560, 525, 510, 500]
+    with contextlib.redirect_stdout(io.StringIO()):
+        FIRST = Simulator(ConverterModel(), STORE=STORE, CONTINUOUS=True)
+        FIRST.reset()
+        _, REWARD, done, _ = FIRST.step(TEMPS)
+        SECOND = Simulator(ConverterModel(), ResultCache(), STORE=STORE, CONTINUOUS=True)
+        SECOND.reset()
+        _, REWARD_AGAIN, done_again, _ = SECOND.step(TEMPS)
+    assert FIRST.N_SIMULATIONS == 1 and SECOND.N_SIMULATIONS == 0
+    assert REWARD_AGAIN == REWARD and done and done_again
+
+# STEP 2. A train whose Prefix did not converge fails without a Simulation.
+
+
+def test_Failed_Prefix_Is_Not_Simulated():
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = Simulator(ConverterModel(), ResultCache(MAX_SIZE=0), CONTINUOUS=True)
+        env.FAILED.add((560., 525.))
+        env.reset()
+        _, REWARD, done, INFO = env.step([560, 525, 510, 500])
+    assert INFO == {"FAILED": True} and env.N_SIMULATIONS == 0
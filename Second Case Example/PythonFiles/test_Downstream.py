@@ -0,0 +1,41 @@
+#################################################################################################################
+# The Temperature Changes are tested on the in-process stand-in: they are not solved, and the next Move only solves
+# the Reactors from the first changed stage on. This may only skip work, never change what the Agent sees, so stepping
+# it has to give the same Observations, Rewards and episodes as solving the whole train at every Move.
+import io
+import contextlib
+import numpy as np
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+import Paths
+from Common.ResultCache import ResultCache
+#################################################################################################################
+
+# STEP 1. Step a Simulator with random actions, and keep everything the Agent sees.
+
+
+def Run(WARM_START, N_STEPS=3000, SEED=0):
+    env = Simulator(ConverterModel(WARM_START=WARM_START), ResultCache(MAX_SIZE=0))
+    RNG = np.random.default_rng(SEED)
+    TRANSITIONS = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        for _ in range(N_STEPS):
+            STATE, REWARD, done, INFO = env.step(int(RNG.choice([0, 1, 2, 3, 4, 1, 2, 3, 4])))
+            TRANSITIONS.append((np.asarray(STATE, dtype=float).tolist(), float(REWARD), done, INFO))
+            if done:
+                env.reset()
+    return env, TRANSITIONS
+
+# STEP 2. The same Observations, Rewards and done flags as whole train solves, with only the Moves solved, and fewer
+# Reactors integrated.
+
+
+def test_Identical_Observations_And_Rewards():
+    WHOLE, TRANSITIONS_WHOLE = Run(WARM_START=False)
+    DOWNSTREAM, TRANSITIONS_DOWNSTREAM = Run(WARM_START=True)
+    assert TRANSITIONS_DOWNSTREAM == TRANSITIONS_WHOLE
+    assert np.array_equal(DOWNSTREAM.EPISODES.View(), WHOLE.EPISODES.View())
+    assert DOWNSTREAM.FIDELITY_SOLVES["FULL"] == DOWNSTREAM.N_SIMULATIONS  # Every solve is the one of a Move
+    assert DOWNSTREAM.SOLVES_AVOIDED > 0
+    assert DOWNSTREAM.BACKEND.REACTOR_SOLVES < WHOLE.BACKEND.REACTOR_SOLVES
@@ -0,0 +1,35 @@
+#################################################################################################################
+# The Prioritized Replay Memory is tested without keras-rl: its File is opened again with all its rows, but only
+# with the CAPACITY and dtype it was made with, and the Priorities given by the Learner change what is sampled.
+import os
+import numpy as np
+import pytest
+import Paths
+from Common.ReplayMemory import ReplayMemory
+#################################################################################################################
+
+# STEP 1. A Memory opened again from its File has the same rows, and another CAPACITY or dtype is refused.
+
+
+def test_Reopen_Checks_Header(tmp_path):
+    PATH = os.path.join(tmp_path, "Replay.dat")
+    MEMORY = ReplayMemory(CAPACITY=8, STATE_SHAPE=(5,), PATH=PATH)
+    MEMORY.Extend(np.ones((3, 5)), [0, 1, 2], [0., 1., 0.], np.ones((3, 5)), [False, False, True])
+    MEMORY.Flush()
+    REOPENED = ReplayMemory(CAPACITY=8, STATE_SHAPE=(5,), PATH=PATH)
+    assert len(REOPENED) == 3 and REOPENED.DATA["ACTION"][:3].tolist() == [0, 1, 2]
+    with pytest.raises(ValueError, match="CAPACITY"):
+        ReplayMemory(CAPACITY=16, STATE_SHAPE=(5,), PATH=PATH)
+    with pytest.raises(ValueError, match="dtype"):
+        ReplayMemory(CAPACITY=8, STATE_SHAPE=(4,), PATH=PATH)
+
+# STEP 2. The rows given a large TD error are sampled most, and their WEIGHTS are the smallest.
+
+
+def test_Update_Priorities():
+    MEMORY = ReplayMemory(CAPACITY=8, STATE_SHAPE=(5,), SEED=0)
+    MEMORY.Extend(np.zeros((8, 5)), np.arange(8), np.zeros(8), np.zeros((8, 5)), np.zeros(8, dtype=bool))
+    MEMORY.Update_Priorities([3], [1.])
+    ROWS, INDICES, WEIGHTS = MEMORY.Sample(32)
+    assert (INDICES == 3).mean() > 0.5
+    assert WEIGHTS[INDICES == 3].max() < WEIGHTS[INDICES != 3].min()
@@ -0,0 +1,56 @@
+#################################################################################################################
+# The Cache File is saved with the SOURCE that solved its Results, so a Simulator of another Backend or Topology never
+# reads them back as its own.
+import io
+import pickle
+import contextlib
+import pytest
+import Paths
+from Common.ResultCache import ResultCache
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+from Topology import Default_Topology
+#################################################################################################################
+
+# STEP 1. Make a Simulator on a Cache, without printing.
+
+
+def Make_Env(CACHE, TOPOLOGY=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Simulator(ConverterModel(TOPOLOGY=TOPOLOGY), CACHE, TOPOLOGY=TOPOLOGY)
+
+# STEP 2. The Results of a File are kept for the same SOURCE, and dropped for another one or for an unknown one.
+
+
+def test_File_Of_Another_Source_Is_Ignored(tmp_path):
+    PATH = str(tmp_path/"Cache.pkl")
+    CACHE = ResultCache(PATH=PATH)
+    env = Make_Env(CACHE)
+    CACHE.Put((400.,), 1.)
+    CACHE.Save()
+    assert len(ResultCache(PATH=PATH)) == 1 and ResultCache(PATH=PATH).SOURCE == env.SOURCE
+
+    SAME = ResultCache(PATH=PATH)
+    Make_Env(SAME)
+    assert SAME.Get((400.,)) == 1.
+    OTHER = ResultCache(PATH=PATH)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Make_Env(OTHER, Default_Topology(5))
+    assert len(OTHER) == 0
+
+    with open(PATH, "wb") as FILE:
+        pickle.dump([((400.,), 1.)], FILE)   # Saved without its SOURCE
+    UNKNOWN = ResultCache(PATH=PATH)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Make_Env(UNKNOWN)
+    assert len(UNKNOWN) == 0
+
+# STEP 3. A Cache is shared by Simulators of the same SOURCE only.
+
+
+def test_Shared_Between_Sources_Is_Refused():
+    CACHE = ResultCache()
+    Make_Env(CACHE)
+    Make_Env(CACHE)
+    with pytest.raises(ValueError):
+        Make_Env(CACHE, Default_Topology(5))
@@ -0,0 +1,50 @@
+#################################################################################################################
+# Screening is tested on the in-process stand-in, which has a cheap "SCREEN" Fidelity: the terminal Rewards have to
+# be the ones of full Fidelity solves, and the screening error is measured on a random sample.
+import io
+import contextlib
+import numpy as np
+import pytest
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+import Paths
+from Common.ResultCache import ResultCache
+#################################################################################################################
+
+# STEP 1. Step a Simulator with random actions, and keep the Reward and Conversions at the end of every episode.
+
+
+def Run(SCREEN_MARGIN, SCREEN_SAMPLE=Simulator.SCREEN_SAMPLE, N_STEPS=4000, SEED=0):
+    env = Simulator(ConverterModel(), ResultCache(MAX_SIZE=0), SCREEN_MARGIN=SCREEN_MARGIN)
+    env.SCREEN_SAMPLE = SCREEN_SAMPLE
+    RNG = np.random.default_rng(SEED)
+    ENDS = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+        for _ in range(N_STEPS):
+            STATE, REWARD, done, INFO = env.step(int(RNG.choice([0, 1, 2, 3, 4, 1, 2, 3, 4, 3, 3])))
+            if done:
+                ENDS.append((REWARD, env.CONVERSION_LIST[-2], env.CONVERSION_LIST[-1]))
+                env.reset()
+    return env, ENDS
+
+# STEP 2. The last two Reactors are solved at full Fidelity, so the terminal Rewards are the same as without screening.
+
+
+def test_Terminal_Rewards_Are_Full_Fidelity():
+    FULL, ENDS_FULL = Run(SCREEN_MARGIN=None)
+    SCREENED, ENDS_SCREENED = Run(SCREEN_MARGIN=0.01)
+    assert SCREENED.FIDELITY_SOLVES["SCREEN"] > 0 and SCREENED.FIDELITY_SOLVES["FULL"] < FULL.FIDELITY_SOLVES["FULL"]
+    assert np.array(ENDS_SCREENED) == pytest.approx(np.array(ENDS_FULL), abs=1e-12)
+    assert set(SCREENED.STAGE_BEST) == {1, 2, 3, 4}
+    assert max(len(KEY) for KEY in SCREENED.SCREEN_CACHE.RESULTS) < SCREENED.TOPOLOGY.N_STAGES - 1
+
+# STEP 3. The screening error is measured on a random sample of the screened Reactors, not only the escalated ones.
+
+
+def test_Screening_Error_Is_Sampled():
+    UNSAMPLED, ENDS = Run(SCREEN_MARGIN=0.01, SCREEN_SAMPLE=0.)
+    assert UNSAMPLED.ESCALATIONS > 0 and UNSAMPLED.get_fidelity_stats()["SCREEN_ERROR"]["N"] == 0
+    SAMPLED, ENDS = Run(SCREEN_MARGIN=0.01)
+    STATS = SAMPLED.get_fidelity_stats()
+    assert STATS["SCREEN_ERROR"]["N"] > 0 and STATS["SCREEN_ERROR"]["MAX"] < 1e-3
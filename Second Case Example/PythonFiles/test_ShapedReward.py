@@ -0,0 +1,56 @@
+#################################################################################################################
+# The shaped-reward Simulator of "SimulationEnv.py" is tested against the Simulator of "SimulationEnv2.py" it extends:
+# with the same actions both see the same Flowsheet, and only the Rewards differ, by the bonuses of the original
+# shaped-reward Environement.
+import io
+import contextlib
+import numpy as np
+from SimulationEnv import Simulator as Shaped_Simulator
+from SimulationEnv2 import Simulator
+from KineticModel import ConverterModel
+#################################################################################################################
+
+# STEP 1. The bonus of the original Environement for a Move that reached CONVERSION, in the Reactor of N_CONVERSIONS.
+
+
+def Bonus(CONVERSION, N_CONVERSIONS):
+    BONUS = 0
+    if CONVERSION < 0.7:
+        BONUS = -2
+    elif 0.7 < CONVERSION < 0.9:
+        BONUS = 5
+    elif 0.9 < CONVERSION < 0.95:
+        BONUS = 10
+    elif CONVERSION > 0.95:
+        BONUS = 15
+    if N_CONVERSIONS == 4:
+        if 0.7 < CONVERSION < 0.9:
+            BONUS = 20
+        elif 0.9 < CONVERSION < 0.95:
+            BONUS = 30
+        elif CONVERSION > 0.95:
+            BONUS = 100
+    return BONUS
+
+# STEP 2. The same States and done flags, a shaped Reward for every Move and -10 instead of -1 for a clamped Change.
+
+
+def test_Shaped_Rewards():
+    with contextlib.redirect_stdout(io.StringIO()):
+        SHAPED, BASE = Shaped_Simulator(ConverterModel()), Simulator(ConverterModel())
+        RNG = np.random.default_rng(0)
+        SHAPED.reset()
+        BASE.reset()
+        for _ in range(2000):
+            action = int(RNG.choice([0, 1, 2, 3, 4, 3, 3, 4, 4]))
+            N_CONVERSIONS = len(BASE.CONVERSION_LIST)
+            STATE, REWARD, done, INFO = SHAPED.step(action)
+            BASE_STATE, BASE_REWARD, BASE_done, BASE_INFO = BASE.step(action)
+            assert np.array_equal(STATE, BASE_STATE) and done == BASE_done
+            if action == 0:
+                assert REWARD == BASE_REWARD + Bonus(BASE.CONVERSION, N_CONVERSIONS)
+            else:
+                assert REWARD == 10*BASE_REWARD  # 0, or the CLAMP_PENALTY
+            if done:
+                SHAPED.reset()
+                BASE.reset()
@@ -0,0 +1,22 @@
+#################################################################################################################
+# The error of the Surrogate is only measured on the Result that answers its Get: a Get whose step was never Simulated
+# (Eg. it was screened, or did not converge) must not be compared with the next Result that is added.
+import Paths
+from Common.Surrogate import Surrogate
+#################################################################################################################
+
+# STEP 1. Only the Add of the same KEY and Features as the last Get records an error.
+
+
+def test_Error_Only_For_Matching_Add():
+    SURROGATE = Surrogate(MAX_STD=0., AUDIT=0.)    # Every Get falls back to the Flowsheet
+    SURROGATE.Add(1, [3.], 1.)
+    assert SURROGATE.Get(1, [3.5]) is None  # Screened: no Add follows
+    MEAN, _ = SURROGATE.Predict(1, [5.])
+    assert SURROGATE.Get(1, [5.]) is None
+    SURROGATE.Add(1, [4.], 2.)  # Eg. a Result read from the Store
+    assert SURROGATE.FALLBACK_ERRORS == []
+    SURROGATE.Add(1, [5.], 3.)
+    assert SURROGATE.FALLBACK_ERRORS == [abs(MEAN - 3.)]
+    SURROGATE.Add(1, [5.], 3.)  # Answered once only
+    assert len(SURROGATE.FALLBACK_ERRORS) == 1
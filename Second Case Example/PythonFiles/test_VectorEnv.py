@@ -0,0 +1,93 @@
+#################################################################################################################
+# The Vector Environement is tested with the in-process stand-in, so the Workers run on any Operating System.
+import os
+import glob
+import signal
+import functools
+import numpy as np
+import pytest
+from VectorEnv import VectorEnv, Make_Stand_In_Env
+import Paths
+from Common.Metrics import Read_Metrics
+#################################################################################################################
+
+# STEP 1. Workers started with the stand-in reset and step like the Simulator itself.
+
+
+def test_Workers_Step():
+    VENV = VectorEnv(2, MAKE_ENV=Make_Stand_In_Env)
+    try:
+        STATES = VENV.reset()
+        assert STATES.shape == (2, 5)
+        STATES, REWARDS, DONES, INFOS = VENV.step([1, 0])
+        assert STATES.shape == (2, 5) and len(REWARDS) == 2 and not DONES.any()
+        assert np.isclose(STATES[0][1], 355/600)    # TC1 was raised by 5 K
+    finally:
+        VENV.close()
+
+# STEP 2. A Worker that was killed is restarted on a new episode, and its temporary Directory is replaced.
+
+
+def test_Killed_Worker_Is_Restarted():
+    VENV = VectorEnv(2, MAKE_ENV=Make_Stand_In_Env)
+    try:
+        VENV.reset()
+        DIRECTORY = VENV.DIRECTORIES[1]
+        assert os.path.isdir(DIRECTORY)
+        VENV.PROCESSES[1].kill()
+        VENV.PROCESSES[1].join()
+        STATES, REWARDS, DONES, INFOS = VENV.step([1, 1])
+        assert VENV.RESTARTS == 1
+        assert INFOS[1] == {"RESTARTED": True} and DONES[1] and REWARDS[1] == 0
+        assert not INFOS[0].get("RESTARTED")
+        assert not os.path.exists(DIRECTORY) and os.path.isdir(VENV.DIRECTORIES[1])
+        VENV.step([0, 0])   # The new Worker steps like the others
+    finally:
+        VENV.close()
+    assert VENV.DIRECTORIES == [None, None]
+
+# STEP 3. Closing the Vector Environement stops every Worker and deletes every temporary Directory.
+
+
+def test_Close_Removes_Directories():
+    VENV = VectorEnv(2, MAKE_ENV=Make_Stand_In_Env)
+    DIRECTORIES = list(VENV.DIRECTORIES)
+    VENV.reset()
+    VENV.close()
+    assert not any(os.path.exists(DIRECTORY) for DIRECTORY in DIRECTORIES)
+    assert not any(PROCESS.is_alive() for PROCESS in VENV.PROCESSES)
+
+# STEP 4. A Worker that hangs (here: stopped) is restarted once STEP_TIMEOUT has passed, like a crashed one.
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGSTOP"), reason="Stopping a process needs SIGSTOP")
+def test_Hung_Worker_Is_Restarted():
+    VENV = VectorEnv(2, MAKE_ENV=Make_Stand_In_Env, STEP_TIMEOUT=2)
+    try:
+        VENV.reset()
+        os.kill(VENV.PROCESSES[1].pid, signal.SIGSTOP)
+        STATES, REWARDS, DONES, INFOS = VENV.step([1, 1])
+        assert VENV.RESTARTS == 1
+        assert INFOS[1] == {"RESTARTED": True} and DONES[1]
+        assert not INFOS[0].get("RESTARTED")
+        VENV.step([0, 0])   # The new Worker steps like the others
+    finally:
+        VENV.close()
+
+# STEP 5. Every Worker streams its episodes to its own Metrics File, and closing a Worker closes its Simulator, which
+# writes its last episodes.
+
+
+def test_Workers_Write_Metrics(tmp_path):
+    VENV = VectorEnv(2, MAKE_ENV=functools.partial(Make_Stand_In_Env, METRICS_DIRECTORY=str(tmp_path)))
+    try:
+        VENV.reset()
+        for _ in range(4):  # One Move per Reactor ends the episode
+            STATES, REWARDS, DONES, INFOS = VENV.step([0, 0])
+        assert DONES.all()
+    finally:
+        VENV.close()
+    PATHS = glob.glob(str(tmp_path/"Worker*_Metrics.dat"))
+    assert len(PATHS) == 2
+    for PATH in PATHS:
+        assert sum(len(ROWS) for ROWS in Read_Metrics(PATH)) == 1